@@ -0,0 +1,276 @@
+"""Yoğun okunan JSON uç noktalarının asyncio tabanlı, salt okunur kopyası.
+
+Flask uygulamasının yanında ayrı bir ASGI sunucusunda çalışır:
+    uvicorn api_async:app --host 0.0.0.0 --port 5002 --workers 2
+
+Yollar Flask'takilerle aynıdır; bir ters vekil /api/ okumalarını bu servise yönlendirebilir.
+Kimlik doğrulama Flask'ın imzalı oturum çerezi ile yapılır, bu yüzden iki servis aynı
+FLASK_SECRET_KEY ile çalışmalıdır. Veritabanına asyncpg ile, kendi havuzu üzerinden bağlanır;
+yavaş bir sorgu yalnızca kendi bağlantısını bekletir, diğer istekleri engellemez.
+"""
+import json
+import os
+from contextlib import asynccontextmanager
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import asyncpg
+from flask import Flask
+from flask.sessions import SecureCookieSessionInterface
+from itsdangerous import BadSignature
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.http import http_date, parse_date, parse_etags
+
+from db import DB_CONFIG
+from doluluk import DILIM_DAKIKA, GUNLUK_DILIM, MAX_REZERVASYON_SURESI, dilimlere_bol, gun_coz
+from oneri import doluluk_matrisi, talep_matrisi, zaman_oner
+
+ASYNC_POOL_MIN = int(os.getenv('ASYNC_POOL_MIN', '2'))
+ASYNC_POOL_MAX = int(os.getenv('ASYNC_POOL_MAX', '20'))
+
+_flask = Flask(__name__)
+_flask.secret_key = os.getenv('FLASK_SECRET_KEY', 'studyflow_secret_key_2025')
+_oturum_cozucu = SecureCookieSessionInterface().get_signing_serializer(_flask)
+_oturum_cerezi = _flask.config['SESSION_COOKIE_NAME']
+
+
+def _json_varsayilan(deger):
+    if isinstance(deger, (datetime, date, time)):
+        return deger.isoformat()
+    if isinstance(deger, Decimal):
+        return float(deger)
+    raise TypeError(type(deger).__name__)
+
+
+def json_yanit(veri, status_code=200):
+    return Response(json.dumps(veri, default=_json_varsayilan), status_code=status_code,
+                    media_type='application/json')
+
+
+def kullanici_id(request):
+    cerez = request.cookies.get(_oturum_cerezi)
+    if not cerez:
+        return None
+    try:
+        oturum = _oturum_cozucu.loads(cerez, max_age=int(_flask.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return None
+    return oturum.get('user_id')
+
+
+def giris_gerekli(f):
+    async def sarmalayici(request):
+        request.state.kullanici_id = kullanici_id(request)
+        if request.state.kullanici_id is None:
+            return JSONResponse({'hata': 'Giriş yapmalısınız.'}, status_code=401)
+        return await f(request)
+    return sarmalayici
+
+
+def tarih_saat_coz(metin):
+    try:
+        return datetime.fromisoformat(metin.replace('Z', '+00:00')).replace(tzinfo=None)
+    except (AttributeError, ValueError):
+        return None
+
+
+@giris_gerekli
+async def takvim_verileri(request):
+    kullanici = request.state.kullanici_id
+    simdi = datetime.now()
+    pencere_bas = tarih_saat_coz(request.query_params.get('start')) or datetime(simdi.year, simdi.month, 1) - timedelta(days=7)
+    pencere_bit = tarih_saat_coz(request.query_params.get('end')) or pencere_bas + timedelta(days=49)
+
+    pool = request.app.state.pool
+    sayac = await pool.fetchrow("""
+        SELECT surum, son_degisiklik FROM kullanici_sayaclari WHERE kullanici_id = $1
+    """, kullanici)
+    # Flask'taki takvim_verileri ile aynı koşullu istek kuralları
+    etag = f'{kullanici}-{sayac["surum"] if sayac else 0}'
+    son_degisiklik = sayac['son_degisiklik'].replace(microsecond=0) if sayac else None
+    basliklar = {'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache'}
+    if son_degisiklik:
+        basliklar['Last-Modified'] = http_date(son_degisiklik)
+    if_none_match = request.headers.get('if-none-match')
+    if_modified_since = parse_date(request.headers.get('if-modified-since'))
+    if parse_etags(if_none_match).contains(etag) or (
+            not if_none_match and son_degisiklik and if_modified_since
+            and son_degisiklik <= if_modified_since.replace(tzinfo=None)):
+        return Response(status_code=304, headers=basliklar)
+
+    async def olaylar():
+        ilk = True
+        yield '['
+        async with pool.acquire() as conn, conn.transaction():
+            async for r in conn.cursor("""
+                SELECT r.rezervasyon_id, r.baslangic_zamani, r.bitis_zamani, r.durum,
+                       ca.alan_adi, ca.konum
+                FROM rezervasyonlar r
+                JOIN calisma_alanlari ca ON r.alan_id = ca.alan_id
+                WHERE r.kullanici_id = $1
+                AND r.baslangic_zamani < $2
+                AND r.baslangic_zamani > $3::TIMESTAMP - INTERVAL '4 hours'
+                AND r.bitis_zamani > $3
+                ORDER BY r.baslangic_zamani
+            """, kullanici, pencere_bit, pencere_bas, prefetch=500):
+                color = '#22c55e' if r['durum'] == 'aktif' else '#ef4444' if r['durum'] == 'iptal' else '#3b82f6'
+                yield ('' if ilk else ',') + json.dumps({
+                    'id': f"rez_{r['rezervasyon_id']}",
+                    'title': f"📅 {r['alan_adi']}",
+                    'start': r['baslangic_zamani'].isoformat(),
+                    'end': r['bitis_zamani'].isoformat(),
+                    'color': color,
+                    'extendedProps': {'type': 'rezervasyon', 'konum': r['konum'], 'durum': r['durum']}
+                })
+                ilk = False
+
+            async for o in conn.cursor("""
+                SELECT co.oturum_id, co.giris_zamani, co.cikis_zamani, co.verimlilik_puani,
+                       ca.alan_adi
+                FROM calisma_oturumlari co
+                JOIN calisma_alanlari ca ON co.alan_id = ca.alan_id
+                WHERE co.kullanici_id = $1 AND co.cikis_zamani IS NOT NULL
+                AND co.cikis_zamani > $2
+                AND co.giris_zamani < $3
+                ORDER BY co.giris_zamani
+            """, kullanici, pencere_bas, pencere_bit, prefetch=500):
+                yield ('' if ilk else ',') + json.dumps({
+                    'id': f"oturum_{o['oturum_id']}",
+                    'title': f"📖 {o['alan_adi']}",
+                    'start': o['giris_zamani'].isoformat(),
+                    'end': o['cikis_zamani'].isoformat(),
+                    'color': '#8b5cf6',
+                    'extendedProps': {'type': 'oturum', 'verimlilik': o['verimlilik_puani']}
+                })
+                ilk = False
+        yield ']'
+
+    return StreamingResponse(olaylar(), media_type='application/json', headers=basliklar)
+
+
+@giris_gerekli
+async def musait_alanlar(request):
+    p = request.query_params
+    baslangic = tarih_saat_coz(p.get('baslangic'))
+    bitis = tarih_saat_coz(p.get('bitis'))
+    if baslangic is None or bitis is None:
+        return JSONResponse({'hata': 'baslangic ve bitis parametreleri gereklidir.'}, status_code=400)
+    satirlar = await request.app.state.pool.fetch("""
+        SELECT * FROM fn_musait_alanlar($1, $2, $3, $4, $5, $6, $7)
+    """, baslangic, bitis, p.get('tur') or None, p.get('konum') or None, p.get('q') or None,
+        True if p.get('priz') else None, True if p.get('sessiz') else None)
+    return json_yanit([dict(r) for r in satirlar])
+
+
+async def aktif_rezervasyonlar(pool, bas, bit, kullanici=None):
+    return await pool.fetch("""
+        SELECT r.alan_id, r.baslangic_zamani, r.bitis_zamani
+        FROM rezervasyonlar r
+        WHERE r.durum = 'aktif'
+        AND ($4::INTEGER IS NULL OR r.kullanici_id = $4)
+        AND r.baslangic_zamani < $1
+        AND r.baslangic_zamani > $2
+        AND r.bitis_zamani > $3
+    """, bit, bas - MAX_REZERVASYON_SURESI, bas, kullanici)
+
+
+@giris_gerekli
+async def zaman_onerisi(request):
+    p = request.query_params
+    try:
+        alan_id = int(p['alan_id']) if p.get('alan_id') else None
+        tur_idler = {int(t) for t in p.getlist('tur')}
+        sure = int(p.get('sure', 2))
+    except ValueError:
+        return JSONResponse({'hata': 'alan_id, tur ve sure tamsayı olmalıdır.'}, status_code=400)
+    if not 1 <= sure <= 4:
+        return JSONResponse({'hata': 'sure 1 ile 4 saat arasında olmalıdır.'}, status_code=400)
+    simdi = datetime.now()
+    tarih = gun_coz(p.get('tarih'), simdi.date())
+    if tarih < simdi.date():
+        return json_yanit([])
+    en_erken = 0
+    if tarih == simdi.date():
+        en_erken = -(-(simdi.hour * 60 + simdi.minute) // DILIM_DAKIKA)
+
+    pool = request.app.state.pool
+    alanlar = [dict(a) for a in await pool.fetch("""
+        SELECT ca.alan_id, ca.alan_adi, ca.konum, ca.kapasite, ca.tur_id, at.tur_adi
+        FROM calisma_alanlari ca
+        JOIN alan_turleri at ON ca.tur_id = at.tur_id
+        WHERE ca.aktif = TRUE
+        ORDER BY ca.konum, ca.alan_adi
+    """) if (not alan_id or a['alan_id'] == alan_id) and (not tur_idler or a['tur_id'] in tur_idler)]
+    if not alanlar:
+        return json_yanit([])
+
+    bas = datetime.combine(tarih, time())
+    bit = bas + timedelta(days=1)
+    doluluk, mesgul = {}, []
+    for r in await aktif_rezervasyonlar(pool, bas, bit):
+        for _, i, j in dilimlere_bol(max(r['baslangic_zamani'], bas), min(r['bitis_zamani'], bit)):
+            dilimler = doluluk.setdefault(r['alan_id'], [0] * GUNLUK_DILIM)
+            for k in range(i, j):
+                dilimler[k] += 1
+    for r in await aktif_rezervasyonlar(pool, bas, bit, request.state.kullanici_id):
+        mesgul.extend((i, j) for _, i, j in
+                      dilimlere_bol(max(r['baslangic_zamani'], bas), min(r['bitis_zamani'], bit)))
+    talep = await pool.fetch("""
+        SELECT t.alan_id, t.saat, t.agirlik * (1 - d.sonum) AS sayi
+        FROM talep_modeli t
+        CROSS JOIN talep_modeli_durum d
+        WHERE t.haftagunu = $1
+    """, tarih.isoweekday())
+
+    return json_yanit(zaman_oner(alanlar, doluluk_matrisi(alanlar, doluluk), talep_matrisi(alanlar, talep),
+                                 sure, mesgul=mesgul, en_erken=en_erken))
+
+
+@giris_gerekli
+async def doluluk_verileri(request):
+    ilk_gun = gun_coz(request.query_params.get('baslangic'), date.today())
+    try:
+        gun_sayisi = min(max(int(request.query_params.get('gun', 1)), 1), 31)
+    except ValueError:
+        gun_sayisi = 1
+    bas = datetime.combine(ilk_gun, time())
+    bit = bas + timedelta(days=gun_sayisi)
+
+    pool = request.app.state.pool
+    alanlar = await pool.fetch("SELECT alan_id, kapasite FROM calisma_alanlari WHERE aktif = TRUE")
+    satirlar = await aktif_rezervasyonlar(pool, bas, bit)
+
+    gunler = {(ilk_gun + timedelta(days=i)).isoformat(): {} for i in range(gun_sayisi)}
+    for r in satirlar:
+        for gun, i, j in dilimlere_bol(max(r['baslangic_zamani'], bas), min(r['bitis_zamani'], bit)):
+            dilimler = gunler[gun.isoformat()].setdefault(str(r['alan_id']), [0] * GUNLUK_DILIM)
+            for k in range(i, j):
+                dilimler[k] += 1
+
+    return json_yanit({
+        'dilim_dakika': DILIM_DAKIKA,
+        'kapasite': {str(a['alan_id']): a['kapasite'] for a in alanlar},
+        'gunler': gunler,
+    })
+
+
+@asynccontextmanager
+async def omur(app):
+    app.state.pool = await asyncpg.create_pool(
+        host=DB_CONFIG['host'], port=int(DB_CONFIG['port']), database=DB_CONFIG['database'],
+        user=DB_CONFIG['user'], password=DB_CONFIG['password'] or None,
+        min_size=ASYNC_POOL_MIN, max_size=ASYNC_POOL_MAX)
+    yield
+    await app.state.pool.close()
+
+
+app = Starlette(routes=[
+    Route('/api/takvim-verileri', takvim_verileri),
+    Route('/api/musait-alanlar', musait_alanlar),
+    Route('/api/zaman-onerisi', zaman_onerisi),
+    Route('/api/doluluk', doluluk_verileri),
+], middleware=[Middleware(GZipMiddleware, minimum_size=512)], lifespan=omur)
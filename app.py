@@ -1,25 +1,258 @@
 #Ata Metin Türetken 20011050
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, g, Response, stream_with_context
+from flask import before_render_template, template_rendered
 from functools import wraps
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+import click
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+import hashlib
+import hmac
+import json
 import os
+import queue
+import stat
+
+from assets import Assets, build as paketleri_derle, compress_response
+from cache import TTLCache
+from db import DB_CONFIG, get_pool, get_listener, get_replica, lsn_to_int
+from doluluk import DolulukIndeksi, DILIM_DAKIKA, MAX_REZERVASYON_SURESI, dilimlere_bol, saatlik_tepe, gun_coz
+from oneri import doluluk_matrisi, talep_matrisi, zaman_oner
+from supurucu import RezervasyonSupurucu
+from canli import CanliYayin, sse_mesaji
+from metrics import Metrics, SlowQueryLog
 
 app = Flask(__name__)
-app.secret_key = 'studyflow_secret_key_2025'
-
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'database': os.getenv('DB_NAME', 'studyflow'),
-    'user': os.getenv('DB_USER', 'ataturetken'),
-    'password': os.getenv('DB_PASSWORD', ''),
-    'port': os.getenv('DB_PORT', '5432')
+app.secret_key = os.getenv('FLASK_SECRET_KEY', 'studyflow_secret_key_2025')
+
+KATALOG_TTL = int(os.getenv('KATALOG_TTL', '600'))
+TOPLU_REZERVASYON_LIMIT = int(os.getenv('TOPLU_REZERVASYON_LIMIT', '120'))
+SAYFA_BOYUTU = int(os.getenv('SAYFA_BOYUTU', '50'))
+LOG_SAKLAMA_AY = int(os.getenv('LOG_SAKLAMA_AY', '12'))
+LOG_ARSIVLE = os.getenv('LOG_ARSIVLE', '0') == '1'
+ARSIV_TABLESPACE = os.getenv('ARSIV_TABLESPACE') or None
+BOLUMLU_TABLOLAR = ('log_kayitlari', 'rezervasyonlar', 'calisma_oturumlari')
+ARSIV_TABLOLARI = ('rezervasyonlar', 'calisma_oturumlari')
+# 0 ise arka plan süpürücüsü başlatılmaz; `flask rezervasyon-supur` cron ile çalıştırılabilir
+SUPURUCU_ARALIK = int(os.getenv('SUPURUCU_ARALIK', '0'))
+CANLI_NABIZ = float(os.getenv('CANLI_NABIZ', '15'))
+# worker başına açık SSE akışı sınırı; gunicorn.conf.py worker moduna göre belirler
+CANLI_AZAMI_ABONE = int(os.getenv('CANLI_AZAMI_ABONE', '16'))
+# gunicorn worker'larının ölçümlerini birleştirmek için ortak dizin; boşsa yalnızca yanıtlayan süreç raporlanır
+METRIK_DIZINI = os.getenv('METRIK_DIZINI') or None
+# /metrics verilirse yalnızca "Authorization: Bearer <token>" ile, verilmezse yalnızca yönetici oturumuyla açılır
+METRIK_TOKEN = os.getenv('METRIK_TOKEN') or None
+YAVAS_SORGU_MS = float(os.getenv('YAVAS_SORGU_MS', '200'))
+YAVAS_SORGU_EXPLAIN_ORANI = float(os.getenv('YAVAS_SORGU_EXPLAIN_ORANI', '0.1'))
+YAVAS_SORGU_KAPASITE = int(os.getenv('YAVAS_SORGU_KAPASITE', '200'))
+SUPURUCU_PARTI = int(os.getenv('SUPURUCU_PARTI', '500'))
+GELMEDI_TOLERANS_DAKIKA = int(os.getenv('GELMEDI_TOLERANS_DAKIKA', '15'))
+ONERI_TALEP_TTL = int(os.getenv('ONERI_TALEP_TTL', '3600'))
+SAYFA_TTL = int(os.getenv('SAYFA_TTL', '300'))
+PARCA_TTL = int(os.getenv('PARCA_TTL', '600'))
+PARCA_KAPASITE = int(os.getenv('PARCA_KAPASITE', '20000'))
+# önde sıkıştıran bir ters vekil varsa 0 yapılabilir
+DINAMIK_SIKISTIRMA = os.getenv('DINAMIK_SIKISTIRMA', '1') == '1'
+# derlenmiş şablonlar worker'lar ve yeniden başlatmalar arasında paylaşılır; verilmezse Jinja'nın
+# kullanıcıya özel (0700, sahipliği denetlenen) geçici dizini kullanılır, boşsa kapalı
+SABLON_ONBELLEK_DIZINI = os.getenv('SABLON_ONBELLEK_DIZINI')
+
+if SABLON_ONBELLEK_DIZINI is None:
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+elif SABLON_ONBELLEK_DIZINI:
+    # başka bir kullanıcının önceden açıp içine bytecode bıraktığı dizin yüklenmemeli
+    os.makedirs(SABLON_ONBELLEK_DIZINI, mode=0o700, exist_ok=True)
+    dizin = os.lstat(SABLON_ONBELLEK_DIZINI)
+    if not stat.S_ISDIR(dizin.st_mode) or dizin.st_uid != os.getuid() or dizin.st_mode & 0o022:
+        raise RuntimeError(f'SABLON_ONBELLEK_DIZINI ({SABLON_ONBELLEK_DIZINI}) bu kullanıcıya ait bir dizin '
+                           'olmalı ve başkaları tarafından yazılabilir olmamalıdır.')
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(SABLON_ONBELLEK_DIZINI)
+
+varliklar = Assets(app.static_folder, 'varlik_dosyasi')
+app.jinja_env.globals['varlik'] = varliklar.url
+
+katalog_onbellek = TTLCache(KATALOG_TTL)
+get_listener().subscribe('katalog_degisti', lambda kanal, veri: katalog_onbellek.invalidate())
+get_listener().on_reconnect(katalog_onbellek.invalidate)
+
+sayfa_onbellek = TTLCache(SAYFA_TTL)
+talep_onbellek = TTLCache(ONERI_TALEP_TTL, 7)
+parca_onbellek = TTLCache(PARCA_TTL, PARCA_KAPASITE)
+
+doluluk_indeksi = DolulukIndeksi()
+get_listener().subscribe('doluluk_degisti', doluluk_indeksi.bildirim_uygula)
+get_listener().on_reconnect(doluluk_indeksi.temizle)
+
+canli_yayin = CanliYayin(doluluk_indeksi, azami_abone=CANLI_AZAMI_ABONE)
+get_listener().subscribe('doluluk_degisti', canli_yayin.doluluk_bildirimi)
+get_listener().subscribe('oturum_degisti', canli_yayin.oturum_bildirimi)
+get_listener().on_reconnect(canli_yayin.baglanti_yenilendi)
+
+supurucu = RezervasyonSupurucu(SUPURUCU_PARTI, GELMEDI_TOLERANS_DAKIKA)
+
+def _metrik_gostergeleri():
+    havuz = get_pool().stats()
+    gostergeler = {
+        'db_pool_in_use': havuz['in_use'],
+        'db_pool_waiting': havuz['waiting'],
+        'db_pool_timeouts_total': havuz['timeouts'],
+        'sse_subscribers': canli_yayin.stats()['abone'],
+    }
+    kopya = get_replica()
+    if kopya is not None:
+        durum = kopya.stats()
+        gostergeler.update({
+            'db_replica_healthy': int(durum['healthy']),
+            'db_replica_lag_seconds': durum['lag_s'] if durum['lag_s'] is not None else -1,
+            'db_replica_routed_total': durum['routed'],
+            'db_replica_fallback_total': durum['fallback_down'] + durum['fallback_lag'] + durum['fallback_own_write'],
+        })
+    return gostergeler
+
+yavas_sorgular = SlowQueryLog(YAVAS_SORGU_MS, YAVAS_SORGU_EXPLAIN_ORANI, YAVAS_SORGU_KAPASITE)
+metrikler = Metrics(METRIK_DIZINI, _metrik_gostergeleri, yavas_sorgular)
+
+@app.before_request
+def olcum_baslat():
+    g.olcum = metrikler.start(request.endpoint, session.get('user_id'))
+
+@app.after_request
+def olcum_durumu(yanit):
+    if 'olcum' in g:
+        g.olcum.status = yanit.status_code
+    return yanit
+
+@app.after_request
+def yazma_konumu_kaydet(yanit):
+    # Kullanıcının kendi yazdığını hemen ardından okuyabilmesi için okuma kopyası
+    # bu WAL konumunu oynatana kadar salt okunur rotaları da birincil sunucudan karşılanır.
+    conn = g.get('db_conn')
+    if (conn is None or get_replica() is None or request.method in ('GET', 'HEAD')
+            or 'user_id' not in session or yanit.status_code >= 500):
+        return yanit
+    conn.rollback()
+    cur = conn.cursor()
+    cur.execute("SELECT pg_current_wal_lsn()::TEXT AS konum")
+    session['yazma_konumu'] = cur.fetchone()['konum']
+    cur.close()
+    conn.rollback()
+    return yanit
+
+@app.after_request
+def yanit_sikistir(yanit):
+    if DINAMIK_SIKISTIRMA:
+        return compress_response(yanit, request.headers.get('Accept-Encoding', ''))
+    return yanit
+
+@app.teardown_request
+def olcum_bitir(exc):
+    olcum = g.pop('olcum', None)
+    if olcum is not None:
+        metrikler.finish(olcum, request.endpoint, request.method)
+
+def _sablon_basladi(sender, template, context, **extra):
+    if 'olcum' in g:
+        metrikler.render_started(g.olcum)
+
+def _sablon_bitti(sender, template, context, **extra):
+    if 'olcum' in g:
+        metrikler.render_finished(g.olcum)
+
+before_render_template.connect(_sablon_basladi, app)
+template_rendered.connect(_sablon_bitti, app)
+
+def get_db_connection(birincil=False):
+    """İsteğin veritabanı bağlantısını döndürür.
+
+    salt_okunur rotalarda, birincil=True istenmedikçe ve kopya uygunsa okuma kopyasına
+    bağlanılır; karar istek başına bir kez verilir.
+    """
+    if not birincil and g.get('salt_okunur'):
+        if 'kopya_conn' not in g:
+            kopya = get_replica()
+            konum = session.get('yazma_konumu')
+            g.kopya_conn = kopya.getconn(lsn_to_int(konum) if konum else 0) if kopya is not None else None
+        if g.kopya_conn is not None:
+            return g.kopya_conn
+    if 'db_conn' not in g:
+        g.db_conn = get_pool().getconn()
+        if SUPURUCU_ARALIK:
+            supurucu.baslat(get_pool(), SUPURUCU_ARALIK)
+    return g.db_conn
+
+@app.teardown_appcontext
+def release_db_connection(exc):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        get_pool().putconn(conn)
+    kopya_conn = g.pop('kopya_conn', None)
+    if kopya_conn is not None:
+        get_replica().putconn(kopya_conn)
+
+def _alan_katalogu_yukle():
+    # süreçte paylaşılan önbellekler, geride kalmış bir kopyadan doldurulmasın diye birincilden yüklenir
+    conn = get_db_connection(birincil=True)
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT ca.*, at.tur_adi 
+        FROM calisma_alanlari ca 
+        JOIN alan_turleri at ON ca.tur_id = at.tur_id
+        WHERE ca.aktif = TRUE
+        ORDER BY ca.konum, ca.alan_adi
+    """)
+    alanlar = [dict(alan) for alan in cur.fetchall()]
+    cur.close()
+    return alanlar
+
+def get_alan_katalogu():
+    get_listener().start()
+    return katalog_onbellek.get_or_load('alanlar', _alan_katalogu_yukle)
+
+def get_doluluk(ilk_gun, gun_sayisi=1):
+    listener = get_listener()
+    listener.start()
+    return doluluk_indeksi.gun_araligi(get_db_connection(birincil=True), ilk_gun, gun_sayisi,
+                                       canli=listener.connected)
+
+KABUL_MESAJLARI = {
+    'GECERSIZ_ARALIK': 'Bitiş saati başlangıç saatinden sonra olmalıdır!',
+    'SURE_ASIMI': 'Maksimum rezervasyon süresi 4 saattir!',
+    'ALAN_YOK': 'Seçilen alan bulunamadı veya kullanıma kapalı!',
+    'KULLANICI_CAKISMA': 'Bu zaman diliminde zaten "{cakisan_alan_adi}" alanında rezervasyonunuz var ({cakisan_baslangic:%H:%M}-{cakisan_bitis:%H:%M})!',
+    'KAPASITE_DOLU': 'Bu alan seçilen saatlerde dolu! (Kapasite: {alan_kapasitesi}, Mevcut rezervasyon: {mevcut_rezervasyon})',
+}
+
+TOPLU_SONUC_ETIKETLERI = {
+    'KABUL': 'Oluşturuldu',
+    'GECERSIZ_ARALIK': 'Geçersiz saat aralığı',
+    'SURE_ASIMI': '4 saati aşıyor',
+    'ALAN_YOK': 'Alan bulunamadı',
+    'TOPLU_CAKISMA': 'Talepte kabul edilen başka bir tekrarla çakışıyor',
+    'KULLANICI_CAKISMA': 'Mevcut rezervasyonunuzla çakışıyor',
+    'KAPASITE_DOLU': 'Alan dolu',
 }
 
-def get_db_connection():
-    conn = psycopg2.connect(**DB_CONFIG, cursor_factory=RealDictCursor)
-    return conn
+def kabul_mesaji(kabul):
+    return KABUL_MESAJLARI[kabul['sonuc']].format(**kabul)
+
+def imlec_coz(metin):
+    # imlec: "<zaman>_<kimlik>", önceki sayfanın son satırı
+    try:
+        zaman, kimlik = metin.rsplit('_', 1)
+        return datetime.fromisoformat(zaman), int(kimlik)
+    except (AttributeError, ValueError):
+        return None, None
+
+def sayfa_sonu(satirlar, zaman_alani, kimlik_alani):
+    """SAYFA_BOYUTU + 1 satır çekilmiş sorgu sonucunu keser ve varsa sonraki sayfanın adresini döndürür."""
+    if len(satirlar) <= SAYFA_BOYUTU:
+        return satirlar, None
+    satirlar = satirlar[:SAYFA_BOYUTU]
+    son = satirlar[-1]
+    args = request.args.to_dict()
+    args['imlec'] = f"{son[zaman_alani].isoformat()}_{son[kimlik_alani]}"
+    return satirlar, url_for(request.endpoint, **args)
 
 def login_required(f):
     @wraps(f)
@@ -42,11 +275,52 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def salt_okunur(f):
+    """Rotanın sorgularını, uygunsa okuma kopyasına yönlendirir; bu rotalar yazma yapmamalıdır."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.salt_okunur = True
+        return f(*args, **kwargs)
+    return decorated_function
+
+def anonim_onbellek(f):
+    """Giriş yapmamış ziyaretçiye gösterilen sorgusuz GET sayfasını ETag ile önbelleğe alır."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if request.method != 'GET' or request.args or 'user_id' in session or '_flashes' in session:
+            return f(*args, **kwargs)
+
+        def yukle():
+            govde = f(*args, **kwargs)
+            return govde, hashlib.sha1(govde.encode()).hexdigest()
+
+        govde, etag = sayfa_onbellek.get_or_load(request.path, yukle)
+        yanit = Response(govde, mimetype='text/html')
+        yanit.set_etag(etag)
+        yanit.headers['Cache-Control'] = 'no-cache'
+        yanit.vary.add('Cookie')
+        return yanit.make_conditional(request)
+    return decorated_function
+
+def kullanici_parcasi(ad, surum, sablon, yukle):
+    """Kullanıcıya özel bir şablon parçasını kullanıcı ve veri sürümüne göre önbelleğe alır.
+
+    yukle() şablon değişkenlerini döndürür ve yalnızca önbellekte karşılık yoksa çağrılır.
+    """
+    return parca_onbellek.get_or_load((ad, session['user_id'], surum),
+                                      lambda: Markup(render_template(sablon, **yukle())))
+
+@app.route('/varlik/<path:filename>')
+def varlik_dosyasi(filename):
+    return varliklar.send(filename, request.headers.get('Accept-Encoding', ''))
+
 @app.route('/')
+@anonim_onbellek
 def index():
     return render_template('index.html')
 
 @app.route('/login', methods=['GET', 'POST'])
+@anonim_onbellek
 def login():
     if request.method == 'POST':
         ogrenci_no = request.form['ogrenci_no']
@@ -61,7 +335,6 @@ def login():
         """, (ogrenci_no, sifre))
         user = cur.fetchone()
         cur.close()
-        conn.close()
         
         if user:
             session['user_id'] = user['kullanici_id']
@@ -101,14 +374,12 @@ def register():
     cur.execute("SELECT 1 FROM kullanicilar WHERE ogrenci_no = %s", (ogrenci_no,))
     if cur.fetchone():
         cur.close()
-        conn.close()
         flash('Bu öğrenci numarası zaten kayıtlı!', 'danger')
         return redirect(url_for('login'))
     
     cur.execute("SELECT 1 FROM kullanicilar WHERE email = %s", (email,))
     if cur.fetchone():
         cur.close()
-        conn.close()
         flash('Bu e-posta adresi zaten kayıtlı!', 'danger')
         return redirect(url_for('login'))
     
@@ -124,7 +395,6 @@ def register():
         flash(f'Kayıt sırasında hata oluştu: {str(e)}', 'danger')
     
     cur.close()
-    conn.close()
     return redirect(url_for('login'))
 
 @app.route('/dashboard')
@@ -135,16 +405,18 @@ def dashboard():
     
     cur.execute("""
         SELECT 
-            COUNT(DISTINCT r.rezervasyon_id) as toplam_rezervasyon,
-            COUNT(DISTINCT CASE WHEN r.durum = 'aktif' THEN r.rezervasyon_id END) as aktif_rezervasyon,
-            COUNT(DISTINCT co.oturum_id) as toplam_oturum,
-            COALESCE(ROUND(AVG(co.verimlilik_puani), 1), 0) as ort_verimlilik
+            COALESCE(s.rez_aktif + s.rez_iptal + s.rez_tamamlandi, 0) as toplam_rezervasyon,
+            COALESCE(s.rez_aktif, 0) as aktif_rezervasyon,
+            COALESCE(s.oturum_sayisi, 0) as toplam_oturum,
+            COALESCE(ROUND(s.verimlilik_toplami::NUMERIC / NULLIF(s.verimlilik_sayisi, 0), 1), 0) as ort_verimlilik,
+            COALESCE(s.surum, 0) as surum
         FROM kullanicilar k
-        LEFT JOIN rezervasyonlar r ON k.kullanici_id = r.kullanici_id
-        LEFT JOIN calisma_oturumlari co ON k.kullanici_id = co.kullanici_id
+        LEFT JOIN kullanici_sayaclari s ON k.kullanici_id = s.kullanici_id
         WHERE k.kullanici_id = %s
     """, (session['user_id'],))
     stats = cur.fetchone()
+    istatistik_kartlari = kullanici_parcasi('dashboard', stats['surum'] if stats else 0, 'parcalar/dashboard_istatistik.html',
+                                            lambda: {'stats': stats})
     
     cur.execute("""
         SELECT r.*, ca.alan_adi, ca.konum
@@ -176,10 +448,9 @@ def dashboard():
     aktif_oturum = cur.fetchone()
     
     cur.close()
-    conn.close()
     
     return render_template('dashboard.html', 
-                         stats=stats,
+                         istatistik_kartlari=istatistik_kartlari,
                          aktif_rezervasyonlar=aktif_rezervasyonlar,
                          son_oturumlar=son_oturumlar,
                          aktif_oturum=aktif_oturum)
@@ -221,59 +492,29 @@ def profil():
     
     cur.execute("""
         SELECT 
-            COUNT(DISTINCT r.rezervasyon_id) as toplam_rezervasyon,
-            COUNT(DISTINCT co.oturum_id) as toplam_oturum,
-            COALESCE(SUM(EXTRACT(EPOCH FROM (co.cikis_zamani - co.giris_zamani)) / 3600), 0) as toplam_saat,
-            COALESCE(ROUND(AVG(co.verimlilik_puani), 1), 0) as ort_verimlilik
+            COALESCE(s.rez_aktif + s.rez_iptal + s.rez_tamamlandi, 0) as toplam_rezervasyon,
+            COALESCE(s.tamamlanan_oturum, 0) as toplam_oturum,
+            COALESCE(s.sure_saniye_toplami / 3600, 0) as toplam_saat,
+            COALESCE(ROUND(s.verimlilik_toplami::NUMERIC / NULLIF(s.verimlilik_sayisi, 0), 1), 0) as ort_verimlilik
         FROM kullanicilar k
-        LEFT JOIN rezervasyonlar r ON k.kullanici_id = r.kullanici_id
-        LEFT JOIN calisma_oturumlari co ON k.kullanici_id = co.kullanici_id AND co.cikis_zamani IS NOT NULL
+        LEFT JOIN kullanici_sayaclari s ON k.kullanici_id = s.kullanici_id
         WHERE k.kullanici_id = %s
     """, (session['user_id'],))
     stats = cur.fetchone()
     
     cur.close()
-    conn.close()
     
     return render_template('profil.html', kullanici=kullanici, stats=stats)
 
 @app.route('/takvim')
 @login_required
 def takvim():
-    tarih = request.args.get('tarih', datetime.now().strftime('%Y-%m-%d'))
+    gun = gun_coz(request.args.get('tarih'), datetime.now().date())
+    tarih = gun.isoformat()
     
-    conn = get_db_connection()
-    cur = conn.cursor()
+    alanlar = get_alan_katalogu()
     
-    cur.execute("""
-        SELECT ca.alan_id, ca.alan_adi, ca.konum, ca.kapasite, at.tur_adi
-        FROM calisma_alanlari ca
-        JOIN alan_turleri at ON ca.tur_id = at.tur_id
-        WHERE ca.aktif = TRUE
-        ORDER BY ca.konum, ca.alan_adi
-    """)
-    alanlar = cur.fetchall()
-    
-    cur.execute("""
-        SELECT alan_id, 
-               EXTRACT(HOUR FROM baslangic_zamani)::INTEGER as baslangic_saat,
-               EXTRACT(HOUR FROM bitis_zamani)::INTEGER as bitis_saat,
-               COUNT(*) as rez_sayisi
-        FROM rezervasyonlar
-        WHERE DATE(baslangic_zamani) = %s AND durum = 'aktif'
-        GROUP BY alan_id, EXTRACT(HOUR FROM baslangic_zamani), EXTRACT(HOUR FROM bitis_zamani)
-    """, (tarih,))
-    rezervasyonlar_raw = cur.fetchall()
-    
-    doluluk = {}
-    for r in rezervasyonlar_raw:
-        alan_id = r['alan_id']
-        if alan_id not in doluluk:
-            doluluk[alan_id] = {}
-        for saat in range(r['baslangic_saat'], r['bitis_saat']):
-            if saat not in doluluk[alan_id]:
-                doluluk[alan_id][saat] = 0
-            doluluk[alan_id][saat] += r['rez_sayisi']
+    doluluk = saatlik_tepe(get_doluluk(gun)[gun])
     
     konumlar = {}
     for alan in alanlar:
@@ -284,75 +525,219 @@ def takvim():
     
     saatler = list(range(8, 22))
     
-    cur.close()
-    conn.close()
-    
     return render_template('takvim.html', 
                          konumlar=konumlar,
                          doluluk=doluluk,
                          saatler=saatler,
                          secili_tarih=tarih)
 
+@app.route('/api/doluluk')
+@login_required
+def doluluk_verileri():
+    ilk_gun = gun_coz(request.args.get('baslangic'), datetime.now().date())
+    gun_sayisi = min(max(request.args.get('gun', 1, type=int), 1), 31)
+    
+    veriler = get_doluluk(ilk_gun, gun_sayisi)
+    
+    return jsonify({
+        'dilim_dakika': DILIM_DAKIKA,
+        'kapasite': {str(a['alan_id']): a['kapasite'] for a in get_alan_katalogu()},
+        'gunler': {
+            gun.isoformat(): {str(alan_id): dilimler for alan_id, dilimler in alanlar.items()}
+            for gun, alanlar in veriler.items()
+        }
+    })
+
+@app.route('/api/yogunluk-haritasi')
+@login_required
+@salt_okunur
+def yogunluk_haritasi():
+    """Talep modelinden haftagünü x saat yoğunluk haritası; alan_id verilmezse bütün kampüs."""
+    alan_id = request.args.get('alan_id', type=int)
+    
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT sonum, islenen_gun, guncelleme FROM talep_modeli_durum")
+    durum = cur.fetchone()
+    if alan_id:
+        cur.execute("""
+            SELECT haftagunu, saat, agirlik FROM talep_modeli WHERE alan_id = %s
+        """, (alan_id,))
+    else:
+        cur.execute("SELECT haftagunu, saat, agirlik FROM talep_modeli_kampus")
+    satirlar = cur.fetchall()
+    cur.close()
+    
+    # satırlar pazartesi (1) .. pazar (7), sütunlar 00..23; değer haftalık ortalama dolu koltuk-saat
+    harita = [[0.0] * 24 for _ in range(7)]
+    for s in satirlar:
+        harita[s['haftagunu'] - 1][s['saat']] = round(s['agirlik'] * (1 - durum['sonum']), 2)
+    
+    yanit = jsonify({
+        'alan_id': alan_id,
+        'islenen_gun': durum['islenen_gun'].isoformat() if durum['islenen_gun'] else None,
+        'tepe': max(max(satir) for satir in harita),
+        'harita': harita,
+    })
+    # model günde bir kez değişir; --yeniden ya da --sonum ile yeniden kurulunca islenen_gun
+    # aynı kalabilir, guncelleme ise her yazımda değişir
+    guncelleme = durum['guncelleme'].timestamp() if durum['guncelleme'] else 0
+    yanit.set_etag(f"{alan_id or 'kampus'}-{durum['islenen_gun']}-{guncelleme:.6f}")
+    yanit.cache_control.private = True
+    yanit.cache_control.no_cache = True
+    return yanit.make_conditional(request)
+
+@app.route('/api/canli')
+@login_required
+def canli_akis():
+    """Doluluk ve oturum değişikliklerini Server-Sent Events olarak iletir.
+
+    Akış veritabanı bağlantısı tutmaz; olaylar sürecin ortak dinleyicisinden gelir.
+    ?tarih= verilirse yalnızca o güne ait rezervasyon olayları gönderilir.
+    """
+    gun = gun_coz(request.args.get('tarih'))
+    kuyruk = canli_yayin.abone_ol()
+    if kuyruk is None:
+        # EventSource 200 dışı yanıtta yeniden bağlanmaz; sayfa canlı güncelleme olmadan çalışır
+        return jsonify({'hata': 'Canlı akış kapasitesi dolu.'}), 503
+    get_listener().start()
+
+    def akis():
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                tur, veri = kuyruk.get(timeout=CANLI_NABIZ)
+            except queue.Empty:
+                yield ': nabiz\n\n'
+                continue
+            if tur == 'doluluk' and gun is not None and veri['gun'] != gun.isoformat():
+                continue
+            yield sse_mesaji(tur, veri)
+
+    yanit = Response(akis(), mimetype='text/event-stream')
+    # üreteç hiç başlamadan kapansa da abonelik bırakılır
+    yanit.call_on_close(lambda: canli_yayin.abonelikten_cik(kuyruk))
+    yanit.headers['Cache-Control'] = 'no-cache'
+    yanit.headers['X-Accel-Buffering'] = 'no'
+    return yanit
+
 @app.route('/api/takvim-verileri')
 @login_required
+@salt_okunur
 def takvim_verileri():
+    simdi = datetime.now()
+    pencere_bas = tarih_saat_coz(request.args.get('start')) or datetime(simdi.year, simdi.month, 1) - timedelta(days=7)
+    pencere_bit = tarih_saat_coz(request.args.get('end')) or pencere_bas + timedelta(days=49)
+    
     conn = get_db_connection()
     cur = conn.cursor()
+    cur.execute("""
+        SELECT surum, son_degisiklik FROM kullanici_sayaclari WHERE kullanici_id = %s
+    """, (session['user_id'],))
+    sayac = cur.fetchone()
+    cur.close()
+    conn.commit()
+    
+    etag = f"{session['user_id']}-{sayac['surum'] if sayac else 0}"
+    son_degisiklik = sayac['son_degisiklik'].replace(microsecond=0) if sayac else None
+    if request.if_none_match.contains(etag) or (
+            not request.if_none_match and son_degisiklik and request.if_modified_since
+            and son_degisiklik <= request.if_modified_since.replace(tzinfo=None)):
+        yanit = Response(status=304)
+    else:
+        yanit = Response(stream_with_context(takvim_olaylari(session['user_id'], pencere_bas, pencere_bit)),
+                         mimetype='application/json')
+    yanit.set_etag(etag)
+    if son_degisiklik:
+        yanit.last_modified = son_degisiklik
+    yanit.cache_control.private = True
+    yanit.cache_control.no_cache = True
+    return yanit
+
+def tarih_saat_coz(metin):
+    # FullCalendar start/end: "2025-01-01", "2025-01-01T00:00:00" ya da saat dilimli biçim
+    try:
+        return datetime.fromisoformat(metin.replace('Z', '+00:00')).replace(tzinfo=None)
+    except (AttributeError, ValueError):
+        return None
+
+def takvim_olaylari(kullanici_id, pencere_bas, pencere_bit):
+    """Penceredeki olayları sunucu taraflı imleçle parça parça okuyup JSON dizisi olarak üretir."""
+    conn = get_db_connection()
+    ilk = True
+    yield '['
     
+    cur = conn.cursor(name='takvim_rezervasyonlari')
+    cur.itersize = 500
     cur.execute("""
         SELECT r.rezervasyon_id, r.baslangic_zamani, r.bitis_zamani, r.durum,
                ca.alan_adi, ca.konum
         FROM rezervasyonlar r
         JOIN calisma_alanlari ca ON r.alan_id = ca.alan_id
         WHERE r.kullanici_id = %s
+        AND r.baslangic_zamani < %s
+        AND r.baslangic_zamani > %s - INTERVAL '4 hours'
+        AND r.bitis_zamani > %s
         ORDER BY r.baslangic_zamani
-    """, (session['user_id'],))
-    rezervasyonlar = cur.fetchall()
+    """, (kullanici_id, pencere_bit, pencere_bas, pencere_bas))
+    while True:
+        satirlar = cur.fetchmany(cur.itersize)
+        if not satirlar:
+            break
+        parca = []
+        for r in satirlar:
+            color = '#22c55e' if r['durum'] == 'aktif' else '#ef4444' if r['durum'] == 'iptal' else '#3b82f6'
+            parca.append(json.dumps({
+                'id': f"rez_{r['rezervasyon_id']}",
+                'title': f"📅 {r['alan_adi']}",
+                'start': r['baslangic_zamani'].isoformat(),
+                'end': r['bitis_zamani'].isoformat(),
+                'color': color,
+                'extendedProps': {
+                    'type': 'rezervasyon',
+                    'konum': r['konum'],
+                    'durum': r['durum']
+                }
+            }))
+        yield ('' if ilk else ',') + ','.join(parca)
+        ilk = False
+    cur.close()
     
+    cur = conn.cursor(name='takvim_oturumlari')
+    cur.itersize = 500
     cur.execute("""
         SELECT co.oturum_id, co.giris_zamani, co.cikis_zamani, co.verimlilik_puani,
                ca.alan_adi
         FROM calisma_oturumlari co
         JOIN calisma_alanlari ca ON co.alan_id = ca.alan_id
         WHERE co.kullanici_id = %s AND co.cikis_zamani IS NOT NULL
+        AND co.cikis_zamani > %s
+        AND co.giris_zamani < %s
         ORDER BY co.giris_zamani
-    """, (session['user_id'],))
-    oturumlar = cur.fetchall()
-    
+    """, (kullanici_id, pencere_bas, pencere_bit))
+    while True:
+        satirlar = cur.fetchmany(cur.itersize)
+        if not satirlar:
+            break
+        parca = []
+        for o in satirlar:
+            parca.append(json.dumps({
+                'id': f"oturum_{o['oturum_id']}",
+                'title': f"📖 {o['alan_adi']}",
+                'start': o['giris_zamani'].isoformat(),
+                'end': o['cikis_zamani'].isoformat(),
+                'color': '#8b5cf6',
+                'extendedProps': {
+                    'type': 'oturum',
+                    'verimlilik': o['verimlilik_puani']
+                }
+            }))
+        yield ('' if ilk else ',') + ','.join(parca)
+        ilk = False
     cur.close()
-    conn.close()
-    
-    events = []
-    
-    for r in rezervasyonlar:
-        color = '#22c55e' if r['durum'] == 'aktif' else '#ef4444' if r['durum'] == 'iptal' else '#3b82f6'
-        events.append({
-            'id': f"rez_{r['rezervasyon_id']}",
-            'title': f"📅 {r['alan_adi']}",
-            'start': r['baslangic_zamani'].isoformat(),
-            'end': r['bitis_zamani'].isoformat(),
-            'color': color,
-            'extendedProps': {
-                'type': 'rezervasyon',
-                'konum': r['konum'],
-                'durum': r['durum']
-            }
-        })
-    
-    for o in oturumlar:
-        events.append({
-            'id': f"oturum_{o['oturum_id']}",
-            'title': f"📖 {o['alan_adi']}",
-            'start': o['giris_zamani'].isoformat(),
-            'end': o['cikis_zamani'].isoformat(),
-            'color': '#8b5cf6',
-            'extendedProps': {
-                'type': 'oturum',
-                'verimlilik': o['verimlilik_puani']
-            }
-        })
+    conn.commit()
     
-    return jsonify(events)
+    yield ']'
 
 @app.route('/rezervasyon/yeni', methods=['GET', 'POST'])
 @login_required
@@ -370,94 +755,158 @@ def yeni_rezervasyon():
         baslangic = f"{tarih} {baslangic_saat}:00"
         bitis = f"{tarih} {bitis_saat}:00"
         
-        cur.execute("""
-            SELECT r.rezervasyon_id, ca.alan_adi, r.baslangic_zamani, r.bitis_zamani
-            FROM rezervasyonlar r
-            JOIN calisma_alanlari ca ON r.alan_id = ca.alan_id
-            WHERE r.kullanici_id = %s 
-            AND r.durum = 'aktif'
-            AND r.baslangic_zamani::DATE = %s::DATE
-            AND r.baslangic_zamani < %s::TIMESTAMP
-            AND r.bitis_zamani > %s::TIMESTAMP
-        """, (session['user_id'], tarih, bitis, baslangic))
-        
-        cakisan = cur.fetchone()
-        if cakisan:
-            flash(f'Bu zaman diliminde zaten "{cakisan["alan_adi"]}" alanında rezervasyonunuz var ({cakisan["baslangic_zamani"].strftime("%H:%M")}-{cakisan["bitis_zamani"].strftime("%H:%M")})!', 'danger')
-            cur.execute("""
-                SELECT ca.*, at.tur_adi 
-                FROM calisma_alanlari ca 
-                JOIN alan_turleri at ON ca.tur_id = at.tur_id
-                WHERE ca.aktif = TRUE
-                ORDER BY ca.konum, ca.alan_adi
-            """)
-            alanlar = cur.fetchall()
-            cur.close()
-            conn.close()
-            return render_template('rezervasyon_yeni.html', alanlar=alanlar)
-        
-        cur.execute("SELECT kapasite FROM calisma_alanlari WHERE alan_id = %s", (alan_id,))
-        alan_bilgi = cur.fetchone()
-        kapasite = alan_bilgi['kapasite'] if alan_bilgi else 1
-        
-        cur.execute("""
-            SELECT COUNT(*) as rez_sayisi
-            FROM rezervasyonlar
-            WHERE alan_id = %s 
-            AND durum = 'aktif'
-            AND baslangic_zamani < %s::TIMESTAMP
-            AND bitis_zamani > %s::TIMESTAMP
-        """, (alan_id, bitis, baslangic))
-        
-        mevcut_rez = cur.fetchone()
-        rez_sayisi = mevcut_rez['rez_sayisi'] if mevcut_rez else 0
-        
-        if rez_sayisi >= kapasite:
-            flash(f'Bu alan seçilen saatlerde dolu! (Kapasite: {kapasite}, Mevcut   syon: {rez_sayisi})', 'danger')
-            cur.execute("""
-                SELECT ca.*, at.tur_adi 
-                FROM calisma_alanlari ca 
-                JOIN alan_turleri at ON ca.tur_id = at.tur_id
-                WHERE ca.aktif = TRUE
-                ORDER BY ca.konum, ca.alan_adi
-            """)
-            alanlar = cur.fetchall()
-            cur.close()
-            conn.close()
-            return render_template('rezervasyon_yeni.html', alanlar=alanlar)
-        
         try:
             cur.execute("""
-                INSERT INTO rezervasyonlar (kullanici_id, alan_id, baslangic_zamani, bitis_zamani, notlar)
-                VALUES (%s, %s, %s, %s, %s)
-                RETURNING rezervasyon_id
+                SELECT * FROM fn_rezervasyon_kabul(%s, %s, %s::TIMESTAMP, %s::TIMESTAMP, %s)
             """, (session['user_id'], alan_id, baslangic, bitis, notlar))
-            
-            rez_id = cur.fetchone()['rezervasyon_id']
+            kabul = cur.fetchone()
             conn.commit()
-            flash(f'Rezervasyon oluşturuldu! (ID: {rez_id})', 'success')
-            return redirect(url_for('rezervasyonlarim'))
+            
+            if kabul['sonuc'] == 'KABUL':
+                flash(f'Rezervasyon oluşturuldu! (ID: {kabul["yeni_rezervasyon_id"]})', 'success')
+                return redirect(url_for('rezervasyonlarim'))
+            
+            flash(kabul_mesaji(kabul), 'danger')
             
         except psycopg2.Error as e:
             conn.rollback()
-            if 'max_sure_kontrolu' in str(e):
-                flash('Maksimum rezervasyon süresi 4 saattir!', 'danger')
-            else:
-                flash(f'Hata: {str(e)}', 'danger')
-    
-    cur.execute("""
-        SELECT ca.*, at.tur_adi 
-        FROM calisma_alanlari ca 
-        JOIN alan_turleri at ON ca.tur_id = at.tur_id
-        WHERE ca.aktif = TRUE
-        ORDER BY ca.konum, ca.alan_adi
-    """)
-    alanlar = cur.fetchall()
+            flash(f'Hata: {str(e)}', 'danger')
     
     cur.close()
-    conn.close()
     
-    return render_template('rezervasyon_yeni.html', alanlar=alanlar)
+    return render_template('rezervasyon_yeni.html', alanlar=get_alan_katalogu())
+
+def tekrarlari_olustur(alan_id, gunler, baslangic_saat, bitis_saat, ilk_tarih, son_tarih, notlar):
+    talepler = []
+    gun = ilk_tarih
+    while gun <= son_tarih and len(talepler) <= TOPLU_REZERVASYON_LIMIT:
+        if gun.weekday() in gunler:
+            talepler.append({
+                'alan_id': alan_id,
+                'baslangic': f"{gun.isoformat()} {baslangic_saat}:00",
+                'bitis': f"{gun.isoformat()} {bitis_saat}:00",
+                'notlar': notlar
+            })
+        gun += timedelta(days=1)
+    return talepler
+
+def toplu_talep_hatasi(talep):
+    """fn_toplu_rezervasyon'a gidecek tek bir talebin biçimini denetler; hata yoksa None."""
+    if not isinstance(talep, dict):
+        return 'her talep bir nesne olmalıdır'
+    if not isinstance(talep.get('alan_id'), int) or isinstance(talep['alan_id'], bool):
+        return 'alan_id tamsayı olmalıdır'
+    for alan in ('baslangic', 'bitis'):
+        try:
+            datetime.fromisoformat(talep.get(alan))
+        except (TypeError, ValueError):
+            return f'{alan} YYYY-AA-GG SS:DD biçiminde olmalıdır'
+    if not isinstance(talep.get('notlar'), (str, type(None))):
+        return 'notlar metin olmalıdır'
+    return None
+
+def toplu_rezervasyon_yap(talepler):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT * FROM fn_toplu_rezervasyon(%s, %s::JSONB)
+        """, (session['user_id'], json.dumps(talepler)))
+        sonuclar = cur.fetchall()
+        conn.commit()
+    except psycopg2.Error:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    return sonuclar
+
+@app.route('/rezervasyon/tekrarli', methods=['GET', 'POST'])
+@login_required
+def tekrarli_rezervasyon():
+    sonuclar = None
+    
+    if request.method == 'POST':
+        gunler = {int(g) for g in request.form.getlist('gunler')}
+        ilk_tarih = gun_coz(request.form['baslangic_tarih'])
+        son_tarih = gun_coz(request.form['bitis_tarih'])
+        
+        if not gunler or not ilk_tarih or not son_tarih or son_tarih < ilk_tarih:
+            flash('Geçerli bir tarih aralığı ve en az bir gün seçmelisiniz!', 'danger')
+        else:
+            talepler = tekrarlari_olustur(request.form['alan_id'], gunler,
+                                          request.form['baslangic_saat'], request.form['bitis_saat'],
+                                          ilk_tarih, son_tarih, request.form.get('notlar', ''))
+            if len(talepler) > TOPLU_REZERVASYON_LIMIT:
+                flash(f'Tek seferde en fazla {TOPLU_REZERVASYON_LIMIT} rezervasyon oluşturulabilir!', 'danger')
+            elif not talepler:
+                flash('Seçilen aralıkta uygun gün bulunamadı!', 'warning')
+            else:
+                try:
+                    sonuclar = toplu_rezervasyon_yap(talepler)
+                    kabul = sum(1 for s in sonuclar if s['sonuc'] == 'KABUL')
+                    flash(f'{len(sonuclar)} tekrardan {kabul} tanesi oluşturuldu.',
+                          'success' if kabul == len(sonuclar) else 'warning')
+                except psycopg2.Error as e:
+                    flash(f'Hata: {str(e)}', 'danger')
+    
+    return render_template('rezervasyon_tekrarli.html',
+                         alanlar=get_alan_katalogu(),
+                         sonuclar=sonuclar,
+                         etiketler=TOPLU_SONUC_ETIKETLERI)
+
+@app.route('/api/rezervasyon/toplu', methods=['POST'])
+@login_required
+def toplu_rezervasyon_api():
+    veri = request.get_json(silent=True)
+    if not isinstance(veri, dict):
+        return jsonify({'hata': 'istek gövdesi bir JSON nesnesi olmalıdır'}), 400
+    
+    if 'kural' in veri:
+        kural = veri['kural']
+        if not isinstance(kural, dict):
+            return jsonify({'hata': 'kural bir nesne olmalıdır'}), 400
+        gunler = kural.get('gunler')
+        if not isinstance(gunler, list) or not all(isinstance(g, int) and 0 <= g <= 6 for g in gunler):
+            return jsonify({'hata': 'gunler 0 (pazartesi) ile 6 (pazar) arasında tamsayılardan oluşmalıdır'}), 400
+        ilk_tarih = gun_coz(kural.get('baslangic_tarih'))
+        son_tarih = gun_coz(kural.get('bitis_tarih'))
+        if not ilk_tarih or not son_tarih or not kural.get('gunler'):
+            return jsonify({'hata': 'kural için gunler, baslangic_tarih ve bitis_tarih gereklidir'}), 400
+        talepler = tekrarlari_olustur(kural.get('alan_id'), set(kural['gunler']),
+                                      kural.get('baslangic_saat'), kural.get('bitis_saat'),
+                                      ilk_tarih, son_tarih, kural.get('notlar'))
+    else:
+        talepler = veri.get('rezervasyonlar') or []
+        if not isinstance(talepler, list):
+            return jsonify({'hata': 'rezervasyonlar bir liste olmalıdır'}), 400
+    
+    if not talepler:
+        return jsonify({'hata': 'rezervasyon talebi yok'}), 400
+    if len(talepler) > TOPLU_REZERVASYON_LIMIT:
+        return jsonify({'hata': f'en fazla {TOPLU_REZERVASYON_LIMIT} rezervasyon gönderilebilir'}), 400
+    for sira, talep in enumerate(talepler, 1):
+        hata = toplu_talep_hatasi(talep)
+        if hata:
+            return jsonify({'hata': f'{sira}. talep: {hata}'}), 400
+    
+    try:
+        sonuclar = toplu_rezervasyon_yap(talepler)
+    except psycopg2.Error as e:
+        return jsonify({'hata': str(e)}), 400
+    
+    return jsonify({
+        'kabul': sum(1 for s in sonuclar if s['sonuc'] == 'KABUL'),
+        'red': sum(1 for s in sonuclar if s['sonuc'] != 'KABUL'),
+        'sonuclar': [{
+            'sira': s['sira'],
+            'alan_id': s['talep_alan_id'],
+            'baslangic': s['talep_baslangic'].isoformat() if s['talep_baslangic'] else None,
+            'bitis': s['talep_bitis'].isoformat() if s['talep_bitis'] else None,
+            'sonuc': s['sonuc'],
+            'rezervasyon_id': s['yeni_rezervasyon_id']
+        } for s in sonuclar]
+    })
 
 @app.route('/rezervasyonlarim')
 @login_required
@@ -465,19 +914,31 @@ def rezervasyonlarim():
     conn = get_db_connection()
     cur = conn.cursor()
     
+    durum = request.args.get('durum')
+    if durum not in ('aktif', 'iptal', 'tamamlandi'):
+        durum = None
+    ilk_gun = gun_coz(request.args.get('baslangic'))
+    son_gun = gun_coz(request.args.get('bitis'))
+    imlec_zaman, imlec_id = imlec_coz(request.args.get('imlec'))
+    
     cur.execute("""
         SELECT r.*, ca.alan_adi, ca.konum
         FROM rezervasyonlar r
         JOIN calisma_alanlari ca ON r.alan_id = ca.alan_id
         WHERE r.kullanici_id = %s
-        ORDER BY r.baslangic_zamani DESC
-    """, (session['user_id'],))
-    
-    rezervasyonlar = cur.fetchall()
+        AND (%s::VARCHAR IS NULL OR r.durum = %s)
+        AND r.baslangic_zamani >= COALESCE(%s::DATE, '-infinity'::TIMESTAMP)
+        AND r.baslangic_zamani < COALESCE(%s::DATE + 1, 'infinity'::TIMESTAMP)
+        AND (r.baslangic_zamani, r.rezervasyon_id)
+            < (COALESCE(%s::TIMESTAMP, 'infinity'), COALESCE(%s::INTEGER, 2147483647))
+        ORDER BY r.baslangic_zamani DESC, r.rezervasyon_id DESC
+        LIMIT %s
+    """, (session['user_id'], durum, durum, ilk_gun, son_gun, imlec_zaman, imlec_id, SAYFA_BOYUTU + 1))
+    
+    rezervasyonlar, sonraki = sayfa_sonu(cur.fetchall(), 'baslangic_zamani', 'rezervasyon_id')
     cur.close()
-    conn.close()
     
-    return render_template('rezervasyonlarim.html', rezervasyonlar=rezervasyonlar)
+    return render_template('rezervasyonlarim.html', rezervasyonlar=rezervasyonlar, sonraki=sonraki)
 
 @app.route('/rezervasyon/iptal/<int:rez_id>', methods=['POST'])
 @login_required
@@ -497,7 +958,6 @@ def rezervasyon_iptal(rez_id):
         flash(f'Hata: {str(e)}', 'danger')
     
     cur.close()
-    conn.close()
     return redirect(url_for('rezervasyonlarim'))
 
 @app.route('/rezervasyon/guncelle/<int:rez_id>', methods=['GET', 'POST'])
@@ -506,23 +966,6 @@ def rezervasyon_guncelle(rez_id):
     conn = get_db_connection()
     cur = conn.cursor()
     
-    if request.method == 'POST':
-        durum = request.form['durum']
-        notlar = request.form.get('notlar', '')
-        
-        try:
-            cur.execute("""
-                UPDATE rezervasyonlar 
-                SET durum = %s, notlar = %s
-                WHERE rezervasyon_id = %s AND kullanici_id = %s
-            """, (durum, notlar, rez_id, session['user_id']))
-            conn.commit()
-            flash('Rezervasyon güncellendi!', 'success')
-            return redirect(url_for('rezervasyonlarim'))
-        except psycopg2.Error as e:
-            conn.rollback()
-            flash(f'Hata: {str(e)}', 'danger')
-    
     cur.execute("""
         SELECT r.*, ca.alan_adi, ca.konum
         FROM rezervasyonlar r
@@ -531,19 +974,58 @@ def rezervasyon_guncelle(rez_id):
     """, (rez_id, session['user_id']))
     rezervasyon = cur.fetchone()
     
-    cur.close()
-    conn.close()
-    
     if not rezervasyon:
+        cur.close()
         flash('Rezervasyon bulunamadı!', 'danger')
         return redirect(url_for('rezervasyonlarim'))
     
+    if request.method == 'POST':
+        durum = request.form['durum']
+        notlar = request.form.get('notlar', '')
+        
+        try:
+            if durum == rezervasyon['durum'] or (rezervasyon['durum'] == 'aktif' and durum in ('iptal', 'tamamlandi')):
+                # aktif -> iptal/tamamlandı yer bırakır; kapasite ya da çakışma denetimi gerekmez
+                cur.execute("""
+                    UPDATE rezervasyonlar 
+                    SET durum = %s, notlar = %s
+                    WHERE rezervasyon_id = %s AND kullanici_id = %s AND durum = %s
+                """, (durum, notlar, rez_id, session['user_id'], rezervasyon['durum']))
+                conn.commit()
+                flash('Rezervasyon güncellendi!', 'success')
+                cur.close()
+                return redirect(url_for('rezervasyonlarim'))
+            if rezervasyon['durum'] == 'iptal' and durum == 'aktif':
+                # iptal edilen yer başkasına verilmiş olabilir; yeniden etkinleştirme yeni rezervasyonla
+                # aynı kilit, kapasite ve çakışma denetiminden geçer
+                cur.execute("""
+                    SELECT * FROM fn_rezervasyon_kabul(%s, %s, %s, %s, %s)
+                """, (session['user_id'], rezervasyon['alan_id'], rezervasyon['baslangic_zamani'],
+                      rezervasyon['bitis_zamani'], notlar))
+                kabul = cur.fetchone()
+                conn.commit()
+                if kabul['sonuc'] == 'KABUL':
+                    flash(f'Rezervasyon yeniden oluşturuldu! (ID: {kabul["yeni_rezervasyon_id"]})', 'success')
+                    cur.close()
+                    return redirect(url_for('rezervasyonlarim'))
+                flash(kabul_mesaji(kabul), 'danger')
+            else:
+                flash('Bu durum değişikliği yapılamaz.', 'danger')
+        except psycopg2.Error as e:
+            conn.rollback()
+            flash(f'Hata: {str(e)}', 'danger')
+    
+    cur.close()
+    
     return render_template('rezervasyon_guncelle.html', rezervasyon=rezervasyon)
 
 @app.route('/arama')
 @login_required
 def arama():
-    return render_template('arama.html')
+    alanlar = get_alan_katalogu()
+    turler = sorted({a['tur_adi'] for a in alanlar})
+    konumlar = sorted({a['konum'] for a in alanlar})
+    return render_template('arama.html', turler=turler, konumlar=konumlar)
 
 @app.route('/arama/sonuc')
 @login_required
@@ -554,54 +1036,77 @@ def arama_sonuc():
     tarih = request.args.get('tarih', '')
     baslangic_saat = request.args.get('baslangic_saat', '')
     bitis_saat = request.args.get('bitis_saat', '')
-    
-    conn = get_db_connection()
-    cur = conn.cursor()
+    priz = True if request.args.get('priz') else None
+    sessiz = True if request.args.get('sessiz') else None
     
     if tarih and baslangic_saat and bitis_saat:
+        try:
+            baslangic = datetime.strptime(f"{tarih} {baslangic_saat}", '%Y-%m-%d %H:%M')
+            bitis = datetime.strptime(f"{tarih} {bitis_saat}", '%Y-%m-%d %H:%M')
+        except ValueError:
+            flash('Geçersiz tarih veya saat!', 'danger')
+            return redirect(url_for('arama'))
+        
+        conn = get_db_connection()
+        cur = conn.cursor()
         cur.execute("""
-            SELECT * FROM fn_musait_alanlar(%s::DATE, %s::TIME, %s::TIME)
-        """, (tarih, baslangic_saat, bitis_saat))
+            SELECT * FROM fn_musait_alanlar(%s, %s, %s, %s, %s, %s, %s)
+        """, (baslangic, bitis, tur or None, konum or None, query or None, priz, sessiz))
         sonuclar = cur.fetchall()
+        cur.close()
     else:
-        sql = """
-            SELECT ca.*, at.tur_adi 
-            FROM calisma_alanlari ca 
-            JOIN alan_turleri at ON ca.tur_id = at.tur_id
-            WHERE ca.aktif = TRUE
-        """
-        params = []
+        sonuclar = get_alan_katalogu()
         
         if query:
-            sql += " AND (LOWER(ca.alan_adi) LIKE LOWER(%s) OR LOWER(ca.konum) LIKE LOWER(%s))"
-            params.extend([f'%{query}%', f'%{query}%'])
+            aranan = query.lower()
+            sonuclar = [a for a in sonuclar
+                        if aranan in a['alan_adi'].lower() or aranan in a['konum'].lower()]
         
         if tur:
-            sql += " AND at.tur_adi = %s"
-            params.append(tur)
+            sonuclar = [a for a in sonuclar if a['tur_adi'] == tur]
         
         if konum:
-            sql += " AND ca.konum = %s"
-            params.append(konum)
+            sonuclar = [a for a in sonuclar if a['konum'] == konum]
         
-        sql += " ORDER BY ca.konum, ca.alan_adi"
+        if priz:
+            sonuclar = [a for a in sonuclar if a['priz_var']]
         
-        cur.execute(sql, params)
-        sonuclar = cur.fetchall()
-    
-    cur.close()
-    conn.close()
+        if sessiz:
+            sonuclar = [a for a in sonuclar if a['sessiz_alan']]
     
     return render_template('arama_sonuc.html', sonuclar=sonuclar, query=query,
                          tarih=tarih, baslangic_saat=baslangic_saat, bitis_saat=bitis_saat)
 
+@app.route('/api/musait-alanlar')
+@login_required
+def musait_alanlar_verileri():
+    baslangic = tarih_saat_coz(request.args.get('baslangic'))
+    bitis = tarih_saat_coz(request.args.get('bitis'))
+    if baslangic is None or bitis is None:
+        return jsonify({'hata': 'baslangic ve bitis parametreleri gereklidir.'}), 400
+    query = request.args.get('q', '')
+    tur = request.args.get('tur', '')
+    konum = request.args.get('konum', '')
+    priz = True if request.args.get('priz') else None
+    sessiz = True if request.args.get('sessiz') else None
+    
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT * FROM fn_musait_alanlar(%s, %s, %s, %s, %s, %s, %s)
+    """, (baslangic, bitis, tur or None, konum or None, query or None, priz, sessiz))
+    sonuclar = cur.fetchall()
+    cur.close()
+    return jsonify(sonuclar)
+
 @app.route('/istatistikler')
 @login_required
+@salt_okunur
 def istatistikler():
     conn = get_db_connection()
     cur = conn.cursor()
     
-    cur.execute("SELECT * FROM fn_yogunluk_analizi(30)")
+    cur.execute("SELECT * FROM fn_yogunluk_bantlari()")
     yogunluk = cur.fetchall()
     
     cur.execute("SELECT * FROM v_alan_doluluk ORDER BY aktif_rezervasyon_sayisi DESC")
@@ -613,84 +1118,135 @@ def istatistikler():
     cur.execute("SELECT * FROM v_sadece_rezervasyon")
     sadece_rezervasyon = cur.fetchall()
     
-    cur.execute("""
-        SELECT 
-            COUNT(DISTINCT r.rezervasyon_id) as toplam_rezervasyon,
-            COUNT(DISTINCT co.oturum_id) as toplam_oturum,
-            COALESCE(ROUND(SUM(EXTRACT(EPOCH FROM (co.cikis_zamani - co.giris_zamani)) / 3600), 1), 0) as toplam_saat
-        FROM kullanicilar k
-        LEFT JOIN rezervasyonlar r ON k.kullanici_id = r.kullanici_id
-        LEFT JOIN calisma_oturumlari co ON k.kullanici_id = co.kullanici_id AND co.cikis_zamani IS NOT NULL
-        WHERE k.kullanici_id = %s
-    """, (session['user_id'],))
-    kisisel = cur.fetchone()
-    
-    cur.execute("""
-        SELECT ca.alan_adi, COUNT(*) as sayi
-        FROM rezervasyonlar r
-        JOIN calisma_alanlari ca ON r.alan_id = ca.alan_id
-        WHERE r.kullanici_id = %s
-        GROUP BY ca.alan_adi
-        ORDER BY sayi DESC
-        LIMIT 1
-    """, (session['user_id'],))
-    en_cok = cur.fetchone()
-    
-    kisisel_stats = {
-        'toplam_rezervasyon': kisisel['toplam_rezervasyon'] if kisisel else 0,
-        'toplam_oturum': kisisel['toplam_oturum'] if kisisel else 0,
-        'toplam_saat': int(kisisel['toplam_saat']) if kisisel and kisisel['toplam_saat'] else 0,
-        'en_cok_alan': en_cok['alan_adi'] if en_cok else None
-    }
+    def kisisel_yukle():
+        cur.execute("""
+            SELECT 
+                COALESCE(s.rez_aktif + s.rez_iptal + s.rez_tamamlandi, 0) as toplam_rezervasyon,
+                COALESCE(s.tamamlanan_oturum, 0) as toplam_oturum,
+                COALESCE(ROUND(s.sure_saniye_toplami / 3600, 1), 0) as toplam_saat
+            FROM kullanicilar k
+            LEFT JOIN kullanici_sayaclari s ON k.kullanici_id = s.kullanici_id
+            WHERE k.kullanici_id = %s
+        """, (session['user_id'],))
+        kisisel = cur.fetchone()
+        
+        cur.execute("""
+            SELECT ca.alan_adi, COUNT(*) as sayi
+            FROM rezervasyonlar r
+            JOIN calisma_alanlari ca ON r.alan_id = ca.alan_id
+            WHERE r.kullanici_id = %s
+            GROUP BY ca.alan_adi
+            ORDER BY sayi DESC
+            LIMIT 1
+        """, (session['user_id'],))
+        en_cok = cur.fetchone()
+        
+        return {'kisisel_stats': {
+            'toplam_rezervasyon': kisisel['toplam_rezervasyon'] if kisisel else 0,
+            'toplam_oturum': kisisel['toplam_oturum'] if kisisel else 0,
+            'toplam_saat': int(kisisel['toplam_saat']) if kisisel and kisisel['toplam_saat'] else 0,
+            'en_cok_alan': en_cok['alan_adi'] if en_cok else None
+        }}
+    
+    cur.execute("SELECT surum FROM kullanici_sayaclari WHERE kullanici_id = %s", (session['user_id'],))
+    sayac = cur.fetchone()
+    kisisel_kartlar = kullanici_parcasi('istatistikler', sayac['surum'] if sayac else 0,
+                                        'parcalar/istatistikler_kisisel.html', kisisel_yukle)
     
     cur.close()
-    conn.close()
     
     return render_template('istatistikler.html',
                          yogunluk=yogunluk,
                          alan_doluluk=alan_doluluk,
                          tam_katilimci=tam_katilimci,
                          sadece_rezervasyon=sadece_rezervasyon,
-                         kisisel_stats=kisisel_stats)
+                         kisisel_kartlar=kisisel_kartlar)
+
+def _gecmis_talep_yukle(haftagunu):
+    # talep modelinden alan ve saat başına haftalık ortalama dolu koltuk-saat
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT t.alan_id, t.saat, t.agirlik * (1 - d.sonum) AS sayi
+        FROM talep_modeli t
+        CROSS JOIN talep_modeli_durum d
+        WHERE t.haftagunu = %s
+    """, (haftagunu,))
+    satirlar = [dict(s) for s in cur.fetchall()]
+    cur.close()
+    return satirlar
+
+def zaman_onerileri(tarih, sure, alan_id=None, tur_idler=()):
+    """Katalogdaki (isteğe göre alan ya da türle süzülmüş) bütün alanlar için zaman önerileri üretir."""
+    alanlar = [a for a in get_alan_katalogu()
+               if (not alan_id or a['alan_id'] == alan_id) and (not tur_idler or a['tur_id'] in tur_idler)]
+    simdi = datetime.now()
+    if not alanlar or tarih < simdi.date():
+        return []
+    en_erken = 0
+    if tarih == simdi.date():
+        en_erken = -(-(simdi.hour * 60 + simdi.minute) // DILIM_DAKIKA)
+
+    doluluk = get_doluluk(tarih)[tarih]
+    bas = datetime.combine(tarih, datetime.min.time())
+    bit = bas + timedelta(days=1)
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT baslangic_zamani, bitis_zamani
+        FROM rezervasyonlar
+        WHERE kullanici_id = %s
+        AND durum = 'aktif'
+        AND baslangic_zamani < %s
+        AND baslangic_zamani > %s
+        AND bitis_zamani > %s
+    """, (session['user_id'], bit, bas - MAX_REZERVASYON_SURESI, bas))
+    mesgul = [(i, j) for r in cur.fetchall()
+              for _, i, j in dilimlere_bol(max(r['baslangic_zamani'], bas), min(r['bitis_zamani'], bit))]
+    cur.close()
+
+    talep = talep_onbellek.get_or_load(tarih.isoweekday(), lambda: _gecmis_talep_yukle(tarih.isoweekday()))
+    return zaman_oner(alanlar, doluluk_matrisi(alanlar, doluluk), talep_matrisi(alanlar, talep), sure,
+                      mesgul=mesgul, en_erken=en_erken)
 
 @app.route('/zaman-onerisi')
 @login_required
 def zaman_onerisi():
     alan_id = request.args.get('alan_id', type=int)
-    tarih = request.args.get('tarih', datetime.now().strftime('%Y-%m-%d'))
-    sure = request.args.get('sure', 2, type=int)
+    tur_idler = set(request.args.getlist('tur', type=int))
+    tarih = gun_coz(request.args.get('tarih'), datetime.now().date())
+    sure = min(max(request.args.get('sure', 2, type=int), 1), 4)
     
-    conn = get_db_connection()
-    cur = conn.cursor()
+    alanlar = sorted(get_alan_katalogu(), key=lambda a: a['alan_adi'])
+    turler = sorted({(a['tur_id'], a['tur_adi']) for a in alanlar}, key=lambda t: t[1])
     
-    cur.execute("""
-        SELECT ca.alan_id, ca.alan_adi, ca.konum 
-        FROM calisma_alanlari ca 
-        WHERE ca.aktif = TRUE
-        ORDER BY ca.alan_adi
-    """)
-    alanlar = cur.fetchall()
-    
-    oneriler = []
-    if alan_id:
-        try:
-            cur.execute("""
-                SELECT * FROM fn_uygun_zaman_onerisi(%s, %s::DATE, %s)
-            """, (alan_id, tarih, sure))
-            oneriler = cur.fetchall()
-        except psycopg2.Error as e:
-            flash(f'Öneri alınırken hata oluştu: {str(e)}', 'danger')
-    
-    cur.close()
-    conn.close()
+    arandi = 'tarih' in request.args
+    oneriler = zaman_onerileri(tarih, sure, alan_id, tur_idler) if arandi else []
     
     return render_template('zaman_onerisi.html',
                          alanlar=alanlar,
+                         turler=turler,
                          oneriler=oneriler,
+                         arandi=arandi,
                          secili_alan=alan_id,
-                         secili_tarih=tarih,
+                         secili_turler=tur_idler,
+                         secili_tarih=tarih.isoformat(),
                          secili_sure=sure)
 
+@app.route('/api/zaman-onerisi')
+@login_required
+def zaman_onerisi_verileri():
+    alan_id = request.args.get('alan_id', type=int)
+    tur_idler = set(request.args.getlist('tur', type=int))
+    tarih = gun_coz(request.args.get('tarih'), datetime.now().date())
+    sure = request.args.get('sure', 2, type=int)
+    if not 1 <= sure <= 4:
+        return jsonify({'hata': 'sure 1 ile 4 saat arasında olmalıdır.'}), 400
+    
+    oneriler = zaman_onerileri(tarih, sure, alan_id, tur_idler)
+    return jsonify([{k: v.isoformat() if hasattr(v, 'isoformat') else v for k, v in o.items()}
+                    for o in oneriler])
+
 @app.route('/oturum/baslat', methods=['GET', 'POST'])
 @login_required
 def oturum_baslat():
@@ -731,20 +1287,18 @@ def oturum_baslat():
             flash(f'Hata: {str(e)}', 'danger')
     
     cur.execute("""
-        SELECT ca.alan_id, ca.alan_adi, ca.konum, ca.kapasite, ca.priz_var, ca.sessiz_alan, at.tur_adi
-        FROM calisma_alanlari ca
-        JOIN alan_turleri at ON ca.tur_id = at.tur_id
-        WHERE ca.aktif = TRUE
-        ORDER BY ca.konum, ca.alan_adi
+        SELECT alan_id, COUNT(*) AS sayi
+        FROM calisma_oturumlari
+        WHERE cikis_zamani IS NULL
+        GROUP BY alan_id
     """)
-    alanlar = cur.fetchall()
-    
+    icerideki = {r['alan_id']: r['sayi'] for r in cur.fetchall()}
     cur.close()
-    conn.close()
     
     return render_template('oturum_baslat.html', 
-                         alanlar=alanlar,
-                         aktif_oturum=aktif_oturum)
+                         alanlar=get_alan_katalogu(),
+                         aktif_oturum=aktif_oturum,
+                         icerideki=icerideki)
 
 @app.route('/oturum/bitir/<int:oturum_id>', methods=['POST'])
 @login_required
@@ -772,7 +1326,6 @@ def oturum_bitir(oturum_id):
         flash(f'Hata: {str(e)}', 'danger')
     
     cur.close()
-    conn.close()
     
     return redirect(url_for('oturumlarim'))
 
@@ -782,19 +1335,31 @@ def oturumlarim():
     conn = get_db_connection()
     cur = conn.cursor()
     
+    durum = request.args.get('durum')
+    if durum not in ('devam', 'tamamlandi'):
+        durum = None
+    ilk_gun = gun_coz(request.args.get('baslangic'))
+    son_gun = gun_coz(request.args.get('bitis'))
+    imlec_zaman, imlec_id = imlec_coz(request.args.get('imlec'))
+    
     cur.execute("""
         SELECT co.*, ca.alan_adi, ca.konum
         FROM calisma_oturumlari co
         JOIN calisma_alanlari ca ON co.alan_id = ca.alan_id
         WHERE co.kullanici_id = %s
-        ORDER BY co.giris_zamani DESC
-    """, (session['user_id'],))
-    
-    oturumlar = cur.fetchall()
+        AND (%s::VARCHAR IS NULL OR (co.cikis_zamani IS NULL) = (%s = 'devam'))
+        AND co.giris_zamani >= COALESCE(%s::DATE, '-infinity'::TIMESTAMP)
+        AND co.giris_zamani < COALESCE(%s::DATE + 1, 'infinity'::TIMESTAMP)
+        AND (co.giris_zamani, co.oturum_id)
+            < (COALESCE(%s::TIMESTAMP, 'infinity'), COALESCE(%s::INTEGER, 2147483647))
+        ORDER BY co.giris_zamani DESC, co.oturum_id DESC
+        LIMIT %s
+    """, (session['user_id'], durum, durum, ilk_gun, son_gun, imlec_zaman, imlec_id, SAYFA_BOYUTU + 1))
+    
+    oturumlar, sonraki = sayfa_sonu(cur.fetchall(), 'giris_zamani', 'oturum_id')
     cur.close()
-    conn.close()
     
-    return render_template('oturumlarim.html', oturumlar=oturumlar)
+    return render_template('oturumlarim.html', oturumlar=oturumlar, sonraki=sonraki)
 
 @app.route('/admin')
 @admin_required
@@ -813,13 +1378,12 @@ def admin_panel():
     
     cur.execute("""
         SELECT * FROM log_kayitlari 
-        ORDER BY islem_zamani DESC 
+        ORDER BY islem_zamani DESC, log_id DESC
         LIMIT 20
     """)
     loglar = cur.fetchall()
     
     cur.close()
-    conn.close()
     
     return render_template('admin_panel.html',
                          ogrenci_sayisi=ogrenci_sayisi,
@@ -829,33 +1393,36 @@ def admin_panel():
 
 @app.route('/admin/raporlar')
 @admin_required
+@salt_okunur
 def admin_raporlar():
     conn = get_db_connection()
     cur = conn.cursor()
     
     cur.execute("""
-        SELECT DATE(baslangic_zamani) as tarih, COUNT(*) as sayi
-        FROM rezervasyonlar
-        WHERE baslangic_zamani >= CURRENT_DATE - INTERVAL '30 days'
-        GROUP BY DATE(baslangic_zamani)
+        SELECT tarih, SUM(sayi) as sayi
+        FROM ozet_rezervasyon_saatlik
+        WHERE tarih >= CURRENT_DATE - INTERVAL '30 days'
+        GROUP BY tarih
+        HAVING SUM(sayi) > 0
         ORDER BY tarih
     """)
     gunluk_rez = cur.fetchall()
     
     cur.execute("""
-        SELECT EXTRACT(HOUR FROM baslangic_zamani) as saat, COUNT(*) as sayi
-        FROM rezervasyonlar
-        WHERE baslangic_zamani >= CURRENT_DATE - INTERVAL '30 days'
+        SELECT saat, SUM(sayi) as sayi
+        FROM ozet_rezervasyon_saatlik
+        WHERE tarih >= CURRENT_DATE - INTERVAL '30 days'
         GROUP BY saat
+        HAVING SUM(sayi) > 0
         ORDER BY saat
     """)
     saatlik_dagilim = cur.fetchall()
     
     cur.execute("""
-        SELECT ca.alan_adi, COUNT(r.rezervasyon_id) as rez_sayisi
+        SELECT ca.alan_adi, 
+               COALESCE(o.rez_aktif + o.rez_iptal + o.rez_tamamlandi, 0) as rez_sayisi
         FROM calisma_alanlari ca
-        LEFT JOIN rezervasyonlar r ON ca.alan_id = r.alan_id
-        GROUP BY ca.alan_id, ca.alan_adi
+        LEFT JOIN ozet_alan_toplam o ON ca.alan_id = o.alan_id
         ORDER BY rez_sayisi DESC
         LIMIT 10
     """)
@@ -872,36 +1439,35 @@ def admin_raporlar():
     
     cur.execute("""
         SELECT 
-            COUNT(*) as toplam_rezervasyon,
-            COUNT(CASE WHEN durum = 'aktif' THEN 1 END) as aktif,
-            COUNT(CASE WHEN durum = 'iptal' THEN 1 END) as iptal,
-            COUNT(CASE WHEN durum = 'tamamlandi' THEN 1 END) as tamamlandi
-        FROM rezervasyonlar
+            COALESCE(SUM(rez_aktif + rez_iptal + rez_tamamlandi), 0) as toplam_rezervasyon,
+            COALESCE(SUM(rez_aktif), 0) as aktif,
+            COALESCE(SUM(rez_iptal), 0) as iptal,
+            COALESCE(SUM(rez_tamamlandi), 0) as tamamlandi
+        FROM ozet_alan_toplam
     """)
     rez_stats = cur.fetchone()
     
     cur.execute("""
         SELECT 
-            COUNT(*) as toplam_oturum,
-            COALESCE(ROUND(AVG(verimlilik_puani), 1), 0) as ort_verimlilik,
-            COALESCE(ROUND(AVG(EXTRACT(EPOCH FROM (cikis_zamani - giris_zamani)) / 60), 0), 0) as ort_sure_dk
-        FROM calisma_oturumlari
-        WHERE cikis_zamani IS NOT NULL
+            COALESCE(SUM(tamamlanan_oturum), 0) as toplam_oturum,
+            COALESCE(ROUND(SUM(verimlilik_toplami)::NUMERIC / NULLIF(SUM(verimlilik_sayisi), 0), 1), 0) as ort_verimlilik,
+            COALESCE(ROUND(SUM(sure_saniye_toplami) / 60 / NULLIF(SUM(tamamlanan_oturum), 0), 0), 0) as ort_sure_dk
+        FROM ozet_alan_toplam
     """)
     oturum_stats = cur.fetchone()
     
     cur.execute("""
-        SELECT TO_CHAR(DATE_TRUNC('week', giris_zamani), 'DD.MM') as hafta, 
-               COUNT(*) as sayi
-        FROM calisma_oturumlari
-        WHERE giris_zamani >= CURRENT_DATE - INTERVAL '8 weeks'
-        GROUP BY DATE_TRUNC('week', giris_zamani)
-        ORDER BY DATE_TRUNC('week', giris_zamani)
+        SELECT TO_CHAR(DATE_TRUNC('week', tarih), 'DD.MM') as hafta, 
+               SUM(oturum_sayisi) as sayi
+        FROM ozet_oturum_gunluk
+        WHERE tarih >= CURRENT_DATE - INTERVAL '8 weeks'
+        GROUP BY DATE_TRUNC('week', tarih)
+        HAVING SUM(oturum_sayisi) > 0
+        ORDER BY DATE_TRUNC('week', tarih)
     """)
     haftalik_oturum = cur.fetchall()
     
     cur.close()
-    conn.close()
     
     return render_template('admin_raporlar.html',
                          gunluk_rez=gunluk_rez,
@@ -914,29 +1480,43 @@ def admin_raporlar():
 
 @app.route('/admin/kullanicilar')
 @admin_required
+@salt_okunur
 def admin_kullanicilar():
     conn = get_db_connection()
     cur = conn.cursor()
     
+    rol = request.args.get('rol')
+    if rol not in ('ogrenci', 'admin'):
+        rol = None
+    aktif = {'aktif': True, 'pasif': False}.get(request.args.get('durum'))
+    ilk_gun = gun_coz(request.args.get('baslangic'))
+    son_gun = gun_coz(request.args.get('bitis'))
+    imlec_zaman, imlec_id = imlec_coz(request.args.get('imlec'))
+    
     cur.execute("""
         SELECT k.*, 
-               COUNT(DISTINCT r.rezervasyon_id) as rez_sayisi,
-               COUNT(DISTINCT co.oturum_id) as oturum_sayisi
+               COALESCE(s.rez_aktif + s.rez_iptal + s.rez_tamamlandi, 0) as rez_sayisi,
+               COALESCE(s.oturum_sayisi, 0) as oturum_sayisi
         FROM kullanicilar k
-        LEFT JOIN rezervasyonlar r ON k.kullanici_id = r.kullanici_id
-        LEFT JOIN calisma_oturumlari co ON k.kullanici_id = co.kullanici_id
-        GROUP BY k.kullanici_id
-        ORDER BY k.kayit_tarihi DESC
-    """)
-    kullanicilar = cur.fetchall()
+        LEFT JOIN kullanici_sayaclari s ON k.kullanici_id = s.kullanici_id
+        WHERE (%s::VARCHAR IS NULL OR k.rol = %s)
+        AND (%s::BOOLEAN IS NULL OR k.aktif = %s)
+        AND k.kayit_tarihi >= COALESCE(%s::DATE, '-infinity'::TIMESTAMP)
+        AND k.kayit_tarihi < COALESCE(%s::DATE + 1, 'infinity'::TIMESTAMP)
+        AND (k.kayit_tarihi, k.kullanici_id)
+            < (COALESCE(%s::TIMESTAMP, 'infinity'), COALESCE(%s::INTEGER, 2147483647))
+        ORDER BY k.kayit_tarihi DESC, k.kullanici_id DESC
+        LIMIT %s
+    """, (rol, rol, aktif, aktif, ilk_gun, son_gun, imlec_zaman, imlec_id, SAYFA_BOYUTU + 1))
+    kullanicilar, sonraki = sayfa_sonu(cur.fetchall(), 'kayit_tarihi', 'kullanici_id')
     
     cur.close()
-    conn.close()
     
-    return render_template('admin_kullanicilar.html', kullanicilar=kullanicilar)
+    return render_template('admin_kullanicilar.html', kullanicilar=kullanicilar, sonraki=sonraki)
 
 @app.route('/admin/alanlar')
 @admin_required
+@salt_okunur
 def admin_alanlar():
     conn = get_db_connection()
     cur = conn.cursor()
@@ -953,7 +1533,6 @@ def admin_alanlar():
     alanlar = cur.fetchall()
     
     cur.close()
-    conn.close()
     
     return render_template('admin_alanlar.html', alanlar=alanlar)
 
@@ -963,17 +1542,212 @@ def admin_loglar():
     conn = get_db_connection()
     cur = conn.cursor()
     
+    tablo = request.args.get('tablo') or None
+    islem = request.args.get('islem') or None
+    kayit_id = request.args.get('kayit_id', type=int)
+    imlec_zaman, imlec_id = imlec_coz(request.args.get('imlec'))
+    
     cur.execute("""
         SELECT * FROM log_kayitlari 
-        ORDER BY islem_zamani DESC 
-        LIMIT 100
-    """)
-    loglar = cur.fetchall()
+        WHERE (%s::VARCHAR IS NULL OR tablo_adi = %s)
+        AND (%s::VARCHAR IS NULL OR islem_tipi = %s)
+        AND (%s::INTEGER IS NULL OR kayit_id = %s)
+        AND (islem_zamani, log_id)
+            < (COALESCE(%s::TIMESTAMP, 'infinity'), COALESCE(%s::INTEGER, 2147483647))
+        ORDER BY islem_zamani DESC, log_id DESC
+        LIMIT %s
+    """, (tablo, tablo, islem, islem, kayit_id, kayit_id, imlec_zaman, imlec_id, SAYFA_BOYUTU + 1))
+    loglar, sonraki = sayfa_sonu(cur.fetchall(), 'islem_zamani', 'log_id')
     
     cur.close()
-    conn.close()
     
-    return render_template('admin_loglar.html', loglar=loglar)
+    return render_template('admin_loglar.html', loglar=loglar, sonraki=sonraki)
+
+@app.route('/admin/yavas-sorgular')
+@admin_required
+def admin_yavas_sorgular():
+    kayitlar = yavas_sorgular.entries()
+    endpoint = request.args.get('endpoint')
+    if endpoint:
+        kayitlar = [k for k in kayitlar if k['endpoint'] == endpoint]
+    if request.args.get('plan'):
+        kayitlar = [k for k in kayitlar if k['plan']]
+    return render_template('admin_yavas_sorgular.html', kayitlar=kayitlar,
+                           endpointler=sorted({k['endpoint'] for k in yavas_sorgular.entries() if k['endpoint']}),
+                           esik_ms=YAVAS_SORGU_MS, pid=os.getpid())
+
+@app.route('/admin/durum')
+@admin_required
+def admin_durum():
+    kopya = get_replica()
+    return jsonify({'havuz': get_pool().stats(),
+                    'okuma_kopyasi': kopya.stats() if kopya is not None else None,
+                    'katalog_onbellek': katalog_onbellek.stats(),
+                    'talep_onbellek': talep_onbellek.stats(),
+                    'sayfa_onbellek': sayfa_onbellek.stats(),
+                    'parca_onbellek': parca_onbellek.stats(),
+                    'varliklar': varliklar.stats(),
+                    'doluluk_indeksi': doluluk_indeksi.stats(),
+                    'supurucu': supurucu.stats(),
+                    'canli': canli_yayin.stats(),
+                    'bildirim': get_listener().stats()})
+
+@app.route('/metrics')
+def metrics():
+    # uç nokta adlarını, kullanıcı etkinliği sayaçlarını ve havuz durumunu açığa çıkarır
+    if METRIK_TOKEN:
+        yetkili = hmac.compare_digest(request.headers.get('Authorization', '').encode(),
+                                      f'Bearer {METRIK_TOKEN}'.encode())
+    else:
+        yetkili = session.get('rol') == 'admin'
+    if not yetkili:
+        return Response('yetkisiz\n', status=401, mimetype='text/plain')
+    return Response(metrikler.render(), mimetype='text/plain; version=0.0.4')
+
+@app.cli.command('varlik-derle')
+def varlik_derle():
+    """static/ altındaki CSS/JS kaynaklarını parmak izli, sıkıştırılmış paketlere derler."""
+    print(f"{'paket':<24} {'kaynak':>8} {'küçük':>8} {'gzip':>8} {'brotli':>8}")
+    for ad, ham, kucuk, gz, br in paketleri_derle(app.static_folder):
+        print(f"{ad:<24} {ham:>8} {kucuk:>8} {gz:>8} {br:>8}")
+    print('Çalışan worker\'lar yeni manifest\'i yeniden başlatıldıklarında okur.')
+
+@app.cli.command('ozet-yeniden-olustur')
+def ozet_yeniden_olustur():
+    """Rapor özet tablolarını ham verilerden baştan hesaplar."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT fn_ozet_yeniden_olustur()")
+    conn.commit()
+    cur.close()
+    print('Özet tabloları yeniden oluşturuldu.')
+
+@app.cli.command('talep-modeli-guncelle')
+@click.option('--yeniden', is_flag=True, help='Modeli son --gun günün verisiyle baştan kur')
+@click.option('--gun', default=84, help='Yeniden kurulumda kullanılacak gün sayısı')
+@click.option('--sonum', type=float, default=None, help='Haftalık sönüm katsayısı (0-1); verilmezse mevcut değer')
+def talep_modeli_guncelle(yeniden, gun, sonum):
+    """Kapanan günleri talep modeline katar; gece cron ile çalıştırılır."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    if yeniden:
+        cur.execute("SELECT fn_talep_modeli_yeniden_olustur(%s, %s) AS gun", (gun, sonum))
+    else:
+        cur.execute("SELECT fn_talep_modeli_guncelle() AS gun")
+    islenen = cur.fetchone()['gun']
+    conn.commit()
+    cur.close()
+    print(f'Talep modeli güncellendi: {islenen} gün işlendi.')
+
+@app.cli.command('ozet-dogrula')
+def ozet_dogrula():
+    """Özet tablolarını ham verilerden hesaplanan değerlerle karşılaştırır."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT * FROM fn_ozet_dogrula()")
+    farklar = cur.fetchall()
+    cur.close()
+    for f in farklar:
+        print(f"{f['tablo']} [{f['fark']}] {f['satir']}")
+    if farklar:
+        raise SystemExit(f'{len(farklar)} farklı satır bulundu.')
+    print('Özet tabloları ham verilerle tutarlı.')
+
+@app.cli.command('sayac-onar')
+@click.option('--parca', default=5000, help='Bir işlemde onarılacak kullanıcı kimliği aralığı')
+def sayac_onar(parca):
+    """Kullanıcı sayaçlarını ham verilerle karşılaştırıp sapmaları düzeltir."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT COALESCE(MAX(kullanici_id), 0) AS son FROM kullanicilar")
+    son = cur.fetchone()['son']
+    conn.commit()
+    toplam = 0
+    for ilk in range(0, son + 1, parca):
+        cur.execute("SELECT fn_kullanici_sayac_onar(%s, %s) AS duzeltilen", (ilk, ilk + parca - 1))
+        toplam += cur.fetchone()['duzeltilen']
+        conn.commit()
+    cur.close()
+    print(f'{toplam} kullanıcının sayacı düzeltildi.')
+
+@app.cli.command('log-bakim')
+@click.option('--saklama-ay', default=LOG_SAKLAMA_AY, help='Tutulacak log ayı sayısı')
+@click.option('--arsivle/--sil', default=LOG_ARSIVLE, help='Eski bölümler arsiv şemasına taşınsın mı')
+@click.option('--ileri', default=3, help='Önceden açılacak bölüm (ay) sayısı')
+def log_bakim(saklama_ay, arsivle, ileri):
+    """Bölümlenmiş tabloların gelecek aylar için bölümlerini açar, saklama süresini aşan logları kaldırır.
+
+    Günlük çalıştırılması yeterlidir (ör. cron ile `flask log-bakim`).
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    for tablo in BOLUMLU_TABLOLAR:
+        cur.execute("SELECT * FROM fn_bolumleri_hazirla(%s, %s) AS bolum", (tablo, ileri))
+        for satir in cur.fetchall():
+            print(f"{satir['bolum']} oluşturuldu")
+    cur.execute("SELECT * FROM fn_log_saklama(%s, %s)", (saklama_ay, arsivle))
+    for satir in cur.fetchall():
+        print(f"{satir['bolum']} {satir['islem']}")
+    conn.commit()
+    cur.close()
+
+@app.cli.command('rezervasyon-supur')
+@click.option('--parti', default=SUPURUCU_PARTI, help='Bir işlemde kapatılacak en fazla rezervasyon')
+@click.option('--tolerans', default=GELMEDI_TOLERANS_DAKIKA, help='Girişi olmayan rezervasyonun bırakılması için beklenen dakika')
+def rezervasyon_supur(parti, tolerans):
+    """Süresi geçmiş rezervasyonları tamamlar, gelinmeyenleri iptal edip yerlerini bırakır.
+
+    Birden fazla sunucuda aynı anda çalıştırılabilir (ör. cron ile dakikada bir `flask rezervasyon-supur`).
+    """
+    sonuc = RezervasyonSupurucu(parti, tolerans).calistir(get_db_connection())
+    print(f"{sonuc['tamamlanan']} tamamlandı, {sonuc['birakilan']} gelinmediği için iptal edildi "
+          f"({sonuc['parti']} parti, {sonuc['sure_ms']} ms)")
+
+def donem_araligi(gun):
+    """gun'ün içinde bulunduğu akademik dönemin [başlangıç, bitiş) aralığı: Güz Eylül-Ocak, Bahar Şubat-Ağustos."""
+    if 2 <= gun.month < 9:
+        return date(gun.year, 2, 1), date(gun.year, 9, 1)
+    yil = gun.year if gun.month >= 9 else gun.year - 1
+    return date(yil, 9, 1), date(yil + 1, 2, 1)
+
+@app.cli.command('donem-arsivle')
+@click.option('--tablespace', default=ARSIV_TABLESPACE, help='Arşiv bölümlerinin taşınacağı tablespace')
+def donem_arsivle(tablespace):
+    """Kapanmış dönemlerin rezervasyon ve oturum bölümlerini arşiv tablespace'ine taşıyıp sıkı paketler.
+
+    Dönem sonunda bir kez çalıştırılması yeterlidir; daha önce arşivlenmiş bölümler atlanır.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    acik_donem, _ = donem_araligi(date.today())
+    arsivlenen = []
+    for tablo in ARSIV_TABLOLARI:
+        cur.execute("""
+            SELECT MIN(to_date(right(c.relname, 6), 'YYYYMM')) AS ilk
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::REGCLASS AND c.relname ~ '_[0-9]{6}$'
+        """, (tablo,))
+        ilk = cur.fetchone()['ilk']
+        if ilk is None:
+            continue
+        bas, bit = donem_araligi(ilk)
+        while bit <= acik_donem:
+            cur.execute("SELECT * FROM fn_donem_arsivle(%s, %s, %s, %s) AS bolum",
+                        (tablo, bas, bit, tablespace))
+            arsivlenen += [satir['bolum'] for satir in cur.fetchall()]
+            conn.commit()
+            bas, bit = donem_araligi(bit)
+    cur.close()
+
+    # VACUUM işlem bloğu içinde çalışmaz; havuz bağlantısının ayarını bozmamak için ayrı bağlantı açılır
+    bakim = psycopg2.connect(**DB_CONFIG)
+    bakim.autocommit = True
+    with bakim.cursor() as bakim_cur:
+        for bolum in arsivlenen:
+            bakim_cur.execute(f'VACUUM (FREEZE, ANALYZE) "{bolum}"')
+            print(f'{bolum} arşivlendi')
+    bakim.close()
 
 if __name__ == '__main__':
     app.run(debug=True, port=5001)
\ No newline at end of file
@@ -0,0 +1,143 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+
+import brotli
+import rcssmin
+import rjsmin
+from flask import abort, send_from_directory, url_for
+
+# paket adı -> static/ altındaki kaynak dosya
+ASSETS = {
+    'base.css': 'css/base.css',
+    'base.js': 'js/base.js',
+    'index.css': 'css/index.css',
+    'index.js': 'js/index.js',
+    'login.css': 'css/login.css',
+    'login.js': 'js/login.js',
+    'takvim.css': 'css/takvim.css',
+    'takvim.js': 'js/takvim.js',
+    'admin_raporlar.css': 'css/admin_raporlar.css',
+    'oturum_baslat.js': 'js/oturum_baslat.js',
+    'rezervasyon_yeni.js': 'js/rezervasyon_yeni.js',
+}
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+COMPRESSIBLE = {'text/html', 'application/json', 'text/plain', 'text/csv'}
+
+
+def _minify(name, source):
+    if name.endswith('.css'):
+        return rcssmin.cssmin(source)
+    return rjsmin.jsmin(source)
+
+
+def build(static_dir):
+    """Kaynakları küçültür, içerik özetiyle adlandırır ve gzip/brotli kopyalarını yazar.
+
+    static/dist/manifest.json paket adını üretilen dosya adına eşler. Önceki derlemelerden
+    kalan dosyalar silinir. Her paket için (ad, ham, küçültülmüş, gzip, brotli) boyutlarını döndürür.
+    """
+    dist = os.path.join(static_dir, DIST)
+    os.makedirs(dist, exist_ok=True)
+    manifest = {}
+    sizes = []
+    for name, source_path in ASSETS.items():
+        with open(os.path.join(static_dir, source_path), encoding='utf-8') as f:
+            source = f.read()
+        data = _minify(name, source).encode()
+        stem, ext = os.path.splitext(name)
+        filename = f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}.min{ext}'
+        gz = gzip.compress(data, compresslevel=9, mtime=0)
+        br = brotli.compress(data, quality=11)
+        for suffix, content in (('', data), ('.gz', gz), ('.br', br)):
+            with open(os.path.join(dist, filename + suffix), 'wb') as f:
+                f.write(content)
+        manifest[name] = filename
+        sizes.append((name, len(source.encode()), len(data), len(gz), len(br)))
+
+    keep = {MANIFEST} | {f + s for f in manifest.values() for s in ('', '.gz', '.br')}
+    for old in os.listdir(dist):
+        if old not in keep:
+            os.remove(os.path.join(dist, old))
+    with open(os.path.join(dist, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return sizes
+
+
+def _accepts(accept_encoding, coding):
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        if name.strip().lower() == coding:
+            return params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+class Assets:
+    """Şablonlara parmak izli paket adreslerini verir ve paketleri sıkıştırılmış halleriyle sunar.
+
+    Paketler derlenmemişse (manifest yoksa) kaynak dosyalar Flask'ın static yolundan,
+    önbelleksiz olarak sunulur; geliştirmede derleme gerekmez.
+    """
+
+    def __init__(self, static_dir, endpoint):
+        self.dist = os.path.join(static_dir, DIST)
+        self.endpoint = endpoint
+        try:
+            with open(os.path.join(self.dist, MANIFEST), encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            self.manifest = {}
+        self.files = set(self.manifest.values())
+
+    def url(self, name):
+        filename = self.manifest.get(name)
+        if filename is None:
+            return url_for('static', filename=ASSETS[name])
+        return url_for(self.endpoint, filename=filename)
+
+    def send(self, filename, accept_encoding):
+        if filename not in self.files:
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0]
+        for coding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if _accepts(accept_encoding, coding):
+                response = send_from_directory(self.dist, filename + suffix, mimetype=mimetype, max_age=31536000)
+                response.headers['Content-Encoding'] = coding
+                break
+        else:
+            response = send_from_directory(self.dist, filename, mimetype=mimetype, max_age=31536000)
+        response.headers['Cache-Control'] = IMMUTABLE
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def stats(self):
+        return {'built': bool(self.manifest), 'bundles': len(self.manifest)}
+
+
+def compress_response(response, accept_encoding, min_size=512):
+    """Akış olmayan HTML/JSON/metin yanıtını istemcinin kabul ettiği kodlamayla sıkıştırır."""
+    if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE):
+        return response
+    response.vary.add('Accept-Encoding')
+    if _accepts(accept_encoding, 'br'):
+        coding = 'br'
+    elif _accepts(accept_encoding, 'gzip'):
+        coding = 'gzip'
+    else:
+        return response
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+    # paketler derlemede en yüksek seviyede sıkıştırılır; her istekte çalışan bu yolda hız öncelikli
+    response.set_data(brotli.compress(data, quality=4) if coding == 'br' else gzip.compress(data, compresslevel=6))
+    response.headers['Content-Encoding'] = coding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # sıkıştırılmış gövde baytça farklıdır; If-None-Match zayıf karşılaştırmayla eşleşmeye devam eder
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,81 @@
+import threading
+import time
+
+
+class TTLCache:
+    """Süreç içi, süre sınırlı anahtar/değer önbelleği.
+
+    invalidate() çağrısı yükleme sürerken gelirse, yüklenen eski değer önbelleğe yazılmaz.
+    max_entries verilirse sınır aşıldığında önce süresi dolanlar, sonra en eski kayıtlar atılır.
+    """
+
+    def __init__(self, ttl, max_entries=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def _store(self, key, value):
+        now = time.monotonic()
+        self._data.pop(key, None)
+        self._data[key] = (now + self.ttl, value)
+        if self.max_entries is not None and len(self._data) > self.max_entries:
+            # kayıtlar ekleme sırasıyla, dolayısıyla bitiş süresine göre sıralıdır
+            while self._data:
+                oldest = next(iter(self._data))
+                if len(self._data) <= self.max_entries and self._data[oldest][0] > now:
+                    break
+                del self._data[oldest]
+
+    def set(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def get_or_load(self, key, loader):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        value = loader()
+
+        with self._lock:
+            if generation == self._generation:
+                self._store(key, value)
+        return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._data),
+                'ttl': self.ttl,
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,98 @@
+import json
+import queue
+import threading
+from datetime import datetime
+
+from doluluk import dilimlere_bol, saatlik_tepe
+
+
+class CanliYayin:
+    """Veritabanı bildirimlerini süreçteki SSE abonelerine dağıtır.
+
+    Bildirimler süreç başına tek LISTEN bağlantısından gelir; abone sayısı veritabanı
+    yükünü değiştirmez. Her abonenin sınırlı bir kuyruğu vardır; kuyruğu dolan (okumayan)
+    aboneye olaylar yerine tek bir 'yenile' olayı bırakılır ve istemci verisini baştan çeker.
+
+    Her açık akış bir worker iş parçacığını (gevent'te bir greenlet'i) tutar; azami_abone
+    dolduğunda abone_ol None döner, böylece kalan eşzamanlılık normal isteklere kalır.
+    """
+
+    def __init__(self, doluluk_indeksi, kuyruk_boyutu=100, azami_abone=None):
+        self.doluluk_indeksi = doluluk_indeksi
+        self.kuyruk_boyutu = kuyruk_boyutu
+        self.azami_abone = azami_abone
+        self._aboneler = set()
+        self._lock = threading.Lock()
+        self.yayinlanan = 0
+        self.tasan = 0
+        self.reddedilen = 0
+
+    def abone_ol(self):
+        kuyruk = queue.Queue(self.kuyruk_boyutu)
+        with self._lock:
+            if self.azami_abone is not None and len(self._aboneler) >= self.azami_abone:
+                self.reddedilen += 1
+                return None
+            self._aboneler.add(kuyruk)
+        return kuyruk
+
+    def abonelikten_cik(self, kuyruk):
+        with self._lock:
+            self._aboneler.discard(kuyruk)
+
+    def yayinla(self, tur, veri):
+        olay = (tur, veri)
+        with self._lock:
+            aboneler = list(self._aboneler)
+            self.yayinlanan += 1
+        for kuyruk in aboneler:
+            try:
+                kuyruk.put_nowait(olay)
+            except queue.Full:
+                with self._lock:
+                    self.tasan += 1
+                self._bosalt(kuyruk)
+
+    def _bosalt(self, kuyruk):
+        try:
+            while True:
+                kuyruk.get_nowait()
+        except queue.Empty:
+            pass
+        kuyruk.put_nowait(('yenile', {}))
+
+    def doluluk_bildirimi(self, kanal, veri):
+        # DolulukIndeksi.bildirim_uygula'dan sonra çağrılmalıdır; gönderilen saatlik değerler
+        # indeksin güncellenmiş halinden okunur.
+        olay = json.loads(veri)
+        alan_id = olay['a']
+        baslangic = datetime.fromisoformat(olay['b'])
+        bitis = datetime.fromisoformat(olay['e'])
+        for gun, _, _ in dilimlere_bol(baslangic, bitis):
+            dilimler = self.doluluk_indeksi.alan_gunu(gun, alan_id)
+            self.yayinla('doluluk', {
+                'gun': gun.isoformat(),
+                'alan': alan_id,
+                'saatler': saatlik_tepe({alan_id: dilimler})[alan_id] if dilimler is not None else None,
+            })
+
+    def oturum_bildirimi(self, kanal, veri):
+        olay = json.loads(veri)
+        self.yayinla('oturum', {'alan': olay['a'], 'fark': olay['d']})
+
+    def baglanti_yenilendi(self):
+        self.yayinla('yenile', {})
+
+    def stats(self):
+        with self._lock:
+            return {
+                'abone': len(self._aboneler),
+                'azami_abone': self.azami_abone,
+                'yayinlanan': self.yayinlanan,
+                'tasan': self.tasan,
+                'reddedilen': self.reddedilen,
+            }
+
+
+def sse_mesaji(tur, veri):
+    return f"event: {tur}\ndata: {json.dumps(veri)}\n\n"
@@ -0,0 +1,4 @@
+#!/bin/sh
+# Okuma kopyasının (docker-compose.yml: db-replika) pg_basebackup ve WAL akışı için bağlanabilmesi.
+# Yalnızca veri dizini ilk oluşturulurken çalışır; mevcut bir birimde pg_hba.conf'a elle eklenmelidir.
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
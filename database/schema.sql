@@ -4,6 +4,16 @@ DROP TABLE IF EXISTS calisma_alanlari CASCADE;
 DROP TABLE IF EXISTS alan_turleri CASCADE;
 DROP TABLE IF EXISTS kullanicilar CASCADE;
 DROP TABLE IF EXISTS log_kayitlari CASCADE;
+DROP TABLE IF EXISTS ozet_rezervasyon_saatlik CASCADE;
+DROP TABLE IF EXISTS ozet_oturum_gunluk CASCADE;
+DROP TABLE IF EXISTS ozet_alan_toplam CASCADE;
+DROP TABLE IF EXISTS kullanici_sayaclari CASCADE;
+DROP TABLE IF EXISTS talep_modeli CASCADE;
+DROP TABLE IF EXISTS talep_modeli_kampus CASCADE;
+DROP TABLE IF EXISTS talep_modeli_durum CASCADE;
+
+DROP TYPE IF EXISTS ozet_rezervasyon_degisim CASCADE;
+DROP TYPE IF EXISTS ozet_oturum_degisim CASCADE;
 
 DROP SEQUENCE IF EXISTS rezervasyon_seq CASCADE;
 DROP SEQUENCE IF EXISTS oturum_seq CASCADE;
@@ -54,8 +64,10 @@ CREATE TABLE calisma_alanlari (
     UNIQUE(alan_adi, konum)
 );
 
+-- baslangic_zamani'na göre aylık bölümlenir (bkz. fn_bolumleri_hazirla, fn_donem_arsivle).
+-- Birincil anahtar bölüm anahtarını içermek zorundadır; rezervasyon_id tekilliğini rezervasyon_seq sağlar.
 CREATE TABLE rezervasyonlar (
-    rezervasyon_id INTEGER PRIMARY KEY DEFAULT nextval('rezervasyon_seq'),
+    rezervasyon_id INTEGER NOT NULL DEFAULT nextval('rezervasyon_seq'),
     kullanici_id INTEGER NOT NULL REFERENCES kullanicilar(kullanici_id) ON DELETE CASCADE,
     alan_id INTEGER NOT NULL REFERENCES calisma_alanlari(alan_id) ON DELETE RESTRICT,
     baslangic_zamani TIMESTAMP NOT NULL,
@@ -66,39 +78,298 @@ CREATE TABLE rezervasyonlar (
     CONSTRAINT sure_kontrolu CHECK (bitis_zamani > baslangic_zamani),
     CONSTRAINT max_sure_kontrolu CHECK (
         EXTRACT(EPOCH FROM (bitis_zamani - baslangic_zamani)) / 3600 <= 4
-    )
-);
+    ),
+    PRIMARY KEY (rezervasyon_id, baslangic_zamani)
+) PARTITION BY RANGE (baslangic_zamani);
 
+CREATE TABLE rezervasyonlar_varsayilan PARTITION OF rezervasyonlar DEFAULT;
+
+-- giris_zamani'na göre aylık bölümlenir. Rezervasyon bağlantısı bölüm anahtarını da taşır;
+-- MATCH FULL ile iki sütun birlikte dolu ya da birlikte NULL olmak zorundadır.
 CREATE TABLE calisma_oturumlari (
-    oturum_id INTEGER PRIMARY KEY DEFAULT nextval('oturum_seq'),
-    rezervasyon_id INTEGER REFERENCES rezervasyonlar(rezervasyon_id) ON DELETE SET NULL,
+    oturum_id INTEGER NOT NULL DEFAULT nextval('oturum_seq'),
+    rezervasyon_id INTEGER,
+    rezervasyon_baslangic TIMESTAMP,
     kullanici_id INTEGER NOT NULL REFERENCES kullanicilar(kullanici_id) ON DELETE CASCADE,
     alan_id INTEGER NOT NULL REFERENCES calisma_alanlari(alan_id) ON DELETE RESTRICT,
     giris_zamani TIMESTAMP NOT NULL,
     cikis_zamani TIMESTAMP,
     verimlilik_puani INTEGER CHECK (verimlilik_puani BETWEEN 1 AND 10),
-    notlar TEXT
-);
+    notlar TEXT,
+    PRIMARY KEY (oturum_id, giris_zamani),
+    FOREIGN KEY (rezervasyon_id, rezervasyon_baslangic)
+        REFERENCES rezervasyonlar(rezervasyon_id, baslangic_zamani) MATCH FULL ON DELETE SET NULL
+) PARTITION BY RANGE (giris_zamani);
+
+CREATE TABLE calisma_oturumlari_varsayilan PARTITION OF calisma_oturumlari DEFAULT;
 
+-- Aylık bölümlenir; bölümler fn_bolumleri_hazirla ile önceden açılır, eski bölümler
+-- fn_log_saklama ile silinir ya da arsiv şemasına taşınır. Bölümü olmayan satırlar
+-- log_kayitlari_varsayilan'a düşer ve bölüm açıldığında oraya aktarılır.
 CREATE TABLE log_kayitlari (
-    log_id SERIAL PRIMARY KEY,
+    log_id SERIAL,
     islem_tipi VARCHAR(50) NOT NULL,
     tablo_adi VARCHAR(50) NOT NULL,
     kayit_id INTEGER,
     eski_deger TEXT,
     yeni_deger TEXT,
     kullanici_bilgisi TEXT,
-    islem_zamani TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    islem_zamani TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (islem_zamani, log_id)
+) PARTITION BY RANGE (islem_zamani);
+
+CREATE TABLE log_kayitlari_varsayilan PARTITION OF log_kayitlari DEFAULT;
+
+CREATE TABLE ozet_rezervasyon_saatlik (
+    tarih DATE NOT NULL,
+    saat SMALLINT NOT NULL,
+    alan_id INTEGER NOT NULL,
+    durum VARCHAR(20) NOT NULL,
+    sayi INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (tarih, saat, alan_id, durum)
 );
 
+CREATE TABLE ozet_oturum_gunluk (
+    tarih DATE NOT NULL,
+    alan_id INTEGER NOT NULL,
+    oturum_sayisi INTEGER NOT NULL DEFAULT 0,
+    tamamlanan_sayisi INTEGER NOT NULL DEFAULT 0,
+    verimlilik_toplami INTEGER NOT NULL DEFAULT 0,
+    verimlilik_sayisi INTEGER NOT NULL DEFAULT 0,
+    sure_saniye_toplami NUMERIC NOT NULL DEFAULT 0,
+    PRIMARY KEY (tarih, alan_id)
+);
+
+CREATE TABLE ozet_alan_toplam (
+    alan_id INTEGER PRIMARY KEY,
+    rez_aktif INTEGER NOT NULL DEFAULT 0,
+    rez_iptal INTEGER NOT NULL DEFAULT 0,
+    rez_tamamlandi INTEGER NOT NULL DEFAULT 0,
+    oturum_sayisi INTEGER NOT NULL DEFAULT 0,
+    tamamlanan_oturum INTEGER NOT NULL DEFAULT 0,
+    verimlilik_toplami INTEGER NOT NULL DEFAULT 0,
+    verimlilik_sayisi INTEGER NOT NULL DEFAULT 0,
+    sure_saniye_toplami NUMERIC NOT NULL DEFAULT 0
+);
+
+CREATE TABLE kullanici_sayaclari (
+    kullanici_id INTEGER PRIMARY KEY REFERENCES kullanicilar(kullanici_id) ON DELETE CASCADE,
+    rez_aktif INTEGER NOT NULL DEFAULT 0,
+    rez_iptal INTEGER NOT NULL DEFAULT 0,
+    rez_tamamlandi INTEGER NOT NULL DEFAULT 0,
+    oturum_sayisi INTEGER NOT NULL DEFAULT 0,
+    tamamlanan_oturum INTEGER NOT NULL DEFAULT 0,
+    verimlilik_toplami INTEGER NOT NULL DEFAULT 0,
+    verimlilik_sayisi INTEGER NOT NULL DEFAULT 0,
+    sure_saniye_toplami NUMERIC NOT NULL DEFAULT 0,
+    -- kullanıcının rezervasyon ya da oturumlarından biri her değiştiğinde artar (takvim ETag'i)
+    surum BIGINT NOT NULL DEFAULT 1,
+    son_degisiklik TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Talep modeli: alan, haftagünü (ISODOW) ve saat başına dolu koltuk-saat sayısının haftadan
+-- haftaya 'sonum' ile sönümlenen toplamı. agirlik * (1 - sonum) yaklaşık haftalık ortalamadır.
+-- Kapanan günler fn_talep_modeli_guncelle ile artımlı işlenir; kampüs tablosu alanların toplamıdır.
+CREATE TABLE talep_modeli (
+    alan_id INTEGER NOT NULL,
+    haftagunu SMALLINT NOT NULL,
+    saat SMALLINT NOT NULL,
+    agirlik DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (alan_id, haftagunu, saat)
+);
+
+CREATE TABLE talep_modeli_kampus (
+    haftagunu SMALLINT NOT NULL,
+    saat SMALLINT NOT NULL,
+    agirlik DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (haftagunu, saat)
+);
+
+CREATE TABLE talep_modeli_durum (
+    tek BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (tek),
+    sonum DOUBLE PRECISION NOT NULL DEFAULT 0.85 CHECK (sonum > 0 AND sonum < 1),
+    islenen_gun DATE,
+    guncelleme TIMESTAMP
+);
+
+INSERT INTO talep_modeli_durum DEFAULT VALUES;
+
 CREATE INDEX idx_rezervasyonlar_tarih ON rezervasyonlar(baslangic_zamani, bitis_zamani);
-CREATE INDEX idx_rezervasyonlar_kullanici ON rezervasyonlar(kullanici_id);
+CREATE INDEX idx_rezervasyonlar_kullanici ON rezervasyonlar(kullanici_id, baslangic_zamani, rezervasyon_id);
 CREATE INDEX idx_rezervasyonlar_alan ON rezervasyonlar(alan_id);
 CREATE INDEX idx_rezervasyonlar_durum ON rezervasyonlar(durum);
+CREATE INDEX idx_rezervasyonlar_alan_aktif ON rezervasyonlar(alan_id, baslangic_zamani, bitis_zamani)
+    WHERE durum = 'aktif';
+CREATE INDEX idx_rezervasyonlar_kullanici_aktif ON rezervasyonlar(kullanici_id, baslangic_zamani, bitis_zamani)
+    WHERE durum = 'aktif';
+CREATE INDEX idx_rezervasyonlar_aktif_baslangic ON rezervasyonlar(baslangic_zamani)
+    WHERE durum = 'aktif';
 CREATE INDEX idx_kullanicilar_ogrenci_no ON kullanicilar(ogrenci_no);
 CREATE INDEX idx_kullanicilar_email ON kullanicilar(email);
+CREATE INDEX idx_kullanicilar_kayit ON kullanicilar(kayit_tarihi, kullanici_id);
+CREATE INDEX idx_calisma_oturumlari_kullanici ON calisma_oturumlari(kullanici_id, giris_zamani, oturum_id);
+CREATE INDEX idx_calisma_oturumlari_kullanici_cikis ON calisma_oturumlari(kullanici_id, cikis_zamani)
+    WHERE cikis_zamani IS NOT NULL;
+CREATE INDEX idx_calisma_oturumlari_acik ON calisma_oturumlari(alan_id) WHERE cikis_zamani IS NULL;
+CREATE INDEX idx_log_kayitlari_tablo ON log_kayitlari(tablo_adi, islem_zamani, log_id);
+CREATE INDEX idx_log_kayitlari_islem ON log_kayitlari(islem_tipi, islem_zamani, log_id);
+CREATE INDEX idx_log_kayitlari_kayit ON log_kayitlari(kayit_id, islem_zamani, log_id);
 CREATE INDEX idx_calisma_alanlari_konum ON calisma_alanlari(konum);
 CREATE INDEX idx_calisma_alanlari_tur ON calisma_alanlari(tur_id);
+CREATE INDEX idx_talep_modeli_haftagunu ON talep_modeli(haftagunu, saat);
+
+CREATE SCHEMA IF NOT EXISTS arsiv;
+
+-- p_tablo için p_ay ayının bölümünü (<tablo>_YYYYMM) açar; bölüm zaten varsa NULL döndürür.
+CREATE OR REPLACE FUNCTION fn_bolum_olustur(p_tablo TEXT, p_ay DATE)
+RETURNS TEXT AS $$
+DECLARE
+    v_bas TIMESTAMP := date_trunc('month', p_ay);
+    v_bit TIMESTAMP := date_trunc('month', p_ay) + INTERVAL '1 month';
+    v_ad TEXT := p_tablo || '_' || to_char(p_ay, 'YYYYMM');
+    v_varsayilan TEXT := p_tablo || '_varsayilan';
+    v_anahtar TEXT := substring(pg_get_partkeydef(p_tablo::REGCLASS) FROM '\((\w+)\)');
+    v_tasinacak BOOLEAN;
+    v_fk RECORD;
+    v_fkler JSONB;
+BEGIN
+    IF to_regclass(v_ad) IS NOT NULL THEN
+        RETURN NULL;
+    END IF;
+
+    EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE %I >= %L AND %I < %L)',
+                   v_varsayilan, v_anahtar, v_bas, v_anahtar, v_bit) INTO v_tasinacak;
+    IF NOT v_tasinacak THEN
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                       v_ad, p_tablo, v_bas, v_bit);
+        RETURN v_ad;
+    END IF;
+
+    -- Varsayılan bölümde bu aya ait satırlar var: varsayılan bölüm ayrılıp satırlar yeni tabloya
+    -- aktarılır, sonra ikisi yeniden bağlanır. Ayrılmış tablolarda üst tablonun tetikleyicileri
+    -- çalışmadığından aktarım doluluk bildirimi, özet güncellemesi ya da log üretmez.
+    -- Bu tabloya başvuran yabancı anahtarlar (calisma_oturumlari -> rezervasyonlar) varken
+    -- başvurulan satırı olan bölüm ayrılamaz; anahtarlar aynı işlem içinde kaldırılıp aktarımdan
+    -- sonra yeniden eklenir. Yeniden ekleme başvuran tabloyu baştan sona doğrular.
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+               'tablo', conrelid::REGCLASS::TEXT, 'ad', conname, 'tanim', pg_get_constraintdef(oid))), '[]')
+    INTO v_fkler
+    FROM pg_constraint
+    WHERE contype = 'f' AND confrelid = p_tablo::REGCLASS AND conparentid = 0;
+    FOR v_fk IN SELECT * FROM jsonb_to_recordset(v_fkler) AS f(tablo TEXT, ad TEXT, tanim TEXT) LOOP
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', v_fk.tablo, v_fk.ad);
+    END LOOP;
+
+    EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', p_tablo, v_varsayilan);
+    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', v_ad, p_tablo);
+    EXECUTE format('WITH tasinan AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING *)
+                    INSERT INTO %I SELECT * FROM tasinan',
+                   v_varsayilan, v_anahtar, v_bas, v_anahtar, v_bit, v_ad);
+    EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                   p_tablo, v_ad, v_bas, v_bit);
+    EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I DEFAULT', p_tablo, v_varsayilan);
+
+    FOR v_fk IN SELECT * FROM jsonb_to_recordset(v_fkler) AS f(tablo TEXT, ad TEXT, tanim TEXT) LOOP
+        EXECUTE format('ALTER TABLE %s ADD CONSTRAINT %I %s', v_fk.tablo, v_fk.ad, v_fk.tanim);
+    END LOOP;
+    RETURN v_ad;
+END;
+$$ LANGUAGE plpgsql;
+
+-- p_ilk ayından içinde bulunulan aydan p_ileri ay sonrasına kadar eksik bölümleri açar.
+CREATE OR REPLACE FUNCTION fn_bolumleri_hazirla(
+    p_tablo TEXT,
+    p_ileri INTEGER DEFAULT 3,
+    p_ilk DATE DEFAULT CURRENT_DATE
+)
+RETURNS SETOF TEXT AS $$
+    SELECT ad
+    FROM generate_series(date_trunc('month', LEAST(p_ilk, CURRENT_DATE)),
+                         date_trunc('month', CURRENT_DATE) + make_interval(months => p_ileri),
+                         INTERVAL '1 month') AS ay,
+         LATERAL fn_bolum_olustur(p_tablo, ay::DATE) AS ad
+    WHERE ad IS NOT NULL;
+$$ LANGUAGE sql;
+
+-- Kapanmış bir dönemin aylık bölümlerini soğuk depolamaya hazırlar: isteğe bağlı tablespace'e
+-- (ör. daha ucuz ya da dosya sistemi düzeyinde sıkıştıran bir diske) taşır ve bölümü birincil
+-- anahtar sırasına göre fillfactor 100 ile yeniden yazar; boş alan geri kazanılır, satırlar
+-- sıkı paketlenir. Veri sıkıştırılmaz: sütunlar TOAST eşiğinin altında kısa metinlerdir.
+-- Bölümler yerinde kalır; yabancı anahtarlar ve bölüm budaması etkilenmez. Yeniden yazma
+-- bölümü kısa süreliğine ACCESS EXCLUSIVE kilitler.
+CREATE OR REPLACE FUNCTION fn_donem_arsivle(
+    p_tablo TEXT,
+    p_bas DATE,
+    p_bit DATE,
+    p_tablespace TEXT DEFAULT NULL
+)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    v_bolum TEXT;
+    v_oid OID;
+    v_indeks TEXT;
+BEGIN
+    FOR v_bolum, v_oid IN
+        SELECT c.relname::TEXT, c.oid
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = p_tablo::REGCLASS
+        AND c.relname ~ ('^' || p_tablo || '_[0-9]{6}$')
+        AND to_date(right(c.relname, 6), 'YYYYMM') >= p_bas
+        AND to_date(right(c.relname, 6), 'YYYYMM') < p_bit
+        AND obj_description(c.oid, 'pg_class') IS DISTINCT FROM 'arsiv'
+        ORDER BY c.relname
+    LOOP
+        IF p_tablespace IS NOT NULL THEN
+            EXECUTE format('ALTER TABLE %I SET TABLESPACE %I', v_bolum, p_tablespace);
+            FOR v_indeks IN SELECT indexrelid::REGCLASS::TEXT FROM pg_index WHERE indrelid = v_oid LOOP
+                EXECUTE format('ALTER INDEX %s SET TABLESPACE %I', v_indeks, p_tablespace);
+            END LOOP;
+        END IF;
+
+        SELECT indexrelid::REGCLASS::TEXT INTO v_indeks
+        FROM pg_index WHERE indrelid = v_oid AND indisprimary;
+
+        EXECUTE format('ALTER TABLE %I SET (fillfactor = 100)', v_bolum);
+        EXECUTE format('CLUSTER %I USING %s', v_bolum, v_indeks);
+        EXECUTE format('COMMENT ON TABLE %I IS %L', v_bolum, 'arsiv');
+        RETURN NEXT v_bolum;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Son p_saklama_ay aydan eski bölümleri ayırır; p_arsivle ise arsiv şemasına taşır, değilse siler.
+CREATE OR REPLACE FUNCTION fn_log_saklama(p_saklama_ay INTEGER, p_arsivle BOOLEAN DEFAULT FALSE)
+RETURNS TABLE (bolum TEXT, islem TEXT) AS $$
+DECLARE
+    v_sinir DATE := date_trunc('month', CURRENT_DATE) - make_interval(months => p_saklama_ay);
+BEGIN
+    FOR bolum IN
+        SELECT c.relname::TEXT
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'log_kayitlari'::REGCLASS
+        AND c.relname ~ '^log_kayitlari_[0-9]{6}$'
+        AND to_date(right(c.relname, 6), 'YYYYMM') < v_sinir
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('ALTER TABLE log_kayitlari DETACH PARTITION %I', bolum);
+        IF p_arsivle THEN
+            EXECUTE format('ALTER TABLE %I SET SCHEMA arsiv', bolum);
+            islem := 'arsivlendi';
+        ELSE
+            EXECUTE format('DROP TABLE %I', bolum);
+            islem := 'silindi';
+        END IF;
+        RETURN NEXT;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT fn_bolumleri_hazirla('log_kayitlari');
+-- Örnek veriler Ocak 2025'ten başlar; rezervasyonlar bir yıl ilerisine kadar bölümlenir.
+SELECT fn_bolumleri_hazirla('rezervasyonlar', 12, '2025-01-01');
+SELECT fn_bolumleri_hazirla('calisma_oturumlari', 3, '2025-01-01');
 
 INSERT INTO alan_turleri (tur_adi, aciklama, max_kapasite, saatlik_limit) VALUES
 ('Bireysel Masa', 'Tek kişilik çalışma masası', 1, 4),
@@ -174,61 +445,550 @@ INSERT INTO calisma_oturumlari (kullanici_id, alan_id, giris_zamani, cikis_zaman
 (7, 6, '2025-01-13 10:00:00', '2025-01-13 13:00:00', 9, NULL),
 (8, 8, '2025-01-12 11:00:00', '2025-01-12 14:00:00', 8, 'Toplantı verimli geçti');
 
-CREATE OR REPLACE FUNCTION log_rezervasyon_degisiklik()
+-- Log satırları ifade düzeyinde, tek INSERT ile yazılır; çok satırlı güncelleme ve
+-- silmelerde satır başına ayrı INSERT yapılmaz.
+CREATE OR REPLACE FUNCTION log_rezervasyon_guncelleme()
 RETURNS TRIGGER AS $$
 BEGIN
-    IF TG_OP = 'INSERT' THEN
-        INSERT INTO log_kayitlari (islem_tipi, tablo_adi, kayit_id, yeni_deger, kullanici_bilgisi)
-        VALUES ('INSERT', 'rezervasyonlar', NEW.rezervasyon_id, 
-                'Alan: ' || NEW.alan_id || ', Başlangıç: ' || NEW.baslangic_zamani,
-                'Kullanıcı ID: ' || NEW.kullanici_id);
-        RETURN NEW;
-    ELSIF TG_OP = 'UPDATE' THEN
-        INSERT INTO log_kayitlari (islem_tipi, tablo_adi, kayit_id, eski_deger, yeni_deger, kullanici_bilgisi)
-        VALUES ('UPDATE', 'rezervasyonlar', NEW.rezervasyon_id,
-                'Eski Durum: ' || OLD.durum,
-                'Yeni Durum: ' || NEW.durum,
-                'Kullanıcı ID: ' || NEW.kullanici_id);
-        RETURN NEW;
-    ELSIF TG_OP = 'DELETE' THEN
-        INSERT INTO log_kayitlari (islem_tipi, tablo_adi, kayit_id, eski_deger, kullanici_bilgisi)
-        VALUES ('DELETE', 'rezervasyonlar', OLD.rezervasyon_id,
-                'Silinen rezervasyon - Alan: ' || OLD.alan_id,
-                'Kullanıcı ID: ' || OLD.kullanici_id);
-        RETURN OLD;
-    END IF;
+    INSERT INTO log_kayitlari (islem_tipi, tablo_adi, kayit_id, eski_deger, yeni_deger, kullanici_bilgisi)
+    SELECT 'UPDATE', 'rezervasyonlar', y.rezervasyon_id,
+           'Eski Durum: ' || e.durum,
+           'Yeni Durum: ' || y.durum,
+           'Kullanıcı ID: ' || y.kullanici_id
+    FROM yeni y
+    JOIN eski e ON e.rezervasyon_id = y.rezervasyon_id;
     RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER trg_rezervasyon_log
-AFTER INSERT OR UPDATE OR DELETE ON rezervasyonlar
-FOR EACH ROW EXECUTE FUNCTION log_rezervasyon_degisiklik();
+AFTER UPDATE ON rezervasyonlar
+REFERENCING OLD TABLE AS eski NEW TABLE AS yeni
+FOR EACH STATEMENT EXECUTE FUNCTION log_rezervasyon_guncelleme();
+
+CREATE OR REPLACE FUNCTION log_rezervasyon_silme()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO log_kayitlari (islem_tipi, tablo_adi, kayit_id, eski_deger, kullanici_bilgisi)
+    SELECT 'DELETE', 'rezervasyonlar', e.rezervasyon_id,
+           'Silinen rezervasyon - Alan: ' || e.alan_id,
+           'Kullanıcı ID: ' || e.kullanici_id
+    FROM eski e;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_rezervasyon_log_silme
+AFTER DELETE ON rezervasyonlar
+REFERENCING OLD TABLE AS eski
+FOR EACH STATEMENT EXECUTE FUNCTION log_rezervasyon_silme();
+
+-- Eklemeler ifade düzeyinde loglanır: toplu INSERT'te tüm log satırları tek ifadeyle yazılır.
+CREATE OR REPLACE FUNCTION log_rezervasyon_ekleme()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO log_kayitlari (islem_tipi, tablo_adi, kayit_id, yeni_deger, kullanici_bilgisi)
+    SELECT 'INSERT', 'rezervasyonlar', y.rezervasyon_id,
+           'Alan: ' || y.alan_id || ', Başlangıç: ' || y.baslangic_zamani,
+           'Kullanıcı ID: ' || y.kullanici_id
+    FROM yeni y;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_rezervasyon_log_ekleme
+AFTER INSERT ON rezervasyonlar
+REFERENCING NEW TABLE AS yeni
+FOR EACH STATEMENT EXECUTE FUNCTION log_rezervasyon_ekleme();
 
 CREATE OR REPLACE FUNCTION guncelle_calisma_suresi()
 RETURNS TRIGGER AS $$
+BEGIN
+    WITH biten AS (
+        SELECT y.oturum_id, y.kullanici_id,
+               (EXTRACT(EPOCH FROM (y.cikis_zamani - y.giris_zamani)) / 60)::INTEGER AS sure_dakika
+        FROM yeni y
+        JOIN eski e ON e.oturum_id = y.oturum_id
+        WHERE y.cikis_zamani IS NOT NULL AND e.cikis_zamani IS NULL
+    ),
+    sure AS (
+        UPDATE kullanicilar k
+        SET toplam_calisma_suresi = k.toplam_calisma_suresi + b.sure
+        FROM (
+            SELECT kullanici_id, SUM(sure_dakika) AS sure
+            FROM biten
+            GROUP BY kullanici_id
+        ) b
+        WHERE k.kullanici_id = b.kullanici_id
+    )
+    INSERT INTO log_kayitlari (islem_tipi, tablo_adi, kayit_id, yeni_deger, kullanici_bilgisi)
+    SELECT 'CALISMA_SURESI', 'calisma_oturumlari', oturum_id,
+           'Eklenen süre: ' || sure_dakika || ' dakika',
+           'Kullanıcı ID: ' || kullanici_id
+    FROM biten;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_calisma_suresi_guncelle
+AFTER UPDATE ON calisma_oturumlari
+REFERENCING OLD TABLE AS eski NEW TABLE AS yeni
+FOR EACH STATEMENT EXECUTE FUNCTION guncelle_calisma_suresi();
+
+CREATE OR REPLACE FUNCTION fn_doluluk_bildir()
+RETURNS TRIGGER AS $$
 DECLARE
-    sure_dakika INTEGER;
+    degisti BOOLEAN := FALSE;
 BEGIN
-    IF NEW.cikis_zamani IS NOT NULL AND OLD.cikis_zamani IS NULL THEN
-        sure_dakika := EXTRACT(EPOCH FROM (NEW.cikis_zamani - NEW.giris_zamani)) / 60;
-        
-        UPDATE kullanicilar 
-        SET toplam_calisma_suresi = toplam_calisma_suresi + sure_dakika
-        WHERE kullanici_id = NEW.kullanici_id;
-        
-        INSERT INTO log_kayitlari (islem_tipi, tablo_adi, kayit_id, yeni_deger, kullanici_bilgisi)
-        VALUES ('CALISMA_SURESI', 'calisma_oturumlari', NEW.oturum_id,
-                'Eklenen süre: ' || sure_dakika || ' dakika',
-                'Kullanıcı ID: ' || NEW.kullanici_id);
+    IF TG_OP = 'UPDATE' THEN
+        degisti := NEW.durum IS DISTINCT FROM OLD.durum
+                OR NEW.alan_id IS DISTINCT FROM OLD.alan_id
+                OR NEW.baslangic_zamani IS DISTINCT FROM OLD.baslangic_zamani
+                OR NEW.bitis_zamani IS DISTINCT FROM OLD.bitis_zamani;
+    END IF;
+
+    IF TG_OP = 'DELETE' OR degisti THEN
+        IF OLD.durum = 'aktif' THEN
+            PERFORM pg_notify('doluluk_degisti', json_build_object(
+                'x', txid_current(), 'a', OLD.alan_id,
+                'b', OLD.baslangic_zamani, 'e', OLD.bitis_zamani, 'd', -1)::TEXT);
+        END IF;
     END IF;
-    RETURN NEW;
+
+    IF TG_OP = 'INSERT' OR degisti THEN
+        IF NEW.durum = 'aktif' THEN
+            PERFORM pg_notify('doluluk_degisti', json_build_object(
+                'x', txid_current(), 'a', NEW.alan_id,
+                'b', NEW.baslangic_zamani, 'e', NEW.bitis_zamani, 'd', 1)::TEXT);
+        END IF;
+    END IF;
+
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
-CREATE TRIGGER trg_calisma_suresi_guncelle
+CREATE TRIGGER trg_rezervasyon_doluluk
+AFTER INSERT OR UPDATE OR DELETE ON rezervasyonlar
+FOR EACH ROW EXECUTE FUNCTION fn_doluluk_bildir();
+
+-- Açık oturum (cikis_zamani IS NULL) sayısı değiştiğinde 'oturum_degisti' kanalına
+-- {"a": alan_id, "d": +1/-1} gönderir; canlı doluluk ekranları bu farkları uygular.
+CREATE OR REPLACE FUNCTION fn_oturum_bildir()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.cikis_zamani IS NULL
+       AND (TG_OP = 'DELETE' OR NEW.cikis_zamani IS NOT NULL OR NEW.alan_id <> OLD.alan_id) THEN
+        PERFORM pg_notify('oturum_degisti', json_build_object('a', OLD.alan_id, 'd', -1)::TEXT);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.cikis_zamani IS NULL
+       AND (TG_OP = 'INSERT' OR OLD.cikis_zamani IS NOT NULL OR NEW.alan_id <> OLD.alan_id) THEN
+        PERFORM pg_notify('oturum_degisti', json_build_object('a', NEW.alan_id, 'd', 1)::TEXT);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_oturum_bildir
+AFTER INSERT OR UPDATE OR DELETE ON calisma_oturumlari
+FOR EACH ROW EXECUTE FUNCTION fn_oturum_bildir();
+
+-- Rapor özetleri: rezervasyonlar ve calisma_oturumlari üzerindeki ifade düzeyindeki
+-- tetikleyiciler, değişen satırların katkısını özet tablolarına artımlı olarak işler.
+CREATE TYPE ozet_rezervasyon_degisim AS (
+    isaret INTEGER,
+    kullanici_id INTEGER,
+    alan_id INTEGER,
+    baslangic_zamani TIMESTAMP,
+    durum VARCHAR(20)
+);
+
+CREATE TYPE ozet_oturum_degisim AS (
+    isaret INTEGER,
+    kullanici_id INTEGER,
+    alan_id INTEGER,
+    giris_zamani TIMESTAMP,
+    cikis_zamani TIMESTAMP,
+    verimlilik_puani INTEGER
+);
+
+CREATE OR REPLACE FUNCTION fn_ozet_rezervasyon_uygula(p_degisim ozet_rezervasyon_degisim[])
+RETURNS VOID AS $$
+    WITH saatlik AS (
+        INSERT INTO ozet_rezervasyon_saatlik AS o (tarih, saat, alan_id, durum, sayi)
+        SELECT d.baslangic_zamani::DATE, EXTRACT(HOUR FROM d.baslangic_zamani)::SMALLINT,
+               d.alan_id, d.durum, SUM(d.isaret)
+        FROM unnest(p_degisim) d
+        GROUP BY 1, 2, 3, 4
+        HAVING SUM(d.isaret) <> 0
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (tarih, saat, alan_id, durum) DO UPDATE SET sayi = o.sayi + EXCLUDED.sayi
+    ),
+    kullanici AS (
+        -- Silinmiş kullanıcılar (ON DELETE CASCADE sırasında) için sayaç satırı oluşturulmaz.
+        INSERT INTO kullanici_sayaclari AS s (kullanici_id, rez_aktif, rez_iptal, rez_tamamlandi)
+        SELECT d.kullanici_id,
+               COALESCE(SUM(d.isaret) FILTER (WHERE d.durum = 'aktif'), 0),
+               COALESCE(SUM(d.isaret) FILTER (WHERE d.durum = 'iptal'), 0),
+               COALESCE(SUM(d.isaret) FILTER (WHERE d.durum = 'tamamlandi'), 0)
+        FROM unnest(p_degisim) d
+        JOIN kullanicilar k ON k.kullanici_id = d.kullanici_id
+        GROUP BY d.kullanici_id
+        ORDER BY d.kullanici_id
+        ON CONFLICT (kullanici_id) DO UPDATE SET
+            rez_aktif = s.rez_aktif + EXCLUDED.rez_aktif,
+            rez_iptal = s.rez_iptal + EXCLUDED.rez_iptal,
+            rez_tamamlandi = s.rez_tamamlandi + EXCLUDED.rez_tamamlandi,
+            surum = s.surum + 1,
+            son_degisiklik = CURRENT_TIMESTAMP
+    )
+    INSERT INTO ozet_alan_toplam AS o (alan_id, rez_aktif, rez_iptal, rez_tamamlandi)
+    SELECT d.alan_id,
+           COALESCE(SUM(d.isaret) FILTER (WHERE d.durum = 'aktif'), 0),
+           COALESCE(SUM(d.isaret) FILTER (WHERE d.durum = 'iptal'), 0),
+           COALESCE(SUM(d.isaret) FILTER (WHERE d.durum = 'tamamlandi'), 0)
+    FROM unnest(p_degisim) d
+    GROUP BY d.alan_id
+    ORDER BY d.alan_id
+    ON CONFLICT (alan_id) DO UPDATE SET
+        rez_aktif = o.rez_aktif + EXCLUDED.rez_aktif,
+        rez_iptal = o.rez_iptal + EXCLUDED.rez_iptal,
+        rez_tamamlandi = o.rez_tamamlandi + EXCLUDED.rez_tamamlandi;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION fn_ozet_oturum_uygula(p_degisim ozet_oturum_degisim[])
+RETURNS VOID AS $$
+    WITH d AS (
+        SELECT d.giris_zamani::DATE AS tarih,
+               d.kullanici_id,
+               d.alan_id,
+               d.isaret AS oturum,
+               CASE WHEN d.cikis_zamani IS NOT NULL THEN d.isaret ELSE 0 END AS tamamlanan,
+               CASE WHEN d.cikis_zamani IS NOT NULL AND d.verimlilik_puani IS NOT NULL
+                    THEN d.isaret * d.verimlilik_puani ELSE 0 END AS verimlilik_toplami,
+               CASE WHEN d.cikis_zamani IS NOT NULL AND d.verimlilik_puani IS NOT NULL
+                    THEN d.isaret ELSE 0 END AS verimlilik_sayisi,
+               CASE WHEN d.cikis_zamani IS NOT NULL
+                    THEN d.isaret * EXTRACT(EPOCH FROM (d.cikis_zamani - d.giris_zamani)) ELSE 0 END AS sure_saniye
+        FROM unnest(p_degisim) d
+    ),
+    gunluk AS (
+        INSERT INTO ozet_oturum_gunluk AS o (tarih, alan_id, oturum_sayisi, tamamlanan_sayisi,
+                                             verimlilik_toplami, verimlilik_sayisi, sure_saniye_toplami)
+        SELECT tarih, alan_id, SUM(oturum), SUM(tamamlanan), SUM(verimlilik_toplami),
+               SUM(verimlilik_sayisi), SUM(sure_saniye)
+        FROM d
+        GROUP BY tarih, alan_id
+        ORDER BY tarih, alan_id
+        ON CONFLICT (tarih, alan_id) DO UPDATE SET
+            oturum_sayisi = o.oturum_sayisi + EXCLUDED.oturum_sayisi,
+            tamamlanan_sayisi = o.tamamlanan_sayisi + EXCLUDED.tamamlanan_sayisi,
+            verimlilik_toplami = o.verimlilik_toplami + EXCLUDED.verimlilik_toplami,
+            verimlilik_sayisi = o.verimlilik_sayisi + EXCLUDED.verimlilik_sayisi,
+            sure_saniye_toplami = o.sure_saniye_toplami + EXCLUDED.sure_saniye_toplami
+    ),
+    kullanici AS (
+        INSERT INTO kullanici_sayaclari AS s (kullanici_id, oturum_sayisi, tamamlanan_oturum,
+                                              verimlilik_toplami, verimlilik_sayisi, sure_saniye_toplami)
+        SELECT d.kullanici_id, SUM(d.oturum), SUM(d.tamamlanan), SUM(d.verimlilik_toplami),
+               SUM(d.verimlilik_sayisi), SUM(d.sure_saniye)
+        FROM d
+        JOIN kullanicilar k ON k.kullanici_id = d.kullanici_id
+        GROUP BY d.kullanici_id
+        ORDER BY d.kullanici_id
+        ON CONFLICT (kullanici_id) DO UPDATE SET
+            oturum_sayisi = s.oturum_sayisi + EXCLUDED.oturum_sayisi,
+            tamamlanan_oturum = s.tamamlanan_oturum + EXCLUDED.tamamlanan_oturum,
+            verimlilik_toplami = s.verimlilik_toplami + EXCLUDED.verimlilik_toplami,
+            verimlilik_sayisi = s.verimlilik_sayisi + EXCLUDED.verimlilik_sayisi,
+            sure_saniye_toplami = s.sure_saniye_toplami + EXCLUDED.sure_saniye_toplami,
+            surum = s.surum + 1,
+            son_degisiklik = CURRENT_TIMESTAMP
+    )
+    INSERT INTO ozet_alan_toplam AS o (alan_id, oturum_sayisi, tamamlanan_oturum,
+                                       verimlilik_toplami, verimlilik_sayisi, sure_saniye_toplami)
+    SELECT alan_id, SUM(oturum), SUM(tamamlanan), SUM(verimlilik_toplami),
+           SUM(verimlilik_sayisi), SUM(sure_saniye)
+    FROM d
+    GROUP BY alan_id
+    ORDER BY alan_id
+    ON CONFLICT (alan_id) DO UPDATE SET
+        oturum_sayisi = o.oturum_sayisi + EXCLUDED.oturum_sayisi,
+        tamamlanan_oturum = o.tamamlanan_oturum + EXCLUDED.tamamlanan_oturum,
+        verimlilik_toplami = o.verimlilik_toplami + EXCLUDED.verimlilik_toplami,
+        verimlilik_sayisi = o.verimlilik_sayisi + EXCLUDED.verimlilik_sayisi,
+        sure_saniye_toplami = o.sure_saniye_toplami + EXCLUDED.sure_saniye_toplami;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION fn_ozet_rezervasyon_tetik()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM fn_ozet_rezervasyon_uygula(ARRAY(
+            SELECT ROW(1, y.kullanici_id, y.alan_id, y.baslangic_zamani, y.durum)::ozet_rezervasyon_degisim FROM yeni y));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM fn_ozet_rezervasyon_uygula(ARRAY(
+            SELECT ROW(-1, e.kullanici_id, e.alan_id, e.baslangic_zamani, e.durum)::ozet_rezervasyon_degisim FROM eski e));
+    ELSE
+        PERFORM fn_ozet_rezervasyon_uygula(ARRAY(
+            SELECT ROW(-1, e.kullanici_id, e.alan_id, e.baslangic_zamani, e.durum)::ozet_rezervasyon_degisim FROM eski e
+            UNION ALL
+            SELECT ROW(1, y.kullanici_id, y.alan_id, y.baslangic_zamani, y.durum)::ozet_rezervasyon_degisim FROM yeni y));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fn_ozet_oturum_tetik()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM fn_ozet_oturum_uygula(ARRAY(
+            SELECT ROW(1, y.kullanici_id, y.alan_id, y.giris_zamani, y.cikis_zamani, y.verimlilik_puani)::ozet_oturum_degisim
+            FROM yeni y));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM fn_ozet_oturum_uygula(ARRAY(
+            SELECT ROW(-1, e.kullanici_id, e.alan_id, e.giris_zamani, e.cikis_zamani, e.verimlilik_puani)::ozet_oturum_degisim
+            FROM eski e));
+    ELSE
+        PERFORM fn_ozet_oturum_uygula(ARRAY(
+            SELECT ROW(-1, e.kullanici_id, e.alan_id, e.giris_zamani, e.cikis_zamani, e.verimlilik_puani)::ozet_oturum_degisim
+            FROM eski e
+            UNION ALL
+            SELECT ROW(1, y.kullanici_id, y.alan_id, y.giris_zamani, y.cikis_zamani, y.verimlilik_puani)::ozet_oturum_degisim
+            FROM yeni y));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_ozet_rezervasyon_ekleme
+AFTER INSERT ON rezervasyonlar
+REFERENCING NEW TABLE AS yeni
+FOR EACH STATEMENT EXECUTE FUNCTION fn_ozet_rezervasyon_tetik();
+
+CREATE TRIGGER trg_ozet_rezervasyon_guncelleme
+AFTER UPDATE ON rezervasyonlar
+REFERENCING OLD TABLE AS eski NEW TABLE AS yeni
+FOR EACH STATEMENT EXECUTE FUNCTION fn_ozet_rezervasyon_tetik();
+
+CREATE TRIGGER trg_ozet_rezervasyon_silme
+AFTER DELETE ON rezervasyonlar
+REFERENCING OLD TABLE AS eski
+FOR EACH STATEMENT EXECUTE FUNCTION fn_ozet_rezervasyon_tetik();
+
+CREATE TRIGGER trg_ozet_oturum_ekleme
+AFTER INSERT ON calisma_oturumlari
+REFERENCING NEW TABLE AS yeni
+FOR EACH STATEMENT EXECUTE FUNCTION fn_ozet_oturum_tetik();
+
+CREATE TRIGGER trg_ozet_oturum_guncelleme
 AFTER UPDATE ON calisma_oturumlari
-FOR EACH ROW EXECUTE FUNCTION guncelle_calisma_suresi();
+REFERENCING OLD TABLE AS eski NEW TABLE AS yeni
+FOR EACH STATEMENT EXECUTE FUNCTION fn_ozet_oturum_tetik();
+
+CREATE TRIGGER trg_ozet_oturum_silme
+AFTER DELETE ON calisma_oturumlari
+REFERENCING OLD TABLE AS eski
+FOR EACH STATEMENT EXECUTE FUNCTION fn_ozet_oturum_tetik();
+
+-- Özet tablolarının ham verilerden hesaplanan karşılıkları; yeniden oluşturma ve doğrulamada kullanılır.
+CREATE OR REPLACE VIEW v_ozet_rezervasyon_saatlik_ham AS
+SELECT 
+    baslangic_zamani::DATE AS tarih,
+    EXTRACT(HOUR FROM baslangic_zamani)::SMALLINT AS saat,
+    alan_id,
+    durum,
+    COUNT(*)::INTEGER AS sayi
+FROM rezervasyonlar
+GROUP BY 1, 2, 3, 4;
+
+CREATE OR REPLACE VIEW v_ozet_oturum_gunluk_ham AS
+SELECT 
+    giris_zamani::DATE AS tarih,
+    alan_id,
+    COUNT(*)::INTEGER AS oturum_sayisi,
+    COUNT(cikis_zamani)::INTEGER AS tamamlanan_sayisi,
+    COALESCE(SUM(verimlilik_puani) FILTER (WHERE cikis_zamani IS NOT NULL), 0)::INTEGER AS verimlilik_toplami,
+    (COUNT(verimlilik_puani) FILTER (WHERE cikis_zamani IS NOT NULL))::INTEGER AS verimlilik_sayisi,
+    COALESCE(SUM(EXTRACT(EPOCH FROM (cikis_zamani - giris_zamani))), 0) AS sure_saniye_toplami
+FROM calisma_oturumlari
+GROUP BY 1, 2;
+
+CREATE OR REPLACE VIEW v_ozet_alan_toplam_ham AS
+SELECT 
+    COALESCE(r.alan_id, o.alan_id) AS alan_id,
+    COALESCE(r.rez_aktif, 0) AS rez_aktif,
+    COALESCE(r.rez_iptal, 0) AS rez_iptal,
+    COALESCE(r.rez_tamamlandi, 0) AS rez_tamamlandi,
+    COALESCE(o.oturum_sayisi, 0) AS oturum_sayisi,
+    COALESCE(o.tamamlanan_oturum, 0) AS tamamlanan_oturum,
+    COALESCE(o.verimlilik_toplami, 0) AS verimlilik_toplami,
+    COALESCE(o.verimlilik_sayisi, 0) AS verimlilik_sayisi,
+    COALESCE(o.sure_saniye_toplami, 0) AS sure_saniye_toplami
+FROM (
+    SELECT alan_id,
+           COUNT(*) FILTER (WHERE durum = 'aktif')::INTEGER AS rez_aktif,
+           COUNT(*) FILTER (WHERE durum = 'iptal')::INTEGER AS rez_iptal,
+           COUNT(*) FILTER (WHERE durum = 'tamamlandi')::INTEGER AS rez_tamamlandi
+    FROM rezervasyonlar
+    GROUP BY alan_id
+) r
+FULL JOIN (
+    SELECT alan_id,
+           SUM(oturum_sayisi)::INTEGER AS oturum_sayisi,
+           SUM(tamamlanan_sayisi)::INTEGER AS tamamlanan_oturum,
+           SUM(verimlilik_toplami)::INTEGER AS verimlilik_toplami,
+           SUM(verimlilik_sayisi)::INTEGER AS verimlilik_sayisi,
+           SUM(sure_saniye_toplami) AS sure_saniye_toplami
+    FROM v_ozet_oturum_gunluk_ham
+    GROUP BY alan_id
+) o ON r.alan_id = o.alan_id;
+
+CREATE OR REPLACE FUNCTION fn_ozet_yeniden_olustur()
+RETURNS VOID AS $$
+BEGIN
+    -- Yeniden oluşturma sırasında yazmalar beklenir, böylece özetler tutarlı bir anı yansıtır.
+    LOCK TABLE rezervasyonlar, calisma_oturumlari IN SHARE MODE;
+    TRUNCATE ozet_rezervasyon_saatlik, ozet_oturum_gunluk, ozet_alan_toplam;
+    INSERT INTO ozet_rezervasyon_saatlik SELECT * FROM v_ozet_rezervasyon_saatlik_ham;
+    INSERT INTO ozet_oturum_gunluk SELECT * FROM v_ozet_oturum_gunluk_ham;
+    INSERT INTO ozet_alan_toplam SELECT * FROM v_ozet_alan_toplam_ham;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fn_ozet_dogrula()
+RETURNS TABLE (
+    tablo TEXT,
+    fark TEXT,
+    satir TEXT
+) AS $$
+    SELECT 'ozet_rezervasyon_saatlik', 'ham', h::TEXT FROM (
+        SELECT * FROM v_ozet_rezervasyon_saatlik_ham
+        EXCEPT SELECT * FROM ozet_rezervasyon_saatlik WHERE sayi <> 0
+    ) h
+    UNION ALL
+    SELECT 'ozet_rezervasyon_saatlik', 'ozet', o::TEXT FROM (
+        SELECT * FROM ozet_rezervasyon_saatlik WHERE sayi <> 0
+        EXCEPT SELECT * FROM v_ozet_rezervasyon_saatlik_ham
+    ) o
+    UNION ALL
+    SELECT 'ozet_oturum_gunluk', 'ham', h::TEXT FROM (
+        SELECT * FROM v_ozet_oturum_gunluk_ham
+        EXCEPT SELECT * FROM ozet_oturum_gunluk WHERE oturum_sayisi <> 0
+    ) h
+    UNION ALL
+    SELECT 'ozet_oturum_gunluk', 'ozet', o::TEXT FROM (
+        SELECT * FROM ozet_oturum_gunluk WHERE oturum_sayisi <> 0
+        EXCEPT SELECT * FROM v_ozet_oturum_gunluk_ham
+    ) o
+    UNION ALL
+    SELECT 'ozet_alan_toplam', 'ham', h::TEXT FROM (
+        SELECT * FROM v_ozet_alan_toplam_ham
+        EXCEPT SELECT * FROM ozet_alan_toplam WHERE rez_aktif + rez_iptal + rez_tamamlandi + oturum_sayisi <> 0
+    ) h
+    UNION ALL
+    SELECT 'ozet_alan_toplam', 'ozet', o::TEXT FROM (
+        SELECT * FROM ozet_alan_toplam WHERE rez_aktif + rez_iptal + rez_tamamlandi + oturum_sayisi <> 0
+        EXCEPT SELECT * FROM v_ozet_alan_toplam_ham
+    ) o;
+$$ LANGUAGE sql;
+
+SELECT fn_ozet_yeniden_olustur();
+
+-- Sayaçların ham verilerden sapmasını onarır; p_ilk..p_son aralığındaki kullanıcılar işlenir,
+-- böylece büyük tablolarda iş kısa kilitli parçalara bölünebilir. Düzeltilen satır sayısını döndürür.
+CREATE OR REPLACE FUNCTION fn_kullanici_sayac_onar(
+    p_ilk INTEGER DEFAULT 0,
+    p_son INTEGER DEFAULT 2147483647
+)
+RETURNS INTEGER AS $$
+DECLARE
+    v_duzeltilen INTEGER;
+BEGIN
+    LOCK TABLE rezervasyonlar, calisma_oturumlari IN SHARE MODE;
+
+    WITH ham AS (
+        SELECT 
+            k.kullanici_id,
+            COALESCE(r.rez_aktif, 0) AS rez_aktif,
+            COALESCE(r.rez_iptal, 0) AS rez_iptal,
+            COALESCE(r.rez_tamamlandi, 0) AS rez_tamamlandi,
+            COALESCE(o.oturum_sayisi, 0) AS oturum_sayisi,
+            COALESCE(o.tamamlanan_oturum, 0) AS tamamlanan_oturum,
+            COALESCE(o.verimlilik_toplami, 0) AS verimlilik_toplami,
+            COALESCE(o.verimlilik_sayisi, 0) AS verimlilik_sayisi,
+            COALESCE(o.sure_saniye_toplami, 0) AS sure_saniye_toplami
+        FROM kullanicilar k
+        LEFT JOIN (
+            SELECT kullanici_id,
+                   COUNT(*) FILTER (WHERE durum = 'aktif')::INTEGER AS rez_aktif,
+                   COUNT(*) FILTER (WHERE durum = 'iptal')::INTEGER AS rez_iptal,
+                   COUNT(*) FILTER (WHERE durum = 'tamamlandi')::INTEGER AS rez_tamamlandi
+            FROM rezervasyonlar
+            WHERE kullanici_id BETWEEN p_ilk AND p_son
+            GROUP BY kullanici_id
+        ) r ON r.kullanici_id = k.kullanici_id
+        LEFT JOIN (
+            SELECT kullanici_id,
+                   COUNT(*)::INTEGER AS oturum_sayisi,
+                   COUNT(cikis_zamani)::INTEGER AS tamamlanan_oturum,
+                   COALESCE(SUM(verimlilik_puani) FILTER (WHERE cikis_zamani IS NOT NULL), 0)::INTEGER AS verimlilik_toplami,
+                   (COUNT(verimlilik_puani) FILTER (WHERE cikis_zamani IS NOT NULL))::INTEGER AS verimlilik_sayisi,
+                   COALESCE(SUM(EXTRACT(EPOCH FROM (cikis_zamani - giris_zamani))), 0) AS sure_saniye_toplami
+            FROM calisma_oturumlari
+            WHERE kullanici_id BETWEEN p_ilk AND p_son
+            GROUP BY kullanici_id
+        ) o ON o.kullanici_id = k.kullanici_id
+        WHERE k.kullanici_id BETWEEN p_ilk AND p_son
+    ),
+    duzeltilen AS (
+        INSERT INTO kullanici_sayaclari AS s
+        SELECT * FROM ham
+        ON CONFLICT (kullanici_id) DO UPDATE SET
+            rez_aktif = EXCLUDED.rez_aktif,
+            rez_iptal = EXCLUDED.rez_iptal,
+            rez_tamamlandi = EXCLUDED.rez_tamamlandi,
+            oturum_sayisi = EXCLUDED.oturum_sayisi,
+            tamamlanan_oturum = EXCLUDED.tamamlanan_oturum,
+            verimlilik_toplami = EXCLUDED.verimlilik_toplami,
+            verimlilik_sayisi = EXCLUDED.verimlilik_sayisi,
+            sure_saniye_toplami = EXCLUDED.sure_saniye_toplami,
+            surum = s.surum + 1,
+            son_degisiklik = CURRENT_TIMESTAMP
+        WHERE (s.rez_aktif, s.rez_iptal, s.rez_tamamlandi, s.oturum_sayisi, s.tamamlanan_oturum,
+               s.verimlilik_toplami, s.verimlilik_sayisi, s.sure_saniye_toplami)
+           IS DISTINCT FROM
+              (EXCLUDED.rez_aktif, EXCLUDED.rez_iptal, EXCLUDED.rez_tamamlandi, EXCLUDED.oturum_sayisi,
+               EXCLUDED.tamamlanan_oturum, EXCLUDED.verimlilik_toplami, EXCLUDED.verimlilik_sayisi,
+               EXCLUDED.sure_saniye_toplami)
+        RETURNING 1
+    )
+    SELECT COUNT(*) INTO v_duzeltilen FROM duzeltilen;
+
+    RETURN v_duzeltilen;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT fn_kullanici_sayac_onar();
+
+CREATE OR REPLACE FUNCTION fn_katalog_bildir()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('katalog_degisti', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_calisma_alanlari_katalog
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON calisma_alanlari
+FOR EACH STATEMENT EXECUTE FUNCTION fn_katalog_bildir();
+
+CREATE TRIGGER trg_alan_turleri_katalog
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON alan_turleri
+FOR EACH STATEMENT EXECUTE FUNCTION fn_katalog_bildir();
 
 CREATE OR REPLACE VIEW v_aktif_rezervasyonlar AS
 SELECT 
@@ -253,17 +1013,15 @@ SELECT
     k.kullanici_id,
     k.ogrenci_no,
     k.ad || ' ' || k.soyad AS kullanici_adi,
-    COUNT(DISTINCT r.rezervasyon_id) AS toplam_rezervasyon,
-    COUNT(DISTINCT CASE WHEN r.durum = 'aktif' THEN r.rezervasyon_id END) AS aktif_rezervasyon,
-    COUNT(DISTINCT CASE WHEN r.durum = 'iptal' THEN r.rezervasyon_id END) AS iptal_rezervasyon,
-    COUNT(DISTINCT co.oturum_id) AS toplam_oturum,
-    COALESCE(ROUND(AVG(co.verimlilik_puani), 2), 0) AS ortalama_verimlilik,
+    COALESCE(s.rez_aktif + s.rez_iptal + s.rez_tamamlandi, 0)::BIGINT AS toplam_rezervasyon,
+    COALESCE(s.rez_aktif, 0)::BIGINT AS aktif_rezervasyon,
+    COALESCE(s.rez_iptal, 0)::BIGINT AS iptal_rezervasyon,
+    COALESCE(s.oturum_sayisi, 0)::BIGINT AS toplam_oturum,
+    COALESCE(ROUND(s.verimlilik_toplami::NUMERIC / NULLIF(s.verimlilik_sayisi, 0), 2), 0) AS ortalama_verimlilik,
     k.toplam_calisma_suresi AS toplam_calisma_dakika
 FROM kullanicilar k
-LEFT JOIN rezervasyonlar r ON k.kullanici_id = r.kullanici_id
-LEFT JOIN calisma_oturumlari co ON k.kullanici_id = co.kullanici_id
-WHERE k.rol = 'ogrenci'
-GROUP BY k.kullanici_id, k.ogrenci_no, k.ad, k.soyad, k.toplam_calisma_suresi;
+LEFT JOIN kullanici_sayaclari s ON k.kullanici_id = s.kullanici_id
+WHERE k.rol = 'ogrenci';
 
 CREATE OR REPLACE VIEW v_alan_doluluk AS
 SELECT 
@@ -279,10 +1037,19 @@ JOIN alan_turleri at ON ca.tur_id = at.tur_id
 LEFT JOIN rezervasyonlar r ON ca.alan_id = r.alan_id
 GROUP BY ca.alan_id, ca.alan_adi, ca.konum, at.tur_adi, ca.kapasite, ca.aktif;
 
+DROP FUNCTION IF EXISTS fn_musait_alanlar(DATE, TIME, TIME);
+
+-- Aralıkla çakışan aktif rezervasyonlar idx_rezervasyonlar_alan_aktif üzerinden alan başına
+-- sınırlı bir baslangic_zamani aralığında aranır (rezervasyonlar en fazla 4 saat sürer).
+-- kalan_kapasite, fn_rezervasyon_kabul'ün kapasite denetimiyle aynı sayımı kullanır.
 CREATE OR REPLACE FUNCTION fn_musait_alanlar(
-    p_tarih DATE,
-    p_baslangic TIME,
-    p_bitis TIME
+    p_baslangic TIMESTAMP,
+    p_bitis TIMESTAMP,
+    p_tur VARCHAR DEFAULT NULL,
+    p_konum VARCHAR DEFAULT NULL,
+    p_arama TEXT DEFAULT NULL,
+    p_priz BOOLEAN DEFAULT NULL,
+    p_sessiz BOOLEAN DEFAULT NULL
 )
 RETURNS TABLE (
     alan_id INTEGER,
@@ -291,10 +1058,10 @@ RETURNS TABLE (
     tur_adi VARCHAR(50),
     kapasite INTEGER,
     priz_var BOOLEAN,
-    sessiz_alan BOOLEAN
+    sessiz_alan BOOLEAN,
+    dolu INTEGER,
+    kalan_kapasite INTEGER
 ) AS $$
-BEGIN
-    RETURN QUERY
     SELECT 
         ca.alan_id,
         ca.alan_adi,
@@ -302,24 +1069,29 @@ BEGIN
         at.tur_adi,
         ca.kapasite,
         ca.priz_var,
-        ca.sessiz_alan
+        ca.sessiz_alan,
+        c.sayi,
+        ca.kapasite - c.sayi
     FROM calisma_alanlari ca
     JOIN alan_turleri at ON ca.tur_id = at.tur_id
-    WHERE ca.aktif = TRUE
-    AND NOT EXISTS (
-        SELECT 1 FROM rezervasyonlar r
+    CROSS JOIN LATERAL (
+        SELECT COUNT(*)::INTEGER AS sayi
+        FROM rezervasyonlar r
         WHERE r.alan_id = ca.alan_id
         AND r.durum = 'aktif'
-        AND DATE(r.baslangic_zamani) = p_tarih
-        AND (
-            (r.baslangic_zamani::TIME <= p_baslangic AND r.bitis_zamani::TIME > p_baslangic)
-            OR (r.baslangic_zamani::TIME < p_bitis AND r.bitis_zamani::TIME >= p_bitis)
-            OR (r.baslangic_zamani::TIME >= p_baslangic AND r.bitis_zamani::TIME <= p_bitis)
-        )
-    )
+        AND r.baslangic_zamani < p_bitis
+        AND r.baslangic_zamani > p_baslangic - INTERVAL '4 hours'
+        AND r.bitis_zamani > p_baslangic
+    ) c
+    WHERE ca.aktif = TRUE
+    AND (p_tur IS NULL OR at.tur_adi = p_tur)
+    AND (p_konum IS NULL OR ca.konum = p_konum)
+    AND (p_arama IS NULL OR ca.alan_adi ILIKE '%' || p_arama || '%' OR ca.konum ILIKE '%' || p_arama || '%')
+    AND (p_priz IS NULL OR ca.priz_var = p_priz)
+    AND (p_sessiz IS NULL OR ca.sessiz_alan = p_sessiz)
+    AND c.sayi < ca.kapasite
     ORDER BY ca.konum, ca.alan_adi;
-END;
-$$ LANGUAGE plpgsql;
+$$ LANGUAGE sql STABLE;
 
 CREATE OR REPLACE FUNCTION fn_kullanici_detay(p_kullanici_id INTEGER)
 RETURNS TABLE (
@@ -344,16 +1116,14 @@ BEGIN
         k.email,
         k.rol,
         k.kayit_tarihi,
-        COUNT(DISTINCT r.rezervasyon_id),
-        COUNT(DISTINCT CASE WHEN r.durum = 'aktif' THEN r.rezervasyon_id END),
-        COUNT(DISTINCT co.oturum_id),
-        ROUND(AVG(co.verimlilik_puani), 2),
+        COALESCE(s.rez_aktif + s.rez_iptal + s.rez_tamamlandi, 0)::BIGINT,
+        COALESCE(s.rez_aktif, 0)::BIGINT,
+        COALESCE(s.oturum_sayisi, 0)::BIGINT,
+        ROUND(s.verimlilik_toplami::NUMERIC / NULLIF(s.verimlilik_sayisi, 0), 2),
         ROUND(k.toplam_calisma_suresi / 60.0, 2)
     FROM kullanicilar k
-    LEFT JOIN rezervasyonlar r ON k.kullanici_id = r.kullanici_id
-    LEFT JOIN calisma_oturumlari co ON k.kullanici_id = co.kullanici_id
-    WHERE k.kullanici_id = p_kullanici_id
-    GROUP BY k.kullanici_id, k.ogrenci_no, k.ad, k.soyad, k.email, k.rol, k.kayit_tarihi, k.toplam_calisma_suresi;
+    LEFT JOIN kullanici_sayaclari s ON k.kullanici_id = s.kullanici_id
+    WHERE k.kullanici_id = p_kullanici_id;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -363,54 +1133,150 @@ RETURNS TABLE (
     rezervasyon_sayisi BIGINT,
     yogunluk_seviyesi TEXT
 ) AS $$
+    WITH saatlik AS (
+        SELECT saat, SUM(sayi)::BIGINT AS sayi
+        FROM ozet_rezervasyon_saatlik
+        WHERE tarih >= CURRENT_DATE - p_gun_sayisi
+        GROUP BY saat
+        HAVING SUM(sayi) > 0
+    )
+    SELECT LPAD(saat::TEXT, 2, '0') || ':00-' || LPAD(((saat + 1) % 24)::TEXT, 2, '0') || ':00',
+           sayi,
+           CASE WHEN sayi >= MAX(sayi) OVER () * 0.7 THEN 'YOĞUN'
+                WHEN sayi >= MAX(sayi) OVER () * 0.4 THEN 'ORTA'
+                ELSE 'DÜŞÜK'
+           END
+    FROM saatlik
+    ORDER BY saat;
+$$ LANGUAGE sql STABLE;
+
+-- [p_ilk, p_son] günlerinde alan ve saat başına dolu koltuk-saat (iptal edilmemiş rezervasyonlar).
+CREATE OR REPLACE FUNCTION fn_talep_gunluk(p_ilk DATE, p_son DATE)
+RETURNS TABLE (
+    tarih DATE,
+    alan_id INTEGER,
+    saat SMALLINT,
+    sayi INTEGER
+) AS $$
+    SELECT s::DATE, r.alan_id, EXTRACT(HOUR FROM s)::SMALLINT, COUNT(*)::INTEGER
+    FROM rezervasyonlar r
+    CROSS JOIN LATERAL generate_series(
+        date_trunc('hour', GREATEST(r.baslangic_zamani, p_ilk::TIMESTAMP)),
+        LEAST(r.bitis_zamani, (p_son + 1)::TIMESTAMP) - INTERVAL '1 microsecond',
+        INTERVAL '1 hour'
+    ) s
+    WHERE r.durum <> 'iptal'
+    AND r.baslangic_zamani < (p_son + 1)::TIMESTAMP
+    AND r.baslangic_zamani > p_ilk - INTERVAL '4 hours'
+    AND r.bitis_zamani > p_ilk::TIMESTAMP
+    GROUP BY 1, 2, 3;
+$$ LANGUAGE sql STABLE;
+
+-- Modeli dünden geriye p_gun_sayisi günün verisiyle baştan kurar. Artımlı güncellemeyle aynı
+-- sonucu verir: D gününün katkısı sonum ^ (D'den sonra geçen tam hafta sayısı) ile çarpılır.
+CREATE OR REPLACE FUNCTION fn_talep_modeli_yeniden_olustur(
+    p_gun_sayisi INTEGER DEFAULT 84,
+    p_sonum DOUBLE PRECISION DEFAULT NULL
+)
+RETURNS INTEGER AS $$
 DECLARE
-    saat_cursor CURSOR FOR
-        SELECT 
-            TO_CHAR(baslangic_zamani, 'HH24:00') || '-' || TO_CHAR(baslangic_zamani + INTERVAL '1 hour', 'HH24:00') AS dilim,
-            COUNT(*) AS sayi
-        FROM rezervasyonlar
-        WHERE baslangic_zamani >= CURRENT_DATE - (p_gun_sayisi || ' days')::INTERVAL
-        GROUP BY TO_CHAR(baslangic_zamani, 'HH24:00'), TO_CHAR(baslangic_zamani + INTERVAL '1 hour', 'HH24:00')
-        ORDER BY TO_CHAR(baslangic_zamani, 'HH24:00');
-    saat_kayit RECORD;
-    max_sayi BIGINT;
+    v_son DATE := CURRENT_DATE - 1;
+    v_sonum DOUBLE PRECISION;
 BEGIN
-    SELECT MAX(cnt) INTO max_sayi
-    FROM (
-        SELECT COUNT(*) as cnt
-        FROM rezervasyonlar
-        WHERE baslangic_zamani >= CURRENT_DATE - (p_gun_sayisi || ' days')::INTERVAL
-        GROUP BY TO_CHAR(baslangic_zamani, 'HH24:00')
-    ) subq;
-
-    IF max_sayi IS NULL THEN
-        max_sayi := 1;
+    UPDATE talep_modeli_durum SET sonum = COALESCE(p_sonum, sonum) RETURNING sonum INTO v_sonum;
+
+    -- TRUNCATE yerine DELETE: okuyanlar işlem bitene kadar eski modeli görmeye devam eder
+    DELETE FROM talep_modeli;
+    DELETE FROM talep_modeli_kampus;
+
+    INSERT INTO talep_modeli (alan_id, haftagunu, saat, agirlik)
+    SELECT g.alan_id, EXTRACT(ISODOW FROM g.tarih)::SMALLINT, g.saat,
+           SUM(g.sayi * power(v_sonum, (v_son - g.tarih) / 7))
+    FROM fn_talep_gunluk(v_son - p_gun_sayisi + 1, v_son) g
+    GROUP BY 1, 2, 3;
+
+    INSERT INTO talep_modeli_kampus (haftagunu, saat, agirlik)
+    SELECT haftagunu, saat, SUM(agirlik)
+    FROM talep_modeli
+    GROUP BY 1, 2;
+
+    UPDATE talep_modeli_durum SET islenen_gun = v_son, guncelleme = CURRENT_TIMESTAMP;
+    RETURN p_gun_sayisi;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Son işlenen günden düne kadar kapanan günleri sırayla modele katar; işlenen gün sayısını döndürür.
+-- Her gün yalnızca kendi haftagününün satırlarını sönümler. Model hiç kurulmamışsa baştan kurulur.
+CREATE OR REPLACE FUNCTION fn_talep_modeli_guncelle()
+RETURNS INTEGER AS $$
+DECLARE
+    v_durum talep_modeli_durum%ROWTYPE;
+    v_gun DATE;
+    v_islenen INTEGER := 0;
+BEGIN
+    -- Eşzamanlı çalıştırmalar bu satırda sıraya girer; bir gün iki kez işlenmez.
+    SELECT * INTO v_durum FROM talep_modeli_durum FOR UPDATE;
+    IF v_durum.islenen_gun IS NULL THEN
+        RETURN fn_talep_modeli_yeniden_olustur();
     END IF;
 
-    OPEN saat_cursor;
-    LOOP
-        FETCH saat_cursor INTO saat_kayit;
-        EXIT WHEN NOT FOUND;
-        
-        saat_dilimi := saat_kayit.dilim;
-        rezervasyon_sayisi :=	 saat_kayit.sayi;
-        
-        IF saat_kayit.sayi >= max_sayi * 0.7 THEN
-            yogunluk_seviyesi := 'YOĞUN';
-        ELSIF saat_kayit.sayi >= max_sayi * 0.4 THEN
-            yogunluk_seviyesi := 'ORTA';
-        ELSE
-            yogunluk_seviyesi := 'DÜŞÜK';
-        END IF;
-        
-        RETURN NEXT;
+    v_gun := v_durum.islenen_gun + 1;
+    WHILE v_gun < CURRENT_DATE LOOP
+        UPDATE talep_modeli SET agirlik = agirlik * v_durum.sonum
+        WHERE haftagunu = EXTRACT(ISODOW FROM v_gun);
+        UPDATE talep_modeli_kampus SET agirlik = agirlik * v_durum.sonum
+        WHERE haftagunu = EXTRACT(ISODOW FROM v_gun);
+
+        WITH g AS (
+            SELECT * FROM fn_talep_gunluk(v_gun, v_gun)
+        ),
+        alan AS (
+            INSERT INTO talep_modeli AS t (alan_id, haftagunu, saat, agirlik)
+            SELECT g.alan_id, EXTRACT(ISODOW FROM v_gun)::SMALLINT, g.saat, g.sayi
+            FROM g
+            ON CONFLICT (alan_id, haftagunu, saat) DO UPDATE SET agirlik = t.agirlik + EXCLUDED.agirlik
+        )
+        INSERT INTO talep_modeli_kampus AS t (haftagunu, saat, agirlik)
+        SELECT EXTRACT(ISODOW FROM v_gun)::SMALLINT, g.saat, SUM(g.sayi)
+        FROM g
+        GROUP BY g.saat
+        ON CONFLICT (haftagunu, saat) DO UPDATE SET agirlik = t.agirlik + EXCLUDED.agirlik;
+
+        v_gun := v_gun + 1;
+        v_islenen := v_islenen + 1;
     END LOOP;
-    CLOSE saat_cursor;
-    
-    RETURN;
+
+    UPDATE talep_modeli_durum SET islenen_gun = v_gun - 1, guncelleme = CURRENT_TIMESTAMP;
+    RETURN v_islenen;
 END;
 $$ LANGUAGE plpgsql;
 
+-- Kampüs modelinden saat başına haftalık dolu koltuk-saat ve yoğunluk bandı; en fazla 168 satır okur.
+CREATE OR REPLACE FUNCTION fn_yogunluk_bantlari()
+RETURNS TABLE (
+    saat_dilimi TEXT,
+    haftalik_doluluk NUMERIC,
+    yogunluk_seviyesi TEXT
+) AS $$
+    WITH saatlik AS (
+        SELECT k.saat, SUM(k.agirlik) * (1 - d.sonum) AS doluluk
+        FROM talep_modeli_kampus k
+        CROSS JOIN talep_modeli_durum d
+        GROUP BY k.saat, d.sonum
+        HAVING SUM(k.agirlik) > 0
+    )
+    SELECT LPAD(saat::TEXT, 2, '0') || ':00-' || LPAD(((saat + 1) % 24)::TEXT, 2, '0') || ':00',
+           ROUND(doluluk::NUMERIC, 1),
+           CASE WHEN doluluk >= MAX(doluluk) OVER () * 0.7 THEN 'YOĞUN'
+                WHEN doluluk >= MAX(doluluk) OVER () * 0.4 THEN 'ORTA'
+                ELSE 'DÜŞÜK'
+           END
+    FROM saatlik
+    ORDER BY saat;
+$$ LANGUAGE sql STABLE;
+
+SELECT fn_talep_modeli_yeniden_olustur();
+
 CREATE OR REPLACE VIEW v_aktif_ogrenciler AS
 SELECT DISTINCT k.kullanici_id, k.ogrenci_no, k.ad, k.soyad, 'Rezervasyon' AS aktivite_tipi
 FROM kullanicilar k
@@ -475,6 +1341,8 @@ GRANT UPDATE (durum, notlar) ON rezervasyonlar TO studyflow_ogrenci;
 GRANT SELECT, INSERT ON calisma_oturumlari TO studyflow_ogrenci;
 GRANT UPDATE (cikis_zamani, verimlilik_puani, notlar) ON calisma_oturumlari TO studyflow_ogrenci;
 GRANT SELECT ON log_kayitlari TO studyflow_ogrenci;
+GRANT SELECT, INSERT, UPDATE ON ozet_rezervasyon_saatlik, ozet_oturum_gunluk, ozet_alan_toplam, kullanici_sayaclari TO studyflow_ogrenci;
+GRANT SELECT ON talep_modeli, talep_modeli_kampus, talep_modeli_durum TO studyflow_ogrenci;
 
 GRANT SELECT ON v_aktif_rezervasyonlar TO studyflow_ogrenci;
 GRANT SELECT ON v_kullanici_istatistikleri TO studyflow_ogrenci;
@@ -487,82 +1355,252 @@ GRANT SELECT ON v_tam_katilimci TO studyflow_ogrenci;
 GRANT USAGE ON SEQUENCE rezervasyon_seq TO studyflow_ogrenci;
 GRANT USAGE ON SEQUENCE oturum_seq TO studyflow_ogrenci;
 
-GRANT EXECUTE ON FUNCTION fn_musait_alanlar(DATE, TIME, TIME) TO studyflow_ogrenci;
+GRANT EXECUTE ON FUNCTION fn_musait_alanlar(TIMESTAMP, TIMESTAMP, VARCHAR, VARCHAR, TEXT, BOOLEAN, BOOLEAN) TO studyflow_ogrenci;
 GRANT EXECUTE ON FUNCTION fn_kullanici_detay(INTEGER) TO studyflow_ogrenci;
 GRANT EXECUTE ON FUNCTION fn_yogunluk_analizi(INTEGER) TO studyflow_ogrenci;
+GRANT EXECUTE ON FUNCTION fn_yogunluk_bantlari() TO studyflow_ogrenci;
 
-CREATE OR REPLACE FUNCTION fn_uygun_zaman_onerisi(
+DROP FUNCTION IF EXISTS fn_uygun_zaman_onerisi(INTEGER, DATE, INTEGER);
+
+CREATE OR REPLACE FUNCTION fn_rezervasyon_kabul(
+    p_kullanici_id INTEGER,
     p_alan_id INTEGER,
-    p_tarih DATE,
-    p_sure_saat INTEGER DEFAULT 2
+    p_baslangic TIMESTAMP,
+    p_bitis TIMESTAMP,
+    p_notlar TEXT DEFAULT NULL
 )
 RETURNS TABLE (
-    oneri_baslangic TIME,
-    oneri_bitis TIME,
-    yogunluk TEXT
+    sonuc TEXT,
+    yeni_rezervasyon_id INTEGER,
+    alan_kapasitesi INTEGER,
+    mevcut_rezervasyon INTEGER,
+    cakisan_alan_adi VARCHAR(100),
+    cakisan_baslangic TIMESTAMP,
+    cakisan_bitis TIMESTAMP
 ) AS $$
 DECLARE
-    saat_cursor CURSOR FOR
-        WITH saatler AS (
-            SELECT (generate_series(
-                p_tarih + '08:00'::TIME,
-                p_tarih + '20:00'::TIME,
-                '1 hour'::INTERVAL
-            ))::TIME AS saat
-        ),
-        dolu_saatler AS (
-            SELECT DISTINCT baslangic_zamani::TIME AS dolu_saat
-            FROM rezervasyonlar
-            WHERE alan_id = p_alan_id
-            AND DATE(baslangic_zamani) = p_tarih
-            AND durum = 'aktif'
-            UNION
-            SELECT DISTINCT (baslangic_zamani + INTERVAL '1 hour')::TIME
-            FROM rezervasyonlar
-            WHERE alan_id = p_alan_id
-            AND DATE(baslangic_zamani) = p_tarih
-            AND durum = 'aktif'
-            AND bitis_zamani - baslangic_zamani > INTERVAL '1 hour'
-        )
-        SELECT s.saat
-        FROM saatler s
-        WHERE NOT EXISTS (
-            SELECT 1 FROM dolu_saatler d WHERE d.dolu_saat = s.saat
-        )
-        AND s.saat + (p_sure_saat || ' hours')::INTERVAL <= '22:00'::TIME
-        ORDER BY s.saat;
-    
-    saat_kayit RECORD;
-    toplam_rez INTEGER;
+    v_cakisan RECORD;
 BEGIN
-    SELECT COUNT(*) INTO toplam_rez
-    FROM rezervasyonlar
-    WHERE DATE(baslangic_zamani) = p_tarih AND durum = 'aktif';
-    
-    OPEN saat_cursor;
-    LOOP
-        FETCH saat_cursor INTO saat_kayit;
-        EXIT WHEN NOT FOUND;
-        
-        oneri_baslangic := saat_kayit.saat;
-        oneri_bitis := saat_kayit.saat + (p_sure_saat || ' hours')::INTERVAL;
-        
-        IF EXTRACT(HOUR FROM saat_kayit.saat) BETWEEN 10 AND 14 THEN
-            yogunluk := 'YOĞUN SAAT';
-        ELSIF EXTRACT(HOUR FROM saat_kayit.saat) BETWEEN 15 AND 18 THEN
-            yogunluk := 'ORTA YOĞUNLUK';
-        ELSE
-            yogunluk := 'SAKİN';
-        END IF;
-        
+    IF p_bitis <= p_baslangic THEN
+        sonuc := 'GECERSIZ_ARALIK';
+        RETURN NEXT;
+        RETURN;
+    END IF;
+
+    IF p_bitis - p_baslangic > INTERVAL '4 hours' THEN
+        sonuc := 'SURE_ASIMI';
         RETURN NEXT;
+        RETURN;
+    END IF;
+
+    -- Önce kullanıcı, sonra alan kilitlenir; sıra sabit olduğu için kilitlenme oluşmaz.
+    -- Kilitler işlem sonuna kadar tutulur, bu yüzden kontrol ile INSERT arasında
+    -- aynı alana ya da aynı kullanıcıya başka bir kayıt giremez.
+    PERFORM pg_advisory_xact_lock(1, p_kullanici_id);
+    PERFORM pg_advisory_xact_lock(2, p_alan_id);
+
+    SELECT ca.kapasite INTO alan_kapasitesi
+    FROM calisma_alanlari ca
+    WHERE ca.alan_id = p_alan_id AND ca.aktif = TRUE;
+
+    IF NOT FOUND THEN
+        sonuc := 'ALAN_YOK';
+        RETURN NEXT;
+        RETURN;
+    END IF;
+
+    SELECT ca.alan_adi, r.baslangic_zamani, r.bitis_zamani INTO v_cakisan
+    FROM rezervasyonlar r
+    JOIN calisma_alanlari ca ON r.alan_id = ca.alan_id
+    WHERE r.kullanici_id = p_kullanici_id
+    AND r.durum = 'aktif'
+    AND r.baslangic_zamani < p_bitis
+    AND r.baslangic_zamani > p_baslangic - INTERVAL '4 hours'
+    AND r.bitis_zamani > p_baslangic
+    LIMIT 1;
+
+    IF FOUND THEN
+        sonuc := 'KULLANICI_CAKISMA';
+        cakisan_alan_adi := v_cakisan.alan_adi;
+        cakisan_baslangic := v_cakisan.baslangic_zamani;
+        cakisan_bitis := v_cakisan.bitis_zamani;
+        RETURN NEXT;
+        RETURN;
+    END IF;
+
+    SELECT COUNT(*) INTO mevcut_rezervasyon
+    FROM rezervasyonlar r
+    WHERE r.alan_id = p_alan_id
+    AND r.durum = 'aktif'
+    AND r.baslangic_zamani < p_bitis
+    AND r.baslangic_zamani > p_baslangic - INTERVAL '4 hours'
+    AND r.bitis_zamani > p_baslangic;
+
+    IF mevcut_rezervasyon >= alan_kapasitesi THEN
+        sonuc := 'KAPASITE_DOLU';
+        RETURN NEXT;
+        RETURN;
+    END IF;
+
+    INSERT INTO rezervasyonlar (kullanici_id, alan_id, baslangic_zamani, bitis_zamani, notlar)
+    VALUES (p_kullanici_id, p_alan_id, p_baslangic, p_bitis, p_notlar)
+    RETURNING rezervasyonlar.rezervasyon_id INTO yeni_rezervasyon_id;
+
+    sonuc := 'KABUL';
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION fn_rezervasyon_kabul(INTEGER, INTEGER, TIMESTAMP, TIMESTAMP, TEXT) TO studyflow_ogrenci;
+
+CREATE OR REPLACE FUNCTION fn_toplu_rezervasyon(
+    p_kullanici_id INTEGER,
+    p_talepler JSONB
+)
+RETURNS TABLE (
+    sira INTEGER,
+    talep_alan_id INTEGER,
+    talep_baslangic TIMESTAMP,
+    talep_bitis TIMESTAMP,
+    sonuc TEXT,
+    yeni_rezervasyon_id INTEGER
+) AS $$
+#variable_conflict use_column
+DECLARE
+    v_alan_id INTEGER;
+BEGIN
+    -- fn_rezervasyon_kabul ile aynı kilit sırası: kullanıcı, ardından artan alan_id
+    PERFORM pg_advisory_xact_lock(1, p_kullanici_id);
+    FOR v_alan_id IN
+        SELECT DISTINCT (t->>'alan_id')::INTEGER FROM jsonb_array_elements(p_talepler) t ORDER BY 1
+    LOOP
+        PERFORM pg_advisory_xact_lock(2, v_alan_id);
     END LOOP;
-    CLOSE saat_cursor;
-    
-    RETURN;
+
+    -- Talepler önce mevcut kayıtlara göre denetlenir, sonra sira düzeninde karara bağlanır: aynı
+    -- talepte kendinden önce KABUL edilmiş bir tekrarla çakışan tekrar TOPLU_CAKISMA ile reddedilir.
+    -- Böylece kabul edilenler birbiriyle çakışmaz ve kapasite yalnızca mevcut kayıtlara göre denetlenir.
+    RETURN QUERY
+    WITH RECURSIVE talep AS (
+        SELECT t.sira::INTEGER AS sira,
+               (t.deger->>'alan_id')::INTEGER AS alan_id,
+               (t.deger->>'baslangic')::TIMESTAMP AS baslangic,
+               (t.deger->>'bitis')::TIMESTAMP AS bitis,
+               t.deger->>'notlar' AS notlar
+        FROM jsonb_array_elements(p_talepler) WITH ORDINALITY AS t(deger, sira)
+    ),
+    on_karar AS MATERIALIZED (
+        SELECT t.sira, t.alan_id, t.baslangic, t.bitis, t.notlar,
+               CASE
+                   WHEN t.bitis <= t.baslangic THEN 'GECERSIZ_ARALIK'
+                   WHEN t.bitis - t.baslangic > INTERVAL '4 hours' THEN 'SURE_ASIMI'
+                   WHEN ca.alan_id IS NULL THEN 'ALAN_YOK'
+                   WHEN EXISTS (
+                       SELECT 1 FROM rezervasyonlar r
+                       WHERE r.kullanici_id = p_kullanici_id
+                       AND r.durum = 'aktif'
+                       AND r.baslangic_zamani < t.bitis
+                       AND r.baslangic_zamani > t.baslangic - INTERVAL '4 hours'
+                       AND r.bitis_zamani > t.baslangic
+                   ) THEN 'KULLANICI_CAKISMA'
+                   WHEN (
+                       SELECT COUNT(*) FROM rezervasyonlar r
+                       WHERE r.alan_id = t.alan_id
+                       AND r.durum = 'aktif'
+                       AND r.baslangic_zamani < t.bitis
+                       AND r.baslangic_zamani > t.baslangic - INTERVAL '4 hours'
+                       AND r.bitis_zamani > t.baslangic
+                   ) >= ca.kapasite THEN 'KAPASITE_DOLU'
+                   ELSE 'KABUL'
+               END AS sonuc
+        FROM talep t
+        LEFT JOIN calisma_alanlari ca ON ca.alan_id = t.alan_id AND ca.aktif = TRUE
+    ),
+    karar AS (
+        SELECT 0 AS sira, NULL::INTEGER AS alan_id, NULL::TIMESTAMP AS baslangic,
+               NULL::TIMESTAMP AS bitis, NULL::TEXT AS notlar, NULL::TEXT AS sonuc,
+               ARRAY[]::TSRANGE[] AS kabul_edilen
+        UNION ALL
+        SELECT o.sira, o.alan_id, o.baslangic, o.bitis, o.notlar, s.sonuc,
+               CASE WHEN s.sonuc = 'KABUL'
+                    THEN k.kabul_edilen || tsrange(o.baslangic, o.bitis)
+                    ELSE k.kabul_edilen END
+        FROM karar k
+        JOIN on_karar o ON o.sira = k.sira + 1
+        CROSS JOIN LATERAL (
+            SELECT CASE
+                       WHEN o.sonuc <> 'KABUL' THEN o.sonuc
+                       WHEN tsrange(o.baslangic, o.bitis) && ANY (k.kabul_edilen) THEN 'TOPLU_CAKISMA'
+                       ELSE 'KABUL'
+                   END AS sonuc
+        ) s
+    ),
+    eklenen AS (
+        INSERT INTO rezervasyonlar (kullanici_id, alan_id, baslangic_zamani, bitis_zamani, notlar)
+        SELECT p_kullanici_id, k.alan_id, k.baslangic, k.bitis, k.notlar
+        FROM karar k
+        WHERE k.sonuc = 'KABUL'
+        ORDER BY k.sira
+        RETURNING rezervasyonlar.rezervasyon_id, rezervasyonlar.alan_id, rezervasyonlar.baslangic_zamani
+    )
+    SELECT k.sira, k.alan_id, k.baslangic, k.bitis, k.sonuc, e.rezervasyon_id
+    FROM karar k
+    LEFT JOIN eklenen e
+      ON k.sonuc = 'KABUL'
+     AND e.alan_id = k.alan_id
+     AND e.baslangic_zamani = k.baslangic
+    WHERE k.sira > 0
+    ORDER BY k.sira;
 END;
 $$ LANGUAGE plpgsql;
 
-GRANT EXECUTE ON FUNCTION fn_uygun_zaman_onerisi(INTEGER, DATE, INTEGER) TO studyflow_ogrenci;
+GRANT EXECUTE ON FUNCTION fn_toplu_rezervasyon(INTEGER, JSONB) TO studyflow_ogrenci;
+
+-- Süresi geçmiş aktif rezervasyonları en fazla p_parti satırlık tek bir partide kapatır:
+-- başlangıçtan p_tolerans sonra hâlâ giriş yapılmamış olanlar 'iptal' edilip yeri bırakılır,
+-- girişi olup bitiş zamanı geçenler 'tamamlandi' olur. Giriş; aynı kullanıcının aynı alanda
+-- başlangıçtan p_tolerans önce ile bitiş arasında açtığı çalışma oturumudur.
+-- Satırlar SKIP LOCKED ile seçildiğinden birden fazla süpürücü aynı anda çalışabilir; kullanıcının
+-- o an düzenlediği rezervasyon bir sonraki çalışmaya kalır.
+CREATE OR REPLACE FUNCTION fn_rezervasyon_supur(
+    p_parti INTEGER DEFAULT 500,
+    p_tolerans INTERVAL DEFAULT INTERVAL '15 minutes'
+)
+RETURNS TABLE(tamamlanan INTEGER, birakilan INTEGER) AS $$
+    WITH secilen AS (
+        SELECT r.rezervasyon_id, r.baslangic_zamani,
+               CASE WHEN g.giris_var THEN 'tamamlandi' ELSE 'iptal' END AS yeni_durum
+        FROM rezervasyonlar r
+        CROSS JOIN LATERAL (
+            SELECT EXISTS (
+                SELECT 1 FROM calisma_oturumlari co
+                WHERE co.kullanici_id = r.kullanici_id
+                AND co.alan_id = r.alan_id
+                AND co.giris_zamani >= r.baslangic_zamani - p_tolerans
+                AND co.giris_zamani < r.bitis_zamani
+            ) AS giris_var
+        ) g
+        WHERE r.durum = 'aktif'
+        AND r.baslangic_zamani <= NOW() - p_tolerans
+        AND (NOT g.giris_var OR r.bitis_zamani <= NOW())
+        ORDER BY r.baslangic_zamani
+        LIMIT p_parti
+        FOR UPDATE OF r SKIP LOCKED
+    ),
+    guncellenen AS (
+        UPDATE rezervasyonlar r
+        SET durum = s.yeni_durum,
+            notlar = CASE WHEN s.yeni_durum = 'iptal'
+                          THEN concat_ws(' ', r.notlar, '[gelmedi]')
+                          ELSE r.notlar END
+        FROM secilen s
+        WHERE r.rezervasyon_id = s.rezervasyon_id
+        AND r.baslangic_zamani = s.baslangic_zamani
+        RETURNING r.durum
+    )
+    SELECT (COUNT(*) FILTER (WHERE durum = 'tamamlandi'))::INTEGER,
+           (COUNT(*) FILTER (WHERE durum = 'iptal'))::INTEGER
+    FROM guncellenen;
+$$ LANGUAGE sql;
 
 COMMIT;
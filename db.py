@@ -0,0 +1,375 @@
+import os
+import select
+import threading
+import time
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+
+from metrics import InstrumentedCursor
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'database': os.getenv('DB_NAME', 'studyflow'),
+    'user': os.getenv('DB_USER', 'ataturetken'),
+    'password': os.getenv('DB_PASSWORD', ''),
+    'port': os.getenv('DB_PORT', '5432')
+}
+
+# Havuz boyutu gunicorn worker başına uygulanır: toplam bağlantı = workers * DB_POOL_MAX
+POOL_MIN = int(os.getenv('DB_POOL_MIN', '1'))
+POOL_MAX = int(os.getenv('DB_POOL_MAX', '5'))
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+
+# Salt okunur rotalar için akış replikasyonlu okuma kopyası; boşsa tüm sorgular birincil sunucuya gider
+REPLICA_DSN = os.getenv('DB_REPLICA_DSN') or None
+REPLICA_POOL_MAX = int(os.getenv('DB_REPLICA_POOL_MAX', str(POOL_MAX)))
+# kopya havuzu doluysa uzun beklemek yerine birincil sunucuya dönülür
+REPLICA_POOL_TIMEOUT = float(os.getenv('DB_REPLICA_POOL_TIMEOUT', '1'))
+REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', '5'))
+REPLICA_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_CHECK_INTERVAL', '2'))
+
+
+class PoolTimeout(PoolError):
+    pass
+
+
+class ConnectionPool:
+    """psycopg2 ThreadedConnectionPool etrafında bekleme kuyruğu ve istatistik tutan sarmalayıcı.
+
+    ThreadedConnectionPool dolduğunda hemen PoolError fırlatır; burada bir semafor ile
+    POOL_TIMEOUT süresince boş bağlantı beklenir.
+    """
+
+    def __init__(self, minconn, maxconn, timeout, **kwargs):
+        self._pool = ThreadedConnectionPool(minconn, maxconn, **kwargs)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.in_use = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def getconn(self):
+        start = time.perf_counter()
+        with self._lock:
+            self.waiting += 1
+        acquired = self._slots.acquire(timeout=self.timeout)
+        with self._lock:
+            self.waiting -= 1
+        if not acquired:
+            with self._lock:
+                self.timeouts += 1
+            raise PoolTimeout(f'{self.timeout} saniye içinde boş veritabanı bağlantısı bulunamadı')
+
+        try:
+            conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.in_use += 1
+            self.checkouts += 1
+            self.wait_total += elapsed
+            self.wait_max = max(self.wait_max, elapsed)
+        return conn
+
+    def putconn(self, conn):
+        # Kapalı ya da durumu bilinmeyen bağlantılar havuza geri konmaz;
+        # açık kalan işlemler ThreadedConnectionPool tarafından rollback edilir.
+        close = bool(conn.closed) or conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+        try:
+            self._pool.putconn(conn, close=close)
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def closeall(self):
+        self._pool.closeall()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'min': self.minconn,
+                'max': self.maxconn,
+                'in_use': self.in_use,
+                'idle': len(self._pool._pool),
+                'waiting': self.waiting,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'checkout_ms_avg': round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'checkout_ms_max': round(self.wait_max * 1000, 3),
+            }
+
+
+def enable_gevent_wait():
+    """psycopg2'nin soket beklemelerini gevent'e devreder; sorgu süren bir istek worker'daki
+    diğer greenlet'leri bloklamaz. Bağlantılar açılmadan önce çağrılmalıdır (bkz. gunicorn.conf.py).
+    Bu modda psycopg2 COPY komutlarını desteklemez.
+    """
+    from gevent.socket import wait_read, wait_write
+
+    def wait(conn, timeout=None):
+        while True:
+            state = conn.poll()
+            if state == psycopg2.extensions.POLL_OK:
+                break
+            if state == psycopg2.extensions.POLL_READ:
+                wait_read(conn.fileno(), timeout=timeout)
+            elif state == psycopg2.extensions.POLL_WRITE:
+                wait_write(conn.fileno(), timeout=timeout)
+            else:
+                raise psycopg2.OperationalError(f'poll() beklenmeyen durum döndürdü: {state}')
+
+    psycopg2.extensions.set_wait_callback(wait)
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    # Havuz fork sonrasında her süreçte ayrı oluşturulur; ebeveynden kalan soketler paylaşılmaz.
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ConnectionPool(POOL_MIN, POOL_MAX, POOL_TIMEOUT,
+                                       cursor_factory=InstrumentedCursor, **DB_CONFIG)
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def lsn_to_int(lsn):
+    hi, lo = lsn.split('/')
+    return (int(hi, 16) << 32) | int(lo, 16)
+
+
+class ReplicaRouter:
+    """Salt okunur sorguların okuma kopyasına gidip gidemeyeceğine karar verir.
+
+    Kopyanın durumu en fazla check_interval saniyede bir ölçülür. Kopya erişilemiyorsa,
+    birincil sunucudan WAL almıyorsa, gecikmesi max_lag saniyeyi aşıyorsa ya da istenen
+    WAL konumunu (kullanıcının son yazması) henüz oynatmadıysa getconn None döndürür ve
+    çağıran birincil bağlantıyı kullanır.
+    """
+
+    def __init__(self, pool, max_lag, check_interval):
+        self.pool = pool
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked = None
+        self.healthy = False
+        self.lag = None
+        self.replay_lsn = 0
+        self.routed = 0
+        self.fallback_down = 0
+        self.fallback_lag = 0
+        self.fallback_own_write = 0
+
+    def _check(self):
+        now = time.monotonic()
+        if self._checked is not None and now - self._checked < self.check_interval:
+            return
+        # ölçümü tek bir iş parçacığı yapar; diğerleri bir önceki sonucu kullanır
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._checked = now
+            conn = None
+            try:
+                conn = self.pool.getconn()
+                cur = conn.cursor()
+                # kopya aldığı her şeyi oynattıysa gecikme yoktur; birincil boşta olsa da son işlem zamanı eskir
+                cur.execute("""
+                    SELECT pg_is_in_recovery() AS kopya,
+                           EXISTS (SELECT 1 FROM pg_stat_wal_receiver) AS akis,
+                           pg_last_wal_replay_lsn()::TEXT AS konum,
+                           CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                                ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+                           END AS gecikme
+                """)
+                durum = cur.fetchone()
+                cur.close()
+                conn.rollback()
+                self.healthy = bool(durum['kopya'] and durum['akis'] and durum['konum'])
+                self.lag = float(durum['gecikme']) if durum['gecikme'] is not None else None
+                if durum['konum']:
+                    self.replay_lsn = lsn_to_int(durum['konum'])
+            except PoolTimeout:
+                pass
+            except (psycopg2.Error, PoolError):
+                self.healthy = False
+                self.lag = None
+            finally:
+                if conn is not None:
+                    self.pool.putconn(conn)
+        finally:
+            self._lock.release()
+
+    def getconn(self, min_lsn=0):
+        self._check()
+        if not self.healthy:
+            self.fallback_down += 1
+            return None
+        if self.lag is None or self.lag > self.max_lag:
+            self.fallback_lag += 1
+            return None
+        if min_lsn > self.replay_lsn:
+            self.fallback_own_write += 1
+            return None
+        try:
+            conn = self.pool.getconn()
+        except PoolTimeout:
+            self.fallback_down += 1
+            return None
+        except (psycopg2.Error, PoolError):
+            self.healthy = False
+            self.fallback_down += 1
+            return None
+        self.routed += 1
+        return conn
+
+    def putconn(self, conn):
+        self.pool.putconn(conn)
+
+    def stats(self):
+        return {
+            'healthy': self.healthy,
+            'lag_s': round(self.lag, 3) if self.lag is not None else None,
+            'max_lag_s': self.max_lag,
+            'routed': self.routed,
+            'fallback_down': self.fallback_down,
+            'fallback_lag': self.fallback_lag,
+            'fallback_own_write': self.fallback_own_write,
+            'pool': self.pool.stats(),
+        }
+
+
+_replica = None
+_replica_pid = None
+
+
+def get_replica():
+    """Süreç başına okuma kopyası yönlendiricisini döndürür; DB_REPLICA_DSN tanımlı değilse None."""
+    global _replica, _replica_pid
+    if REPLICA_DSN is None:
+        return None
+    if _replica is None or _replica_pid != os.getpid():
+        with _pool_lock:
+            if _replica is None or _replica_pid != os.getpid():
+                # minconn 0: kopya kapalıyken de uygulama açılabilir
+                pool = ConnectionPool(0, REPLICA_POOL_MAX, REPLICA_POOL_TIMEOUT, dsn=REPLICA_DSN,
+                                      connect_timeout=2, cursor_factory=InstrumentedCursor)
+                _replica = ReplicaRouter(pool, REPLICA_MAX_LAG, REPLICA_CHECK_INTERVAL)
+                _replica_pid = os.getpid()
+    return _replica
+
+
+class NotifyListener:
+    """Süreç başına tek bir LISTEN bağlantısı açıp gelen NOTIFY mesajlarını kayıtlı fonksiyonlara dağıtır.
+
+    Bağlantı koptuğunda yeniden bağlanır ve aradaki bildirimler kaçırılmış olabileceği için
+    on_reconnect ile kaydedilen fonksiyonları çağırır.
+    """
+
+    def __init__(self, poll_interval=5.0, reconnect_delay=5.0):
+        self.poll_interval = poll_interval
+        self.reconnect_delay = reconnect_delay
+        self._handlers = {}
+        self._reconnect_handlers = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self.connected = False
+        self.received = 0
+        self.reconnects = 0
+
+    def subscribe(self, channel, callback):
+        with self._lock:
+            self._handlers.setdefault(channel, []).append(callback)
+
+    def on_reconnect(self, callback):
+        with self._lock:
+            self._reconnect_handlers.append(callback)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='notify-listener', daemon=True)
+            self._thread.start()
+
+    def _dispatch(self, channel, payload):
+        for callback in list(self._handlers.get(channel, ())):
+            try:
+                callback(channel, payload)
+            except Exception:
+                pass
+
+    def _run(self):
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(**DB_CONFIG)
+                conn.autocommit = True
+                cur = conn.cursor()
+                listening = set()
+                self.connected = True
+                for callback in list(self._reconnect_handlers):
+                    callback()
+                while True:
+                    for channel in set(self._handlers) - listening:
+                        cur.execute(f'LISTEN {channel}')
+                        listening.add(channel)
+                    if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        self.received += 1
+                        self._dispatch(notify.channel, notify.payload)
+            except psycopg2.Error:
+                self.connected = False
+                self.reconnects += 1
+                if conn is not None and not conn.closed:
+                    conn.close()
+                time.sleep(self.reconnect_delay)
+
+    def stats(self):
+        return {
+            'connected': self.connected,
+            'channels': sorted(self._handlers),
+            'received': self.received,
+            'reconnects': self.reconnects,
+        }
+
+
+_listener = None
+_listener_pid = None
+
+
+def get_listener():
+    global _listener, _listener_pid
+    if _listener is None or _listener_pid != os.getpid():
+        with _pool_lock:
+            if _listener is None or _listener_pid != os.getpid():
+                # fork öncesi yapılan abonelikler yeni süreçteki dinleyiciye aktarılır
+                previous = _listener
+                _listener = NotifyListener()
+                if previous is not None:
+                    _listener._handlers = {k: list(v) for k, v in previous._handlers.items()}
+                    _listener._reconnect_handlers = list(previous._reconnect_handlers)
+                _listener_pid = os.getpid()
+    return _listener
@@ -0,0 +1,233 @@
+import json
+import math
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+
+DILIM_DAKIKA = 15
+GUNLUK_DILIM = 24 * 60 // DILIM_DAKIKA
+MAX_REZERVASYON_SURESI = timedelta(hours=4)
+
+
+def dilimlere_bol(baslangic, bitis):
+    """[baslangic, bitis) aralığını gün gün (gun, ilk_dilim, son_dilim) parçalarına böler.
+
+    Dilim sınırına denk gelmeyen uçlar kapsayıcı dilime yuvarlanır; 09:40-10:05 için
+    09:30 ve 10:00 dilimleri de dolu sayılır.
+    """
+    simdi = baslangic
+    while simdi < bitis:
+        gun = simdi.date()
+        gun_basi = datetime.combine(gun, time())
+        parca_sonu = min(bitis, gun_basi + timedelta(days=1))
+        ilk = int((simdi - gun_basi).total_seconds() // (DILIM_DAKIKA * 60))
+        son = math.ceil((parca_sonu - gun_basi).total_seconds() / (DILIM_DAKIKA * 60))
+        yield gun, ilk, son
+        simdi = parca_sonu
+
+
+class _Snapshot:
+    # pg_current_snapshot() metni: "xmin:xmax:xip1,xip2,..."
+    def __init__(self, metin):
+        xmin, xmax, xip = metin.split(':')
+        self.xmin = int(xmin)
+        self.xmax = int(xmax)
+        self.xip = {int(x) for x in xip.split(',') if x}
+
+    def gorunur(self, txid):
+        if txid < self.xmin:
+            return True
+        return txid < self.xmax and txid not in self.xip
+
+
+class DolulukIndeksi:
+    """Alan ve gün başına 15 dakikalık dilimlerde aktif rezervasyon sayılarını tutar.
+
+    Günler tek bir aralık sorgusuyla yüklenir; sonrasında rezervasyonlar tablosundaki
+    tetikleyicinin gönderdiği 'doluluk_degisti' bildirimleriyle artımlı güncellenir.
+    Yükleme sırasında alınan snapshot sayesinde, sorgu sonucuna zaten yansımış bir
+    değişikliğin bildirimi ikinci kez uygulanmaz. Bir gün aynı anda yalnızca bir istek
+    tarafından yüklenir; aynı günü isteyen diğerleri o yüklemenin bitmesini bekler.
+    """
+
+    def __init__(self, max_gun=62):
+        self.max_gun = max_gun
+        self._gunler = OrderedDict()
+        self._snapshotlar = {}
+        self._bekleyen = {}
+        self._yukleniyor = {}
+        self._lock = threading.Lock()
+        self.yuklemeler = 0
+        self.isabet = 0
+        self.deltalar = 0
+
+    def temizle(self):
+        with self._lock:
+            self._gunler.clear()
+            self._snapshotlar.clear()
+            for gun in self._bekleyen:
+                self._bekleyen[gun] = None
+
+    def _ekle(self, gunler, gun, alan_id, ilk, son, delta):
+        alanlar = gunler[gun]
+        dilimler = alanlar.get(alan_id)
+        if dilimler is None:
+            dilimler = alanlar[alan_id] = array('H', [0]) * GUNLUK_DILIM
+        for i in range(ilk, son):
+            dilimler[i] = max(0, dilimler[i] + delta)
+
+    def bildirim_uygula(self, kanal, veri):
+        olay = json.loads(veri)
+        txid = olay['x']
+        alan_id = olay['a']
+        baslangic = datetime.fromisoformat(olay['b'])
+        bitis = datetime.fromisoformat(olay['e'])
+        delta = olay['d']
+        with self._lock:
+            self.deltalar += 1
+            for gun, ilk, son in dilimlere_bol(baslangic, bitis):
+                if gun in self._gunler:
+                    if not self._snapshotlar[gun].gorunur(txid):
+                        self._ekle(self._gunler, gun, alan_id, ilk, son, delta)
+                elif self._bekleyen.get(gun) is not None:
+                    self._bekleyen[gun].append((txid, alan_id, ilk, son, delta))
+
+    def _yukle(self, conn, gunler, kalici):
+        ilk, son = min(gunler), max(gunler) + timedelta(days=1)
+        bas = datetime.combine(ilk, time())
+        bit = datetime.combine(son, time())
+
+        cur = conn.cursor()
+        cur.execute("""
+            WITH s AS (SELECT pg_current_snapshot()::TEXT AS snapshot)
+            SELECT s.snapshot, r.alan_id, r.baslangic_zamani, r.bitis_zamani
+            FROM s
+            LEFT JOIN rezervasyonlar r
+              ON r.durum = 'aktif'
+             AND r.baslangic_zamani < %s
+             AND r.baslangic_zamani > %s
+             AND r.bitis_zamani > %s
+        """, (bit, bas - MAX_REZERVASYON_SURESI, bas))
+        satirlar = cur.fetchall()
+        cur.close()
+
+        yeni = {gun: {} for gun in gunler}
+        for r in satirlar:
+            if r['alan_id'] is None:
+                continue
+            for gun, i, j in dilimlere_bol(max(r['baslangic_zamani'], bas), min(r['bitis_zamani'], bit)):
+                if gun in yeni:
+                    self._ekle(yeni, gun, r['alan_id'], i, j, 1)
+
+        if not kalici:
+            return yeni
+
+        snapshot = _Snapshot(satirlar[0]['snapshot'])
+        with self._lock:
+            self.yuklemeler += 1
+            for gun in gunler:
+                bekleyen = self._bekleyen.pop(gun, None)
+                if bekleyen is None:
+                    # yükleme sırasında dinleyici yeniden bağlandı; sonuç güvenilir değil
+                    continue
+                for txid, alan_id, i, j, delta in bekleyen:
+                    if not snapshot.gorunur(txid):
+                        self._ekle(yeni, gun, alan_id, i, j, delta)
+                self._gunler[gun] = yeni[gun]
+                self._snapshotlar[gun] = snapshot
+            while len(self._gunler) > self.max_gun:
+                eski, _ = self._gunler.popitem(last=False)
+                self._snapshotlar.pop(eski, None)
+        return yeni
+
+    def gun_araligi(self, conn, ilk_gun, gun_sayisi=1, canli=True):
+        """{gun: {alan_id: [dilim sayıları]}} döndürür.
+
+        canli=False iken (bildirim dinleyicisi bağlı değilken) sonuç önbelleğe alınmaz.
+        """
+        istenen = [ilk_gun + timedelta(days=i) for i in range(gun_sayisi)]
+        sonuc = {}
+        eksik, beklenen = [], {}
+        with self._lock:
+            for gun in istenen:
+                if canli and gun in self._gunler:
+                    self._gunler.move_to_end(gun)
+                    sonuc[gun] = {a: list(d) for a, d in self._gunler[gun].items()}
+                    self.isabet += 1
+                elif canli and gun in self._yukleniyor:
+                    beklenen[gun] = self._yukleniyor[gun]
+                else:
+                    eksik.append(gun)
+                    if canli:
+                        # yükleme bitene kadar gelen bildirimler bu listede birikir
+                        self._yukleniyor[gun] = threading.Event()
+                        self._bekleyen[gun] = []
+
+        if eksik:
+            try:
+                yuklenen = self._yukle(conn, eksik, canli)
+            finally:
+                if canli:
+                    with self._lock:
+                        for gun in eksik:
+                            self._bekleyen.pop(gun, None)
+                            self._yukleniyor.pop(gun).set()
+            for gun in eksik:
+                sonuc[gun] = {a: list(d) for a, d in yuklenen[gun].items()}
+
+        yeniden = []
+        for gun, olay in beklenen.items():
+            olay.wait(30)
+            with self._lock:
+                alanlar = self._gunler.get(gun)
+                if alanlar is None:
+                    # diğer yükleme başarısız oldu ya da sonucu güvenilir değildi
+                    yeniden.append(gun)
+                else:
+                    sonuc[gun] = {a: list(d) for a, d in alanlar.items()}
+                    self.isabet += 1
+        if yeniden:
+            yuklenen = self._yukle(conn, yeniden, False)
+            for gun in yeniden:
+                sonuc[gun] = {a: list(d) for a, d in yuklenen[gun].items()}
+        return sonuc
+
+    def alan_gunu(self, gun, alan_id):
+        """Önbellekteki günün alan dilimlerini döndürür; gün yüklü değilse None."""
+        with self._lock:
+            alanlar = self._gunler.get(gun)
+            if alanlar is None:
+                return None
+            dilimler = alanlar.get(alan_id)
+            return list(dilimler) if dilimler is not None else [0] * GUNLUK_DILIM
+
+    def stats(self):
+        with self._lock:
+            return {
+                'gun': len(self._gunler),
+                'yukleme': self.yuklemeler,
+                'isabet': self.isabet,
+                'delta': self.deltalar,
+            }
+
+
+def saatlik_tepe(gun_verisi):
+    """Dilim dizilerinden {alan_id: {saat: o saatteki en yüksek doluluk}} üretir."""
+    dilim_saat = 60 // DILIM_DAKIKA
+    doluluk = {}
+    for alan_id, dilimler in gun_verisi.items():
+        saatler = {}
+        for saat in range(24):
+            tepe = max(dilimler[saat * dilim_saat:(saat + 1) * dilim_saat])
+            if tepe:
+                saatler[saat] = tepe
+        doluluk[alan_id] = saatler
+    return doluluk
+
+
+def gun_coz(metin, varsayilan=None):
+    try:
+        return date.fromisoformat(metin)
+    except (TypeError, ValueError):
+        return varsayilan
@@ -0,0 +1,68 @@
+"""gunicorn ayarları; worker modu GUNICORN_MOD ile seçilir.
+
+    gevent (varsayılan)  worker başına en fazla GUNICORN_BAGLANTI greenlet; psycopg2 sorgu
+                         beklerken aynı worker'daki diğer istekler çalışır
+    gthread              worker başına GUNICORN_THREADS iş parçacığı
+    sync                 worker başına tek istek (karşılaştırma için)
+
+Veritabanı havuzu worker başına açılır. DB_POOL_MAX verilmezse DB_BAGLANTI_BUTCESI
+(bütün worker'lar için toplam bağlantı) worker sayısına bölünür ve worker'ın eşzamanlılığını
+aşmayacak şekilde kırpılır. Havuzdan fazla eşzamanlı istek, DB_POOL_TIMEOUT süresince
+havuz kuyruğunda bekler, sonra PoolTimeout ile başarısız olur.
+
+SSE akışları (/api/canli) açık kaldığı sürece bir iş parçacığı ya da greenlet tutar ama
+bağlantı kullanmaz. CANLI_AZAMI_ABONE verilmezse worker'ın eşzamanlılığının bir kısmıyla
+sınırlanır; sınırı aşan abonelikler 503 alır.
+
+gthread'de GUNICORN_THREADS verilmezse havuz boyutu + CANLI_AZAMI_ABONE alınır: akış
+dışındaki her iş parçacığına bir bağlantı düşer ve istekler havuz kuyruğunda beklemez.
+Bu yüzden bir worker aynı anda en fazla havuz boyutu kadar normal istek karşılar; yüzlerce
+eşzamanlı istemci için gevent kullanılmalıdır. GUNICORN_THREADS elle büyütülürse fazlası
+havuz kuyruğunda bekler.
+"""
+import os
+
+mod = os.getenv('GUNICORN_MOD', 'gevent')
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5001')
+workers = int(os.getenv('GUNICORN_WORKERS', '2'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+
+havuz = int(os.getenv('DB_POOL_MAX') or max(1, int(os.getenv('DB_BAGLANTI_BUTCESI', '40')) // workers))
+
+if mod == 'gevent':
+    worker_class = 'gevent'
+    worker_connections = int(os.getenv('GUNICORN_BAGLANTI', '1000'))
+    eszamanlilik = worker_connections
+    canli = int(os.getenv('CANLI_AZAMI_ABONE') or eszamanlilik // 2)
+elif mod == 'gthread':
+    worker_class = 'gthread'
+    canli = int(os.getenv('CANLI_AZAMI_ABONE') or havuz // 2)
+    threads = int(os.getenv('GUNICORN_THREADS') or havuz + canli)
+    eszamanlilik = threads
+elif mod == 'sync':
+    # tek istekli worker'da bir akış bütün worker'ı kilitler
+    worker_class = 'sync'
+    eszamanlilik = 1
+    canli = 0
+else:
+    raise RuntimeError(f'Bilinmeyen GUNICORN_MOD: {mod} (gevent, gthread ya da sync olmalı)')
+
+# Uygulama her worker'da ayrı yüklenir; gevent'te modüller monkey-patch sonrasında içe aktarılmalıdır.
+preload_app = False
+
+os.environ['CANLI_AZAMI_ABONE'] = str(canli)
+os.environ['DB_POOL_MAX'] = str(max(1, min(eszamanlilik, havuz)))
+
+
+def post_worker_init(worker):
+    if mod == 'gevent':
+        from db import enable_gevent_wait
+        enable_gevent_wait()
+
+
+def child_exit(server, worker):
+    # çıkan worker'ın sayaçları toplamda kalır, göstergeleri /metrics'ten düşer
+    dizin = os.getenv('METRIK_DIZINI')
+    if dizin:
+        from metrics import Metrics
+        Metrics(dizin).retire(worker.pid)
@@ -0,0 +1,391 @@
+import contextvars
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = contextvars.ContextVar('studyflow_request_measurement', default=None)
+
+logger = logging.getLogger('studyflow.slow_query')
+
+
+class RequestMeasurement:
+    __slots__ = ('start', 'statements', 'db_time', 'rows', 'render_time', 'render_start', 'status',
+                 'endpoint', 'user_id', 'slow_log')
+
+    def __init__(self, endpoint=None, user_id=None, slow_log=None):
+        self.endpoint = endpoint
+        self.user_id = user_id
+        self.slow_log = slow_log
+        self.start = time.perf_counter()
+        self.statements = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.render_time = 0.0
+        self.render_start = None
+        self.status = 500
+
+
+class InstrumentedCursor(RealDictCursor):
+    """Etkin bir istek ölçümü varsa çalıştırılan sorgu sayısını, veritabanında geçen süreyi
+    ve okunan satırları ona ekler. İstek dışında (CLI, arka plan iş parçacıkları) ek maliyeti
+    tek bir contextvar okumasıdır.
+    """
+
+    def execute(self, query, vars=None):
+        measurement = _current.get()
+        if measurement is None:
+            return super().execute(query, vars)
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            elapsed = time.perf_counter() - start
+            measurement.db_time += elapsed
+            measurement.statements += 1
+            if measurement.slow_log is not None and elapsed >= measurement.slow_log.threshold:
+                measurement.slow_log.record(self, query, vars, elapsed, measurement)
+
+    def _fetch(self, fetch, *args):
+        measurement = _current.get()
+        if measurement is None:
+            return fetch(*args)
+        # sunucu taraflı (adlı) imleçlerde fetch* ağ üzerinden yeni satır çeker
+        start = time.perf_counter()
+        result = fetch(*args)
+        measurement.db_time += time.perf_counter() - start
+        if isinstance(result, list):
+            measurement.rows += len(result)
+        elif result is not None:
+            measurement.rows += 1
+        return result
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._fetch(super().fetchmany, size)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+    def __iter__(self):
+        for row in super().__iter__():
+            measurement = _current.get()
+            if measurement is not None:
+                measurement.rows += 1
+            yield row
+
+
+_EXPLAINABLE = re.compile(r'^\s*(SELECT|WITH|INSERT|UPDATE|DELETE|VALUES)\b', re.I)
+
+
+class SlowQueryLog:
+    """Eşiği aşan sorguları sınırlı bir halka tamponda tutar; bir kısmının planını da saklar.
+
+    Parametreler gizlenerek saklanır: sayı, tarih ve mantıksal değerler olduğu gibi kalır,
+    metinler kısaltılır; hassas sütunlara dokunan sorgularda metinler tamamen gizlenir.
+    Plan, sorgu tamamlandıktan sonra aynı bağlantıda ve açık işlemin içinde bir savepoint
+    altında ANALYZE olmadan EXPLAIN ile alınır; sorgu yeniden çalıştırılmaz. autocommit
+    bağlantılarda ya da açık işlem yokken plan alınmaz.
+    """
+
+    SENSITIVE = re.compile(r'sifre|email|telefon|ogrenci_no', re.I)
+
+    def __init__(self, threshold_ms=200, explain_rate=0.1, capacity=200):
+        self.threshold = threshold_ms / 1000
+        self.explain_rate = explain_rate
+        self._entries = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def _redact(self, query, params):
+        hide = bool(self.SENSITIVE.search(query))
+
+        def value(v):
+            if isinstance(v, str):
+                if hide:
+                    return '<gizli>'
+                return v if len(v) <= 32 else v[:32] + '…'
+            if v is None or isinstance(v, (int, float, bool)):
+                return v
+            return str(v)
+
+        if isinstance(params, dict):
+            return {k: value(v) for k, v in params.items()}
+        if params is None:
+            return None
+        return [value(v) for v in params]
+
+    def _explain(self, cursor, query, params):
+        if not _EXPLAINABLE.match(query):
+            return None
+        conn = cursor.connection
+        if conn.autocommit or conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_INTRANS:
+            return None
+        # ölçülmeyen, ayrı bir istemci tarafı imleç; adlı imleçlerle aynı işlemde çalışabilir
+        plan_cur = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+        try:
+            plan_cur.execute('SAVEPOINT yavas_sorgu_plani')
+            try:
+                plan_cur.execute('EXPLAIN ' + query, params)
+                plan = '\n'.join(r[0] for r in plan_cur.fetchall())
+            except psycopg2.Error as e:
+                plan_cur.execute('ROLLBACK TO SAVEPOINT yavas_sorgu_plani')
+                plan = f'EXPLAIN başarısız: {e}'
+            plan_cur.execute('RELEASE SAVEPOINT yavas_sorgu_plani')
+            return plan
+        except psycopg2.Error as e:
+            return f'EXPLAIN başarısız: {e}'
+        finally:
+            plan_cur.close()
+
+    def record(self, cursor, query, params, elapsed, measurement):
+        if isinstance(query, bytes):
+            query = query.decode()
+        elif not isinstance(query, str):
+            query = query.as_string(cursor.connection)
+        plan = self._explain(cursor, query, params) if random.random() < self.explain_rate else None
+        entry = {
+            'time': datetime.now(),
+            'endpoint': measurement.endpoint,
+            'user_id': measurement.user_id,
+            'duration_ms': round(elapsed * 1000, 1),
+            'rows': cursor.rowcount,
+            'query': ' '.join(query.split())[:4000],
+            'params': self._redact(query, params),
+            'plan': plan,
+        }
+        with self._lock:
+            self._entries.append(entry)
+            self.recorded += 1
+        logger.warning('yavaş sorgu %.1f ms endpoint=%s kullanici=%s satir=%s: %s',
+                       entry['duration_ms'], entry['endpoint'], entry['user_id'], entry['rows'],
+                       entry['query'][:200])
+
+    def entries(self):
+        with self._lock:
+            return list(reversed(self._entries))
+
+
+def _histogram():
+    return {'buckets': [0] * len(DURATION_BUCKETS), 'sum': 0.0, 'count': 0}
+
+
+def _observe(histogram, value):
+    for i, bound in enumerate(DURATION_BUCKETS):
+        if value <= bound:
+            histogram['buckets'][i] += 1
+    histogram['sum'] += value
+    histogram['count'] += 1
+
+
+def _merge_histogram(target, source):
+    target['buckets'] = [a + b for a, b in zip(target['buckets'], source['buckets'])]
+    target['sum'] += source['sum']
+    target['count'] += source['count']
+
+
+def _merge_counters(requests, endpoints, snapshot):
+    for endpoint, method, status, count in snapshot['requests']:
+        key = (endpoint, method, status)
+        requests[key] = requests.get(key, 0) + count
+    for endpoint, e in snapshot['endpoints'].items():
+        t = endpoints.get(endpoint)
+        if t is None:
+            endpoints[endpoint] = json.loads(json.dumps(e))
+            continue
+        _merge_histogram(t['duration'], e['duration'])
+        _merge_histogram(t['db_duration'], e['db_duration'])
+        for k in ('statements', 'rows', 'render'):
+            t[k] += e[k]
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Metrics:
+    """Uç nokta başına istek, SQL ve şablon ölçümlerini süreç içinde toplar.
+
+    gunicorn her worker'ı ayrı süreçte çalıştırdığından, directory verilirse her süreç
+    anlık görüntüsünü en fazla dump_interval saniyede bir oraya yazar; /metrics isteğini
+    karşılayan worker tüm dosyaları birleştirir. Çıkan bir worker'ın sayaçları retire() ile
+    RETIRED dosyasına eklenir ve kendi dosyası silinir, böylece toplamlar azalmaz; ölü
+    süreçlerin göstergeleri (gauges) dışa aktarılmaz.
+    """
+
+    RETIRED = 'retired.json'
+
+    def __init__(self, directory=None, gauges=None, slow_log=None, dump_interval=5.0):
+        self.directory = directory
+        self.gauges = gauges
+        self.slow_log = slow_log
+        self.dump_interval = dump_interval
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._endpoints = {}
+        self._last_dump = 0.0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def start(self, endpoint=None, user_id=None):
+        measurement = RequestMeasurement(endpoint, user_id, self.slow_log)
+        _current.set(measurement)
+        return measurement
+
+    def render_started(self, measurement):
+        measurement.render_start = time.perf_counter()
+
+    def render_finished(self, measurement):
+        if measurement.render_start is not None:
+            measurement.render_time += time.perf_counter() - measurement.render_start
+            measurement.render_start = None
+
+    def finish(self, measurement, endpoint, method):
+        # akışlı yanıtlarda teardown farklı bir bağlamda çalışabilir; reset(token) yerine temizlenir
+        _current.set(None)
+        duration = time.perf_counter() - measurement.start
+        endpoint = endpoint or 'unknown'
+        with self._lock:
+            key = (endpoint, method, str(measurement.status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            e = self._endpoints.get(endpoint)
+            if e is None:
+                e = self._endpoints[endpoint] = {
+                    'duration': _histogram(), 'db_duration': _histogram(),
+                    'statements': 0, 'rows': 0, 'render': 0.0,
+                }
+            _observe(e['duration'], duration)
+            _observe(e['db_duration'], measurement.db_time)
+            e['statements'] += measurement.statements
+            e['rows'] += measurement.rows
+            e['render'] += measurement.render_time
+            dump = self.directory and time.monotonic() - self._last_dump > self.dump_interval
+            if dump:
+                self._last_dump = time.monotonic()
+        if dump:
+            self.dump()
+
+    def snapshot(self):
+        gauges = self.gauges() if self.gauges else {}
+        with self._lock:
+            return {
+                'requests': [[*k, v] for k, v in self._requests.items()],
+                'endpoints': json.loads(json.dumps(self._endpoints)),
+                'gauges': {str(os.getpid()): gauges},
+            }
+
+    def dump(self):
+        self._write(f'{os.getpid()}.json', self.snapshot())
+
+    def _read(self, name):
+        try:
+            with open(os.path.join(self.directory, name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, name, data):
+        path = os.path.join(self.directory, name)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(data, f)
+        os.replace(path + '.tmp', path)
+
+    def retire(self, pid):
+        """Çıkan worker'ın sayaçlarını RETIRED dosyasına ekleyip dosyasını siler (gunicorn child_exit)."""
+        name = f'{pid}.json'
+        snapshot = self._read(name)
+        if snapshot is not None:
+            retired = self._read(self.RETIRED) or {'requests': [], 'endpoints': {}, 'pids': []}
+            requests = {tuple(r[:3]): r[3] for r in retired['requests']}
+            _merge_counters(requests, retired['endpoints'], snapshot)
+            retired['requests'] = [[*k, v] for k, v in requests.items()]
+            # dosyası silinene kadar collect() bu süreci iki kez saymasın diye
+            retired['pids'] = [p for p in retired['pids']
+                               if os.path.exists(os.path.join(self.directory, f'{p}.json'))] + [pid]
+            self._write(self.RETIRED, retired)
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+    def collect(self):
+        own = self.snapshot()
+        if not self.directory:
+            return own
+        requests, endpoints, gauges = {}, {}, dict(own['gauges'])
+        _merge_counters(requests, endpoints, own)
+        retired = self._read(self.RETIRED)
+        skip = {f'{os.getpid()}.json', self.RETIRED}
+        if retired is not None:
+            _merge_counters(requests, endpoints, retired)
+            skip.update(f'{p}.json' for p in retired['pids'])
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json') or name in skip:
+                continue
+            s = self._read(name)
+            if s is None:
+                continue
+            _merge_counters(requests, endpoints, s)
+            # child_exit çalışmadan ölen worker'ların (SIGKILL, yeniden başlatma) sayaçları
+            # dosyada kalır ama göstergeleri artık anlamsızdır
+            if name[:-5].isdigit() and _alive(int(name[:-5])):
+                gauges.update(s['gauges'])
+        return {'requests': [[*k, v] for k, v in requests.items()], 'endpoints': endpoints, 'gauges': gauges}
+
+    def render(self):
+        """Prometheus metin biçimi (0.0.4)."""
+        data = self.collect()
+        lines = [
+            '# HELP studyflow_requests_total HTTP requests by endpoint, method and status.',
+            '# TYPE studyflow_requests_total counter',
+        ]
+        for endpoint, method, status, count in sorted(data['requests']):
+            lines.append(f'studyflow_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+
+        for name, field, help_text in (
+                ('studyflow_request_duration_seconds', 'duration', 'Request latency including streamed bodies.'),
+                ('studyflow_db_duration_seconds', 'db_duration', 'Time spent in SQL execute/fetch per request.')):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+            for endpoint, e in sorted(data['endpoints'].items()):
+                h = e[field]
+                for bound, count in zip(DURATION_BUCKETS, h['buckets']):
+                    lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="+Inf"}} {h["count"]}')
+                lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {h["sum"]:.6f}')
+                lines.append(f'{name}_count{{endpoint="{endpoint}"}} {h["count"]}')
+
+        for name, field, help_text in (
+                ('studyflow_db_statements_total', 'statements', 'SQL statements executed.'),
+                ('studyflow_db_rows_total', 'rows', 'Rows fetched from the database.'),
+                ('studyflow_template_render_seconds_total', 'render', 'Time spent rendering templates.')):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for endpoint, e in sorted(data['endpoints'].items()):
+                value = f'{e[field]:.6f}' if isinstance(e[field], float) else e[field]
+                lines.append(f'{name}{{endpoint="{endpoint}"}} {value}')
+
+        gauge_names = sorted({k for g in data['gauges'].values() for k in g})
+        for key in gauge_names:
+            name = f'studyflow_{key}'
+            lines += [f'# TYPE {name} gauge']
+            for pid, g in sorted(data['gauges'].items()):
+                if key in g:
+                    lines.append(f'{name}{{pid="{pid}"}} {g[key]}')
+        return '\n'.join(lines) + '\n'
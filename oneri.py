@@ -0,0 +1,118 @@
+import os
+from datetime import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from doluluk import DILIM_DAKIKA, GUNLUK_DILIM
+
+SAAT_DILIM = 60 // DILIM_DAKIKA
+ACILIS_DILIM = 8 * SAAT_DILIM
+KAPANIS_DILIM = 22 * SAAT_DILIM
+# fn_yogunluk_analizi ile aynı eşikler: günün en yoğun penceresine oran
+YOGUNLUK_ESIKLERI = ((0.7, 'YOĞUN SAAT'), (0.4, 'ORTA YOĞUNLUK'))
+
+ONERI_LIMIT = int(os.getenv('ONERI_LIMIT', '20'))
+# rezervasyon formu tam saatleri sunar; 15 ya da 30 yapılırsa çeyrek/yarım saat başlangıçları da önerilir
+ONERI_ADIM_DAKIKA = int(os.getenv('ONERI_ADIM_DAKIKA', '60'))
+ONERI_KAPASITE_AGIRLIGI = float(os.getenv('ONERI_KAPASITE_AGIRLIGI', '0.6'))
+
+
+def doluluk_matrisi(alanlar, gun_verisi):
+    """DolulukIndeksi'nin bir günlük {alan_id: dilimler} verisinden alan x dilim matrisi kurar."""
+    bos = [0] * GUNLUK_DILIM
+    return np.array([gun_verisi.get(a['alan_id'], bos) for a in alanlar],
+                    dtype=np.int32).reshape(len(alanlar), GUNLUK_DILIM)
+
+
+def talep_matrisi(alanlar, satirlar):
+    """(alan_id, saat, sayi) satırlarını alan x dilim matrisine yayar; saatin değeri dört dilimine de yazılır."""
+    sira = {a['alan_id']: i for i, a in enumerate(alanlar)}
+    saatlik = np.zeros((len(alanlar), 24))
+    for s in satirlar:
+        i = sira.get(s['alan_id'])
+        if i is not None:
+            saatlik[i, s['saat']] = s['sayi']
+    return np.repeat(saatlik, SAAT_DILIM, axis=1)
+
+
+def dilim_saati(dilim):
+    return time(*divmod(dilim * DILIM_DAKIKA, 60))
+
+
+def yogunluk_etiketi(oran):
+    for esik, etiket in YOGUNLUK_ESIKLERI:
+        if oran >= esik:
+            return etiket
+    return 'SAKİN'
+
+
+def zaman_oner(alanlar, doluluk, talep, sure_saat, mesgul=(), en_erken=0,
+               adim_dakika=ONERI_ADIM_DAKIKA, kapasite_agirligi=ONERI_KAPASITE_AGIRLIGI,
+               alan_basina=3, limit=ONERI_LIMIT):
+    """Bütün aday alanlar için sure_saat uzunluğundaki uygun pencereleri puanlayıp sıralar.
+
+    doluluk ve talep alan x dilim matrisleridir (alanlar ile aynı sırada). Bir pencere,
+    içindeki her dilimde en az bir boş yer kalıyorsa ve kullanıcının mesgul dilim
+    aralıklarıyla kesişmiyorsa uygundur. Puan, pencere boyunca en az kalan boş yerin
+    kapasiteye oranı ile geçmiş talebin tersinin ağırlıklı toplamıdır. Aynı alandan
+    birbiriyle çakışmayan en fazla alan_basina öneri döner.
+    """
+    w = sure_saat * SAAT_DILIM
+    if not alanlar or w <= 0:
+        return []
+    kapasite = np.array([a['kapasite'] for a in alanlar], dtype=np.int32)
+    bos = kapasite[:, None] - doluluk
+    # pencere_*[:, s]: s diliminde başlayan w dilimlik pencere
+    pencere_bos = sliding_window_view(bos, w, axis=1).min(axis=2)
+    oransal = talep / np.maximum(kapasite, 1)[:, None]
+    birikimli = np.cumsum(np.pad(oransal, ((0, 0), (1, 0))), axis=1)
+    pencere_talep = (birikimli[:, w:] - birikimli[:, :-w]) / w
+
+    adim = max(1, adim_dakika // DILIM_DAKIKA)
+    ilk = -(-max(ACILIS_DILIM, en_erken) // adim) * adim
+    baslangiclar = np.arange(ilk, KAPANIS_DILIM - w + 1, adim)
+    if not len(baslangiclar):
+        return []
+
+    uygun = pencere_bos[:, baslangiclar] > 0
+    if mesgul:
+        maske = np.zeros(GUNLUK_DILIM, dtype=bool)
+        for i, j in mesgul:
+            maske[i:j] = True
+        uygun &= ~sliding_window_view(maske, w).any(axis=1)[baslangiclar]
+
+    talep_adaylar = pencere_talep[:, baslangiclar]
+    tepe = talep_adaylar.max()
+    talep_orani = talep_adaylar / tepe if tepe > 0 else np.zeros_like(talep_adaylar)
+    bos_orani = pencere_bos[:, baslangiclar] / np.maximum(kapasite, 1)[:, None]
+    puan = kapasite_agirligi * bos_orani + (1 - kapasite_agirligi) * (1 - talep_orani)
+
+    a_idx, s_idx = np.nonzero(uygun)
+    sira = np.lexsort((baslangiclar[s_idx], -puan[a_idx, s_idx]))
+
+    oneriler = []
+    secilen = {}
+    for k in sira:
+        a, s = a_idx[k], s_idx[k]
+        dilim = int(baslangiclar[s])
+        onceki = secilen.setdefault(a, [])
+        if len(onceki) >= alan_basina or any(abs(dilim - d) < w for d in onceki):
+            continue
+        onceki.append(dilim)
+        alan = alanlar[a]
+        oneriler.append({
+            'alan_id': alan['alan_id'],
+            'alan_adi': alan['alan_adi'],
+            'konum': alan['konum'],
+            'tur_adi': alan['tur_adi'],
+            'kapasite': int(kapasite[a]),
+            'bos_yer': int(pencere_bos[a, baslangiclar[s]]),
+            'oneri_baslangic': dilim_saati(dilim),
+            'oneri_bitis': dilim_saati(dilim + w),
+            'yogunluk': yogunluk_etiketi(talep_orani[a, s]),
+            'puan': round(float(puan[a, s]), 3),
+        })
+        if len(oneriler) >= limit:
+            break
+    return oneriler
@@ -0,0 +1,100 @@
+"""Okuma uç noktalarını yüksek eşzamanlılıkta Flask (gunicorn) ve asyncio (uvicorn) servislerinde karşılaştırır.
+
+Kullanım:
+    python scripts/bench_async.py --istek 5000 --paralel 256
+    python scripts/bench_async.py --uc doluluk --paralel 512 --async-url http://localhost:5002
+
+Önce Flask uygulamasına giriş yapılır; aynı oturum çerezi iki servise de gönderilir
+(iki servis aynı FLASK_SECRET_KEY ile çalışmalıdır). Her uç nokta için iki servisin
+istek/sn, gecikme yüzdelikleri ve hata sayıları yan yana yazdırılır.
+"""
+import argparse
+import http.client
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+UC_NOKTALAR = {
+    'takvim': lambda g: f'/api/takvim-verileri?start={g - timedelta(days=7)}&end={g + timedelta(days=42)}',
+    'musait': lambda g: f'/api/musait-alanlar?baslangic={g}T10:00&bitis={g}T12:00',
+    'oneri': lambda g: f'/api/zaman-onerisi?alan_id=1&tarih={g}&sure=2',
+    'doluluk': lambda g: f'/api/doluluk?baslangic={g}&gun=7',
+}
+
+
+def yuzdelik(degerler, oran):
+    sirali = sorted(degerler)
+    return sirali[min(len(sirali) - 1, int(len(sirali) * oran))]
+
+
+def giris_yap(url, ogrenci_no, sifre):
+    adres = urllib.parse.urlsplit(url)
+    conn = http.client.HTTPConnection(adres.hostname, adres.port)
+    conn.request('POST', '/login', urllib.parse.urlencode({'ogrenci_no': ogrenci_no, 'sifre': sifre}),
+                 {'Content-Type': 'application/x-www-form-urlencoded'})
+    yanit = conn.getresponse()
+    yanit.read()
+    cerez = yanit.getheader('Set-Cookie')
+    conn.close()
+    if not cerez:
+        raise SystemExit('Giriş başarısız: oturum çerezi alınamadı.')
+    return cerez.split(';')[0]
+
+
+def olc(ad, url, yol, cerez, sayi, paralel):
+    adres = urllib.parse.urlsplit(url)
+    yerel = threading.local()
+    hatalar = []
+
+    def istek(_):
+        # her iş parçacığı kendi kalıcı (keep-alive) bağlantısını kullanır
+        if not hasattr(yerel, 'conn'):
+            yerel.conn = http.client.HTTPConnection(adres.hostname, adres.port, timeout=60)
+        start = time.perf_counter()
+        try:
+            yerel.conn.request('GET', yol, headers={'Cookie': cerez})
+            yanit = yerel.conn.getresponse()
+            yanit.read()
+            if yanit.status != 200:
+                hatalar.append(yanit.status)
+        except (OSError, http.client.HTTPException) as e:
+            hatalar.append(type(e).__name__)
+            yerel.conn.close()
+            del yerel.conn
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=paralel) as ex:
+        sureler = list(ex.map(istek, range(sayi)))
+    toplam = time.perf_counter() - start
+    print(f"{ad:<20} {sayi / toplam:10.1f} istek/sn   "
+          f"p50={yuzdelik(sureler, 0.50) * 1000:8.2f}ms   "
+          f"p95={yuzdelik(sureler, 0.95) * 1000:8.2f}ms   "
+          f"p99={yuzdelik(sureler, 0.99) * 1000:8.2f}ms   "
+          f"hata={len(hatalar)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--flask-url', default='http://localhost:5001')
+    parser.add_argument('--async-url', default='http://localhost:5002')
+    parser.add_argument('--ogrenci-no', default='20210001')
+    parser.add_argument('--sifre', default='sifre123')
+    parser.add_argument('--istek', type=int, default=5000)
+    parser.add_argument('--paralel', type=int, default=256)
+    parser.add_argument('--tarih', type=date.fromisoformat, default=date(2025, 1, 15))
+    parser.add_argument('--uc', choices=sorted(UC_NOKTALAR), action='append',
+                        help='ölçülecek uç nokta (tekrarlanabilir, varsayılan: hepsi)')
+    args = parser.parse_args()
+
+    cerez = giris_yap(args.flask_url, args.ogrenci_no, args.sifre)
+    for uc in args.uc or sorted(UC_NOKTALAR):
+        yol = UC_NOKTALAR[uc](args.tarih)
+        olc(f'{uc} flask', args.flask_url, yol, cerez, args.istek, args.paralel)
+        olc(f'{uc} async', args.async_url, yol, cerez, args.istek, args.paralel)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""fn_musait_alanlar'ın planını ve süresini eski DATE()/::TIME koşullu sorguyla karşılaştırır.
+
+Kullanım:
+    python scripts/sentetik_veri.py --rezervasyon 2000000
+    python scripts/bench_musait.py --tarih 2025-06-02 --baslangic 10:00 --bitis 12:00
+
+fn_musait_alanlar tek SELECT'ten oluşan STABLE bir SQL fonksiyonu olduğu için planlayıcı
+onu sorguya açar; EXPLAIN çıktısı rezervasyonlar üzerindeki gerçek tarama düğümlerini gösterir.
+rezervasyonlar için Seq Scan görülürse betik hata koduyla çıkar.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from db import DB_CONFIG
+
+ESKI_SORGU = """
+    SELECT ca.alan_id
+    FROM calisma_alanlari ca
+    JOIN alan_turleri at ON ca.tur_id = at.tur_id
+    WHERE ca.aktif = TRUE
+    AND NOT EXISTS (
+        SELECT 1 FROM rezervasyonlar r
+        WHERE r.alan_id = ca.alan_id
+        AND r.durum = 'aktif'
+        AND DATE(r.baslangic_zamani) = %(tarih)s
+        AND (
+            (r.baslangic_zamani::TIME <= %(bas_saat)s AND r.bitis_zamani::TIME > %(bas_saat)s)
+            OR (r.baslangic_zamani::TIME < %(bit_saat)s AND r.bitis_zamani::TIME >= %(bit_saat)s)
+            OR (r.baslangic_zamani::TIME >= %(bas_saat)s AND r.bitis_zamani::TIME <= %(bit_saat)s)
+        )
+    )
+"""
+
+YENI_SORGU = """
+    SELECT * FROM fn_musait_alanlar(%(baslangic)s, %(bitis)s, %(tur)s, %(konum)s, NULL, %(priz)s, %(sessiz)s)
+"""
+
+
+def taramalar(dugum, sonuc=None):
+    sonuc = [] if sonuc is None else sonuc
+    if 'Relation Name' in dugum:
+        sonuc.append((dugum['Node Type'], dugum['Relation Name'], dugum.get('Index Name')))
+    for alt in dugum.get('Plans', ()):
+        taramalar(alt, sonuc)
+    return sonuc
+
+
+def olc(cur, ad, sorgu, parametreler, tekrar):
+    cur.execute('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + sorgu, parametreler)
+    plan = cur.fetchone()['QUERY PLAN'][0]
+    sureler = []
+    for _ in range(tekrar):
+        start = time.perf_counter()
+        cur.execute(sorgu, parametreler)
+        cur.fetchall()
+        sureler.append(time.perf_counter() - start)
+    sureler.sort()
+    print(f"{ad}: medyan {sureler[len(sureler) // 2] * 1000:.2f}ms, "
+          f"paylaşılan blok okuma={plan['Plan'].get('Shared Read Blocks', 0)} "
+          f"isabet={plan['Plan'].get('Shared Hit Blocks', 0)}")
+    dugumler = taramalar(plan['Plan'])
+    for tip, tablo, indeks in dugumler:
+        print(f"    {tip:<20} {tablo:<20} {indeks or ''}")
+    return dugumler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tarih', default=datetime.now().strftime('%Y-%m-%d'))
+    parser.add_argument('--baslangic', default='10:00')
+    parser.add_argument('--bitis', default='12:00')
+    parser.add_argument('--tur', default=None)
+    parser.add_argument('--konum', default=None)
+    parser.add_argument('--priz', action='store_true')
+    parser.add_argument('--sessiz', action='store_true')
+    parser.add_argument('--tekrar', type=int, default=20)
+    args = parser.parse_args()
+
+    parametreler = {
+        'tarih': args.tarih,
+        'bas_saat': args.baslangic,
+        'bit_saat': args.bitis,
+        'baslangic': datetime.strptime(f'{args.tarih} {args.baslangic}', '%Y-%m-%d %H:%M'),
+        'bitis': datetime.strptime(f'{args.tarih} {args.bitis}', '%Y-%m-%d %H:%M'),
+        'tur': args.tur,
+        'konum': args.konum,
+        'priz': True if args.priz else None,
+        'sessiz': True if args.sessiz else None,
+    }
+
+    conn = psycopg2.connect(**DB_CONFIG, cursor_factory=RealDictCursor)
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) AS sayi FROM rezervasyonlar")
+    print(f"rezervasyonlar: {cur.fetchone()['sayi']} satır")
+
+    olc(cur, 'eski sorgu', ESKI_SORGU, parametreler, args.tekrar)
+    yeni = olc(cur, 'fn_musait_alanlar', YENI_SORGU, parametreler, args.tekrar)
+    conn.close()
+
+    if any(tip == 'Seq Scan' and tablo == 'rezervasyonlar' for tip, tablo, _ in yeni):
+        print('BAŞARISIZ: fn_musait_alanlar rezervasyonlar tablosunu sıralı tarıyor')
+        sys.exit(1)
+    print('BAŞARILI: rezervasyonlar indeks üzerinden okunuyor')
+
+
+if __name__ == '__main__':
+    main()
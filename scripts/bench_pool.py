@@ -0,0 +1,85 @@
+"""İstek başına psycopg2.connect() ile bağlantı havuzunu karşılaştırır.
+
+Kullanım:
+    python scripts/bench_pool.py --istek 2000 --paralel 8
+
+Her "istek" bir bağlantı alır, dashboard'daki gibi kısa bir sorgu çalıştırır ve
+bağlantıyı bırakır. Çıktı iki yöntem için istek/sn ve gecikme yüzdeliklerini verir.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from db import DB_CONFIG, ConnectionPool
+
+SORGU = "SELECT kullanici_id, ad, soyad FROM kullanicilar WHERE kullanici_id = %s"
+
+
+def yuzdelik(degerler, oran):
+    sirali = sorted(degerler)
+    return sirali[min(len(sirali) - 1, int(len(sirali) * oran))]
+
+
+def dogrudan_istek(_):
+    start = time.perf_counter()
+    conn = psycopg2.connect(**DB_CONFIG, cursor_factory=RealDictCursor)
+    cur = conn.cursor()
+    cur.execute(SORGU, (1,))
+    cur.fetchone()
+    cur.close()
+    conn.close()
+    return time.perf_counter() - start
+
+
+def havuz_istegi(pool):
+    def istek(_):
+        start = time.perf_counter()
+        conn = pool.getconn()
+        try:
+            cur = conn.cursor()
+            cur.execute(SORGU, (1,))
+            cur.fetchone()
+            cur.close()
+        finally:
+            pool.putconn(conn)
+        return time.perf_counter() - start
+    return istek
+
+
+def olc(ad, istek, sayi, paralel):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=paralel) as ex:
+        sureler = list(ex.map(istek, range(sayi)))
+    toplam = time.perf_counter() - start
+    print(f"{ad:<12} {sayi / toplam:10.1f} istek/sn   "
+          f"p50={yuzdelik(sureler, 0.50) * 1000:7.2f}ms   "
+          f"p95={yuzdelik(sureler, 0.95) * 1000:7.2f}ms   "
+          f"p99={yuzdelik(sureler, 0.99) * 1000:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--istek', type=int, default=2000)
+    parser.add_argument('--paralel', type=int, default=8)
+    parser.add_argument('--havuz', type=int, default=None,
+                        help='havuz boyutu (varsayılan: --paralel)')
+    args = parser.parse_args()
+
+    boyut = args.havuz or args.paralel
+    pool = ConnectionPool(1, boyut, 30, cursor_factory=RealDictCursor, **DB_CONFIG)
+
+    olc('connect()', dogrudan_istek, args.istek, args.paralel)
+    olc('havuz', havuz_istegi(pool), args.istek, args.paralel)
+    print('havuz istatistikleri:', pool.stats())
+    pool.closeall()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""gunicorn worker modlarını (sync, gthread, gevent) yüksek eşzamanlılıkta karşılaştırır.
+
+Kullanım:
+    python scripts/bench_worker.py --paralel 256 --istek 5000
+    python scripts/bench_worker.py --mod sync --mod gevent --worker 4 --uc takvim
+
+Her mod için uygulama gunicorn.conf.py ile ayrı bir portta başlatılır, giriş yapılır ve
+seçilen uç noktalar bench_async.py'deki istemciyle ölçülür; sonra sunucu kapatılır.
+Havuz boyutu her modda gunicorn.conf.py'nin hesapladığı değerdir (DB_BAGLANTI_BUTCESI);
+karşılaştırmada sabit tutmak için DB_POOL_MAX verilebilir.
+"""
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import time
+from datetime import date
+
+KOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_async import UC_NOKTALAR, giris_yap, olc
+
+MODLAR = ('sync', 'gthread', 'gevent')
+
+
+def sunucu_baslat(mod, port, worker):
+    env = dict(os.environ, GUNICORN_MOD=mod, GUNICORN_BIND=f'127.0.0.1:{port}', GUNICORN_WORKERS=str(worker))
+    surec = subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py', 'app:app'], cwd=KOK, env=env)
+    son = time.monotonic() + 30
+    while time.monotonic() < son:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/login')
+            conn.getresponse().read()
+            conn.close()
+            return surec
+        except OSError:
+            if surec.poll() is not None:
+                raise SystemExit(f'{mod}: gunicorn başlatılamadı (çıkış kodu {surec.returncode}).')
+            time.sleep(0.2)
+    surec.terminate()
+    raise SystemExit(f'{mod}: sunucu 30 saniyede yanıt vermedi.')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mod', choices=MODLAR, action='append',
+                        help='ölçülecek worker modu (tekrarlanabilir, varsayılan: hepsi)')
+    parser.add_argument('--worker', type=int, default=2)
+    parser.add_argument('--port', type=int, default=5101)
+    parser.add_argument('--ogrenci-no', default='20210001')
+    parser.add_argument('--sifre', default='sifre123')
+    parser.add_argument('--istek', type=int, default=5000)
+    parser.add_argument('--paralel', type=int, default=256)
+    parser.add_argument('--tarih', type=date.fromisoformat, default=date(2025, 1, 15))
+    parser.add_argument('--uc', choices=sorted(UC_NOKTALAR), action='append',
+                        help='ölçülecek uç nokta (tekrarlanabilir, varsayılan: hepsi)')
+    args = parser.parse_args()
+
+    for mod in args.mod or MODLAR:
+        surec = sunucu_baslat(mod, args.port, args.worker)
+        try:
+            url = f'http://127.0.0.1:{args.port}'
+            cerez = giris_yap(url, args.ogrenci_no, args.sifre)
+            for uc in args.uc or sorted(UC_NOKTALAR):
+                olc(f'{uc} {mod}', url, UC_NOKTALAR[uc](args.tarih), cerez, args.istek, args.paralel)
+        finally:
+            surec.terminate()
+            surec.wait(30)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""Mevcut bir veritabanında rezervasyonlar ve calisma_oturumlari tablolarını aylık bölümlü yapıya taşır.
+
+Kullanım:
+    python scripts/bolumleme_gecisi.py
+    python scripts/bolumleme_gecisi.py --ileri 12
+
+Tablo ve bölüm fonksiyonlarının tanımları database/schema.sql'den okunur. Geçiş tek işlemde
+yapılır: eski tablolar '_eski' adıyla kenara alınır, bölümlü tablolar oluşturulup veriler
+kopyalanır, ardından eski tablolara bağlı indeks, görünüm, tetikleyici ve yetkiler yeni
+tablolar üzerinde aynen yeniden kurulur. Kopyalama sırasında tetikleyiciler henüz yoktur;
+özet tabloları, sayaçlar ve loglar değişmez. İşlem süresince iki tablo da kilitlidir.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import psycopg2
+
+from db import DB_CONFIG
+
+KOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+TABLOLAR = ('rezervasyonlar', 'calisma_oturumlari')
+FONKSIYONLAR = ('fn_bolum_olustur', 'fn_bolumleri_hazirla', 'fn_donem_arsivle')
+DIZILER = ('rezervasyon_seq', 'oturum_seq')
+
+
+def sema_parcalari():
+    with open(os.path.join(KOK, 'database', 'schema.sql'), encoding='utf-8') as f:
+        sema = f.read()
+    parcalar = []
+    for tablo in TABLOLAR:
+        tanim = re.search(rf'CREATE TABLE {tablo} \(.*?\) PARTITION BY RANGE \(\w+\);', sema, re.S)
+        varsayilan = re.search(rf'CREATE TABLE {tablo}_varsayilan PARTITION OF {tablo} DEFAULT;', sema)
+        parcalar += [tanim.group(0), varsayilan.group(0)]
+    for fonksiyon in FONKSIYONLAR:
+        parcalar.append(re.search(rf'CREATE OR REPLACE FUNCTION {fonksiyon}\(.*?\$\$ LANGUAGE \w+;',
+                                  sema, re.S).group(0))
+    return parcalar
+
+
+def bagimliliklar(cur):
+    cur.execute("""
+        SELECT c.relname, c.relkind FROM pg_class c
+        WHERE c.relname = ANY(%s) AND c.relnamespace = 'public'::REGNAMESPACE
+    """, (list(TABLOLAR),))
+    turler = dict(cur.fetchall())
+    if turler.get('rezervasyonlar') == 'p':
+        return None
+
+    cur.execute("""
+        SELECT conname, conrelid::REGCLASS::TEXT FROM pg_constraint
+        WHERE contype = 'f' AND confrelid = ANY(%s::REGCLASS[])
+        AND NOT conrelid = ANY(%s::REGCLASS[])
+    """, (list(TABLOLAR), list(TABLOLAR)))
+    dis = cur.fetchall()
+    if dis:
+        raise SystemExit('Bu tablolara başvuran başka yabancı anahtarlar var, önce kaldırılmalı: '
+                         + ', '.join(f'{t}.{k}' for k, t in dis))
+
+    cur.execute("""
+        SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i
+        WHERE i.indrelid = ANY(%s::REGCLASS[]) AND NOT i.indisprimary
+        ORDER BY i.indexrelid
+    """, (list(TABLOLAR),))
+    indeksler = [r[0] for r in cur.fetchall()]
+
+    cur.execute("""
+        SELECT pg_get_triggerdef(t.oid) FROM pg_trigger t
+        WHERE t.tgrelid = ANY(%s::REGCLASS[]) AND NOT t.tgisinternal
+        ORDER BY t.oid
+    """, (list(TABLOLAR),))
+    tetikleyiciler = [r[0] for r in cur.fetchall()]
+
+    cur.execute("""
+        WITH RECURSIVE bagimli AS (
+            SELECT DISTINCT r.ev_class AS oid
+            FROM pg_depend d
+            JOIN pg_rewrite r ON r.oid = d.objid
+            WHERE d.refobjid = ANY(%s::REGCLASS[]) AND r.ev_class <> d.refobjid
+            UNION
+            SELECT r.ev_class
+            FROM bagimli b
+            JOIN pg_depend d ON d.refobjid = b.oid
+            JOIN pg_rewrite r ON r.oid = d.objid
+            WHERE r.ev_class <> b.oid
+        )
+        SELECT c.oid::REGCLASS::TEXT, c.relkind, pg_get_viewdef(c.oid)
+        FROM bagimli b JOIN pg_class c ON c.oid = b.oid
+        ORDER BY c.oid
+    """, (list(TABLOLAR),))
+    gorunumler = cur.fetchall()
+
+    nesneler = list(TABLOLAR) + [ad for ad, _, _ in gorunumler]
+    cur.execute("""
+        SELECT table_name, grantee, privilege_type FROM information_schema.role_table_grants
+        WHERE table_schema = 'public' AND table_name = ANY(%s) AND grantee <> current_user
+    """, (nesneler,))
+    yetkiler = cur.fetchall()
+    return indeksler, tetikleyiciler, gorunumler, yetkiler
+
+
+def kenara_al(cur, tablo):
+    cur.execute("""
+        SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = %s::REGCLASS
+    """, (tablo,))
+    for (indeks,) in cur.fetchall():
+        cur.execute(f'ALTER INDEX "{indeks}" RENAME TO "{indeks}_eski"')
+    cur.execute(f'ALTER TABLE {tablo} RENAME TO {tablo}_eski')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ileri', type=int, default=12, help='içinde bulunulan aydan sonra açılacak bölüm sayısı')
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    cur = conn.cursor()
+    start = time.perf_counter()
+
+    cur.execute('LOCK TABLE calisma_oturumlari, rezervasyonlar IN ACCESS EXCLUSIVE MODE')
+    bagimli = bagimliliklar(cur)
+    if bagimli is None:
+        print('Tablolar zaten bölümlü, geçiş gerekmiyor.')
+        conn.rollback()
+        return
+    indeksler, tetikleyiciler, gorunumler, yetkiler = bagimli
+
+    for dizi in DIZILER:
+        cur.execute(f'ALTER SEQUENCE {dizi} OWNED BY NONE')
+    for tablo in TABLOLAR:
+        kenara_al(cur, tablo)
+    cur.execute('DROP FUNCTION IF EXISTS fn_log_bolumlerini_hazirla(INTEGER)')
+    cur.execute('DROP FUNCTION IF EXISTS fn_log_bolumu_olustur(DATE)')
+    for parca in sema_parcalari():
+        cur.execute(parca)
+
+    cur.execute("SELECT fn_bolumleri_hazirla('log_kayitlari')")
+    cur.execute("""
+        SELECT COALESCE(MIN(baslangic_zamani), CURRENT_DATE)::DATE FROM rezervasyonlar_eski
+    """)
+    cur.execute('SELECT fn_bolumleri_hazirla(%s, %s, %s)', ('rezervasyonlar', args.ileri, cur.fetchone()[0]))
+    cur.execute("""
+        SELECT COALESCE(MIN(giris_zamani), CURRENT_DATE)::DATE FROM calisma_oturumlari_eski
+    """)
+    cur.execute('SELECT fn_bolumleri_hazirla(%s, %s, %s)', ('calisma_oturumlari', 3, cur.fetchone()[0]))
+
+    cur.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = 'rezervasyonlar_eski'
+        ORDER BY ordinal_position
+    """)
+    sutunlar = ', '.join(r[0] for r in cur.fetchall())
+    cur.execute(f'INSERT INTO rezervasyonlar ({sutunlar}) SELECT {sutunlar} FROM rezervasyonlar_eski')
+    print(f'rezervasyonlar: {cur.rowcount} satır')
+
+    cur.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = 'calisma_oturumlari_eski'
+        ORDER BY ordinal_position
+    """)
+    sutunlar = [r[0] for r in cur.fetchall()]
+    cur.execute(f"""
+        INSERT INTO calisma_oturumlari ({', '.join(sutunlar)}, rezervasyon_baslangic)
+        SELECT {', '.join('co.' + s for s in sutunlar)}, r.baslangic_zamani
+        FROM calisma_oturumlari_eski co
+        LEFT JOIN rezervasyonlar_eski r ON r.rezervasyon_id = co.rezervasyon_id
+    """)
+    print(f'calisma_oturumlari: {cur.rowcount} satır')
+
+    cur.execute('DROP TABLE calisma_oturumlari_eski, rezervasyonlar_eski CASCADE')
+    for tanim in indeksler:
+        cur.execute(tanim)
+    for ad, tur, tanim in gorunumler:
+        cur.execute(f"CREATE {'MATERIALIZED VIEW' if tur == 'm' else 'VIEW'} {ad} AS {tanim}")
+    for tanim in tetikleyiciler:
+        cur.execute(tanim)
+    for nesne, rol, yetki in yetkiler:
+        alici = rol if rol == 'PUBLIC' else f'"{rol}"'
+        cur.execute(f'GRANT {yetki} ON {nesne} TO {alici}')
+
+    conn.commit()
+    conn.autocommit = True
+    cur.execute('ANALYZE rezervasyonlar')
+    cur.execute('ANALYZE calisma_oturumlari')
+    conn.close()
+    print(f'Geçiş tamamlandı ({time.perf_counter() - start:.1f} sn): {len(indeksler)} indeks, '
+          f'{len(gorunumler)} görünüm, {len(tetikleyiciler)} tetikleyici yeniden kuruldu.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,432 @@
+"""Uygulamanın çalıştırdığı sorguların planlarını kayıtlı bir temel plana göre denetler.
+
+Kullanım:
+    python scripts/plan_harness.py --veri-hazirla --guncelle   # temel veriyi yükler, temel planı kaydeder
+    python scripts/plan_harness.py --veri-hazirla              # değişiklikten sonra aynı veriyle karşılaştırır
+    python scripts/plan_harness.py --filtre takvim
+
+Sorgular MODULLER'deki cur.execute() ve asyncpg (fetch*, execute, cursor) çağrılarından AST
+ile çıkarılır; asyncpg'nin $n yer tutucuları %s'e çevrilir. Parametreler, çağrıdaki
+ifadelerin metnine göre DEGERLER tablosundan, sentetik veride en yoğun kullanıcı/alan/güne
+göre doldurulur. Her sorgu EXPLAIN (ANALYZE, BUFFERS) ile
+ayrı bir işlemde çalıştırılıp geri alınır.
+
+auto_explain yüklenebiliyorsa (süper kullanıcı gerekir) plpgsql fonksiyonlarının ve
+tetikleyicilerin içindeki sorguların planları da "<anahtar>/ic<n>" anahtarlarıyla denetlenir.
+
+Plan şekli (düğüm tipi, tablo, indeks) değişirse ya da tahmini maliyet veya okunan blok
+sayısı eşiği aşarsa betik 1 ile çıkar. Parametresi çözülemeyen sorgular da hata sayılır.
+
+Planlar verinin boyutuna ve dağılımına bağlıdır; temel plan ve karşılaştırma aynı veriyle
+alınmalıdır. --veri-hazirla, sentetik kayıtları silip sentetik_veri.py'yi TEMEL_VERI ile
+(sabit tohum ve --bugun) yeniden yükler; kaydedilen temel plan bu parametreleri de tutar
+ve farklı veriyle alınmış bir temelle karşılaştırma hata sayılır; veri zaten bu
+parametrelerle yüklüyse --veri-hazirla atlanabilir. Temel plan
+(scripts/plan_temel.json) depoya eklenmelidir; yoksa betik ölçüm yapmadan 2 ile çıkar.
+"""
+import argparse
+import ast
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+from datetime import datetime, time, timedelta
+
+KOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, KOK)
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from db import DB_CONFIG
+
+MODULLER = ['app.py', 'doluluk.py', 'supurucu.py', 'api_async.py']
+# psycopg2 execute() ve asyncpg fetch*/execute/cursor çağrıları
+SORGU_METOTLARI = {'execute', 'fetch', 'fetchrow', 'fetchval', 'cursor'}
+ASYNCPG_PARAMETRE = re.compile(r'\$(\d+)')
+
+# Temel planın alındığı sentetik veri; değiştirilirse temel plan yeniden kaydedilmelidir.
+TEMEL_VERI = ['--tohum', '42', '--bugun', '2025-01-15', '--kullanici', '20000', '--alan', '500',
+              '--rezervasyon', '2000000', '--oturum', '4000000']
+
+# Bakım komutları tabloları kilitler ya da baştan yazar; plan denetimine alınmaz.
+ATLA = {
+    'app.py:ozet_yeniden_olustur',
+    'app.py:ozet_dogrula',
+    'app.py:sayac_onar',
+    'app.py:log_bakim',
+    'app.py:donem_arsivle',
+    'app.py:rezervasyon_supur',
+    'app.py:talep_modeli_guncelle',
+}
+
+# Uygulama dışından (psql, raporlar) kullanılan şema nesneleri.
+EK_SORGULAR = {
+    'schema:v_kullanici_istatistikleri': (
+        "SELECT * FROM v_kullanici_istatistikleri WHERE kullanici_id = %s", ("session['user_id']",)),
+    'schema:fn_kullanici_detay': (
+        "SELECT * FROM fn_kullanici_detay(%s)", ("session['user_id']",)),
+    'schema:fn_musait_alanlar_filtreli': (
+        "SELECT * FROM fn_musait_alanlar(%s, %s, NULL, NULL, NULL, TRUE, TRUE)", ('baslangic', 'bitis')),
+    # talep modeli okumaları
+    'schema:talep_modeli_haftagunu': (
+        "SELECT t.alan_id, t.saat, t.agirlik * (1 - d.sonum) AS sayi FROM talep_modeli t "
+        "CROSS JOIN talep_modeli_durum d WHERE t.haftagunu = %s", ('haftagunu',)),
+    'schema:talep_modeli_alan': (
+        "SELECT haftagunu, saat, agirlik FROM talep_modeli WHERE alan_id = %s", ('alan_id',)),
+    'schema:talep_modeli_kampus': (
+        "SELECT haftagunu, saat, agirlik FROM talep_modeli_kampus", None),
+    'schema:fn_yogunluk_bantlari': (
+        "SELECT * FROM fn_yogunluk_bantlari()", None),
+}
+
+
+def _tekrar_talepleri(o):
+    return json.dumps([
+        {'alan_id': o['alan'],
+         'baslangic': (o['baslangic'] + timedelta(weeks=i)).isoformat(),
+         'bitis': (o['bitis'] + timedelta(weeks=i)).isoformat(),
+         'notlar': 'plan testi'}
+        for i in range(4)
+    ])
+
+
+# cur.execute() parametrelerindeki ifade metni -> örnek değer
+DEGERLER = {
+    "session['user_id']": lambda o: o['kullanici'],
+    'ogrenci_no': lambda o: 'PLAN0000001',
+    'sifre': lambda o: 'plan',
+    'email': lambda o: 'plan@plan.test',
+    'ad': lambda o: 'Plan',
+    'soyad': lambda o: 'Test',
+    'yeni_sifre': lambda o: 'plan',
+    'notlar': lambda o: 'plan testi',
+    'durum': lambda o: 'iptal',
+    'alan_id': lambda o: o['alan'],
+    'baslangic': lambda o: o['baslangic'],
+    'bitis': lambda o: o['bitis'],
+    'rez_id': lambda o: o['rezervasyon'],
+    'oturum_id': lambda o: o['oturum'],
+    'verimlilik': lambda o: 8,
+    'tarih': lambda o: o['tarih'],
+    'sure': lambda o: 2,
+    'haftagunu': lambda o: o['tarih'].isoweekday(),
+    'json.dumps(talepler)': _tekrar_talepleri,
+    'tur or None': lambda o: None,
+    'konum or None': lambda o: None,
+    'query or None': lambda o: None,
+    'priz': lambda o: None,
+    'sessiz': lambda o: None,
+    'bas': lambda o: datetime.combine(o['tarih'], time()),
+    'bit': lambda o: datetime.combine(o['tarih'], time()) + timedelta(days=1),
+    'bas - MAX_REZERVASYON_SURESI': lambda o: datetime.combine(o['tarih'], time()) - timedelta(hours=4),
+    'ilk_gun': lambda o: None,
+    'son_gun': lambda o: None,
+    'rol': lambda o: None,
+    'aktif': lambda o: None,
+    'imlec_zaman': lambda o: None,
+    'imlec_id': lambda o: None,
+    'SAYFA_BOYUTU + 1': lambda o: 51,
+    'kullanici_id': lambda o: o['kullanici'],
+    'pencere_bas': lambda o: datetime.combine(o['tarih'], time()) - timedelta(days=7),
+    'pencere_bit': lambda o: datetime.combine(o['tarih'], time()) + timedelta(days=42),
+    'tablo': lambda o: 'rezervasyonlar',
+    'islem': lambda o: None,
+    'kayit_id': lambda o: None,
+    'kullanici': lambda o: o['kullanici'],
+    'request.state.kullanici_id': lambda o: o['kullanici'],
+    'tarih.isoweekday()': lambda o: o['tarih'].isoweekday(),
+    "rezervasyon['durum']": lambda o: 'aktif',
+    "rezervasyon['alan_id']": lambda o: o['alan'],
+    "rezervasyon['baslangic_zamani']": lambda o: o['baslangic'],
+    "rezervasyon['bitis_zamani']": lambda o: o['bitis'],
+    "p.get('tur') or None": lambda o: None,
+    "p.get('konum') or None": lambda o: None,
+    "p.get('q') or None": lambda o: None,
+    "True if p.get('priz') else None": lambda o: None,
+    "True if p.get('sessiz') else None": lambda o: None,
+    'self.parti': lambda o: 500,
+    'self.tolerans': lambda o: timedelta(minutes=15),
+}
+
+
+def _asyncpg_donustur(sql, ifadeler):
+    """asyncpg'nin $n yer tutucularını %s'e çevirir; tekrar eden $n için ifade tekrarlanır."""
+    sira = []
+
+    def degistir(m):
+        sira.append(ifadeler[int(m.group(1)) - 1])
+        return '%s'
+
+    return ASYNCPG_PARAMETRE.sub(degistir, sql.replace('%', '%%')), tuple(sira)
+
+
+def sorgulari_cikar():
+    """{anahtar: (sql, parametre ifadeleri ya da None)} döndürür; anahtar modul:fonksiyon#sira."""
+    sorgular = {}
+    for modul in MODULLER:
+        with open(os.path.join(KOK, modul), encoding='utf-8') as f:
+            agac = ast.parse(f.read())
+        for fonk in ast.walk(agac):
+            if not isinstance(fonk, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            cagrilar = sorted(
+                (c for c in ast.walk(fonk)
+                 if isinstance(c, ast.Call) and isinstance(c.func, ast.Attribute)
+                 and c.func.attr in SORGU_METOTLARI and c.args
+                 and isinstance(c.args[0], ast.Constant) and isinstance(c.args[0].value, str)),
+                key=lambda c: c.lineno)
+            for sira, cagri in enumerate(cagrilar):
+                anahtar = f'{modul}:{fonk.name}#{sira}'
+                if anahtar.split('#')[0] in ATLA:
+                    continue
+                sql = cagri.args[0].value
+                ifadeler = None
+                if ASYNCPG_PARAMETRE.search(sql):
+                    sql, ifadeler = _asyncpg_donustur(sql, [ast.unparse(e) for e in cagri.args[1:]])
+                elif len(cagri.args) > 1:
+                    parametre = cagri.args[1]
+                    if isinstance(parametre, ast.Tuple):
+                        ifadeler = tuple(ast.unparse(e) for e in parametre.elts)
+                    else:
+                        ifadeler = (ast.unparse(parametre),)
+                sorgular[anahtar] = (sql, ifadeler)
+    sorgular.update(EK_SORGULAR)
+    return sorgular
+
+
+def ornekleri_bul(cur):
+    cur.execute("""
+        SELECT kullanici_id FROM kullanici_sayaclari
+        ORDER BY rez_aktif + rez_iptal + rez_tamamlandi DESC, kullanici_id LIMIT 1
+    """)
+    kullanici = cur.fetchone()['kullanici_id']
+    cur.execute("""
+        SELECT alan_id FROM ozet_alan_toplam
+        ORDER BY rez_aktif + rez_iptal + rez_tamamlandi DESC, alan_id LIMIT 1
+    """)
+    alan = cur.fetchone()['alan_id']
+    cur.execute("""
+        SELECT tarih FROM ozet_rezervasyon_saatlik
+        GROUP BY tarih ORDER BY SUM(sayi) DESC, tarih LIMIT 1
+    """)
+    tarih = cur.fetchone()['tarih']
+    cur.execute("""
+        SELECT MAX(rezervasyon_id) AS id FROM rezervasyonlar WHERE kullanici_id = %s
+    """, (kullanici,))
+    rezervasyon = cur.fetchone()['id']
+    cur.execute("""
+        SELECT MAX(oturum_id) AS id FROM calisma_oturumlari WHERE kullanici_id = %s
+    """, (kullanici,))
+    oturum = cur.fetchone()['id']
+    return {
+        'kullanici': kullanici,
+        'alan': alan,
+        'tarih': tarih,
+        'baslangic': datetime.combine(tarih, time(10)),
+        'bitis': datetime.combine(tarih, time(12)),
+        'rezervasyon': rezervasyon or 0,
+        'oturum': oturum or 0,
+    }
+
+
+def plan_ozeti(plan):
+    sekil = []
+
+    def gez(dugum, derinlik):
+        parca = dugum['Node Type']
+        if 'Relation Name' in dugum:
+            parca += f" {dugum['Relation Name']}"
+        if 'Index Name' in dugum:
+            parca += f" [{dugum['Index Name']}]"
+        sekil.append('  ' * derinlik + parca)
+        for alt in dugum.get('Plans', ()):
+            gez(alt, derinlik + 1)
+
+    gez(plan, 0)
+    return {
+        'sekil': sekil,
+        'maliyet': plan['Total Cost'],
+        'blok': plan.get('Shared Hit Blocks', 0) + plan.get('Shared Read Blocks', 0),
+    }
+
+
+def auto_explain_ac(cur):
+    try:
+        cur.execute("LOAD 'auto_explain'")
+    except psycopg2.Error:
+        cur.connection.rollback()
+        return False
+    cur.execute("""
+        SET auto_explain.log_min_duration = 0;
+        SET auto_explain.log_analyze = on;
+        SET auto_explain.log_buffers = on;
+        SET auto_explain.log_timing = off;
+        SET auto_explain.log_nested_statements = on;
+        SET auto_explain.log_format = 'json';
+        SET auto_explain.log_level = 'notice';
+    """)
+    cur.connection.commit()
+    return True
+
+
+def ic_planlar(bildirimler):
+    """auto_explain bildirimlerinden sorgu metni başına tek bir plan özeti çıkarır."""
+    planlar = {}
+    for bildirim in bildirimler:
+        if '{' not in bildirim:
+            continue
+        try:
+            veri = json.loads(bildirim[bildirim.index('{'):])
+        except ValueError:
+            continue
+        metin = veri.get('Query Text', '')
+        if metin.lstrip().upper().startswith('EXPLAIN'):
+            continue
+        ozet = plan_ozeti(veri['Plan'])
+        if metin in planlar:
+            # döngüde tekrar çalışan sorgu: en pahalı planı ve toplam blok okumasını tut
+            onceki = planlar[metin]
+            onceki['blok'] += ozet['blok']
+            if ozet['maliyet'] > onceki['maliyet']:
+                onceki['sekil'], onceki['maliyet'] = ozet['sekil'], ozet['maliyet']
+        else:
+            planlar[metin] = ozet
+    return list(planlar.items())
+
+
+def olc(conn, sorgular, ornekler, filtre, ic_dahil):
+    sonuc = {}
+    hatalar = []
+    cur = conn.cursor()
+    for anahtar, (sql, ifadeler) in sorted(sorgular.items()):
+        if filtre and filtre not in anahtar:
+            continue
+        parametreler = None
+        if ifadeler is not None:
+            eksik = [i for i in ifadeler if i not in DEGERLER]
+            if eksik:
+                hatalar.append(f'{anahtar}: parametre değeri tanımlı değil: {", ".join(eksik)}')
+                continue
+            parametreler = tuple(DEGERLER[i](ornekler) for i in ifadeler)
+
+        del conn.notices[:]
+        try:
+            cur.execute('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + sql, parametreler)
+            plan = cur.fetchone()['QUERY PLAN'][0]['Plan']
+        except psycopg2.Error as e:
+            hatalar.append(f'{anahtar}: {str(e).strip()}')
+            continue
+        finally:
+            conn.rollback()
+
+        ozet = plan_ozeti(plan)
+        ozet['sql'] = hashlib.sha1(sql.encode()).hexdigest()[:12]
+        sonuc[anahtar] = ozet
+        if ic_dahil:
+            for sira, (metin, ic) in enumerate(ic_planlar(conn.notices)):
+                ic['sql'] = hashlib.sha1(metin.encode()).hexdigest()[:12]
+                sonuc[f'{anahtar}/ic{sira}'] = ic
+    cur.close()
+    return sonuc, hatalar
+
+
+def karsilastir(temel, simdiki, esik_maliyet, esik_blok, min_blok):
+    sorunlar = []
+    for anahtar, yeni in sorted(simdiki.items()):
+        eski = temel.get(anahtar)
+        if eski is None:
+            sorunlar.append(f'{anahtar}: temel planda yok (--guncelle ile ekleyin)')
+            continue
+        if eski['sql'] != yeni['sql']:
+            sorunlar.append(f'{anahtar}: sorgu metni değişmiş, temel plan yenilenmeli')
+            continue
+        if eski['sekil'] != yeni['sekil']:
+            sorunlar.append(f'{anahtar}: plan şekli değişti\n    önce:\n      '
+                            + '\n      '.join(eski['sekil'])
+                            + '\n    şimdi:\n      ' + '\n      '.join(yeni['sekil']))
+        if yeni['maliyet'] > eski['maliyet'] * (1 + esik_maliyet):
+            sorunlar.append(f"{anahtar}: tahmini maliyet {eski['maliyet']:.1f} -> {yeni['maliyet']:.1f}")
+        if yeni['blok'] > max(eski['blok'] * (1 + esik_blok), eski['blok'] + min_blok):
+            sorunlar.append(f"{anahtar}: okunan blok {eski['blok']} -> {yeni['blok']}")
+    return sorunlar
+
+
+def veri_hazirla():
+    betik = os.path.join(KOK, 'scripts', 'sentetik_veri.py')
+    subprocess.run([sys.executable, betik, '--sil'], check=True)
+    subprocess.run([sys.executable, betik, *TEMEL_VERI], check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--temel', default=os.path.join(KOK, 'scripts', 'plan_temel.json'))
+    parser.add_argument('--guncelle', action='store_true', help='ölçülen planları temel olarak kaydet')
+    parser.add_argument('--veri-hazirla', action='store_true',
+                        help='ölçümden önce sentetik veriyi TEMEL_VERI ile yeniden yükle')
+    parser.add_argument('--filtre', default=None, help='yalnızca anahtarında bu metin geçen sorgular')
+    parser.add_argument('--esik-maliyet', type=float, default=0.25, help='izin verilen maliyet artışı (oran)')
+    parser.add_argument('--esik-blok', type=float, default=0.25, help='izin verilen blok artışı (oran)')
+    parser.add_argument('--min-blok', type=int, default=50, help='küçük sorgularda göz ardı edilen blok farkı')
+    args = parser.parse_args()
+
+    if not args.guncelle and not os.path.exists(args.temel):
+        print(f'HATA: temel plan bulunamadı: {os.path.normpath(args.temel)}\n'
+              'Karşılaştırma için önce değişiklikten önceki kodla temel planı üretip depoya ekleyin:\n'
+              '    python scripts/plan_harness.py --veri-hazirla --guncelle\n'
+              '    git add scripts/plan_temel.json', file=sys.stderr)
+        sys.exit(2)
+
+    if args.veri_hazirla:
+        veri_hazirla()
+
+    conn = psycopg2.connect(**DB_CONFIG, cursor_factory=RealDictCursor)
+    cur = conn.cursor()
+    # Paralel plan ve JIT kararları makine yüküne göre değişir; karşılaştırmayı bozmasınlar.
+    cur.execute("SET max_parallel_workers_per_gather = 0; SET jit = off")
+    ornekler = ornekleri_bul(cur)
+    conn.commit()
+    ic_dahil = auto_explain_ac(cur)
+    cur.close()
+    if not ic_dahil:
+        print('uyarı: auto_explain yüklenemedi, fonksiyon içi sorgular denetlenmeyecek')
+    print('örnek değerler:', {k: str(v) for k, v in ornekler.items()})
+
+    simdiki, hatalar = olc(conn, sorgulari_cikar(), ornekler, args.filtre, ic_dahil)
+    conn.close()
+
+    for hata in hatalar:
+        print('HATA', hata)
+
+    if args.guncelle:
+        temel = {}
+        if args.filtre and os.path.exists(args.temel):
+            with open(args.temel, encoding='utf-8') as f:
+                temel = json.load(f)
+        temel.update(simdiki)
+        temel['_veri'] = TEMEL_VERI if args.veri_hazirla else temel.get('_veri')
+        with open(args.temel, 'w', encoding='utf-8') as f:
+            json.dump(temel, f, ensure_ascii=False, indent=1, sort_keys=True)
+        print(f'{len(simdiki)} plan {args.temel} dosyasına kaydedildi')
+        sys.exit(1 if hatalar else 0)
+
+    with open(args.temel, encoding='utf-8') as f:
+        temel = json.load(f)
+    if temel.get('_veri') != TEMEL_VERI:
+        hatalar.append(f"temel plan farklı veriyle alınmış ({temel.get('_veri')}); "
+                       '--veri-hazirla --guncelle ile yeniden kaydedin')
+        print('HATA', hatalar[-1])
+    elif not args.veri_hazirla:
+        print('uyarı: veritabanındaki sentetik verinin TEMEL_VERI ile yüklendiği varsayılıyor')
+
+    sorunlar = karsilastir(temel, simdiki, args.esik_maliyet, args.esik_blok, args.min_blok)
+    for sorun in sorunlar:
+        print('GERİLEME', sorun)
+    print(f'{len(simdiki)} plan denetlendi, {len(sorunlar)} gerileme, {len(hatalar)} hata')
+    sys.exit(1 if sorunlar or hatalar else 0)
+
+
+if __name__ == '__main__':
+    main()
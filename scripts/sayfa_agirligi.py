@@ -0,0 +1,128 @@
+"""Sayfaların aktarılan boyutunu ve ilk bayta kadar geçen süreyi (TTFB) ölçer.
+
+Kullanım:
+    python scripts/sayfa_agirligi.py
+    python scripts/sayfa_agirligi.py --tekrar 50 --cikti once.json
+    python scripts/sayfa_agirligi.py --tekrar 50 --karsilastir once.json
+
+Her sayfa --tekrar kez istenir; TTFB ve toplam süre medyanı yazdırılır. HTML'in ağ üzerindeki
+boyutu, içindeki satır içi <style>/<script> miktarı ve sayfanın bağladığı yerel CSS/JS
+dosyaları ölçülür. "ilk ziyaret" HTML ile tüm yerel dosyaların toplamıdır. "tekrar" ise
+önbellekte tutulabilen (max-age'li) dosyalar çıkarıldığında kalan toplamdır.
+Değişiklik öncesi ve sonrası aynı komutla çalıştırılıp --karsilastir ile yan yana konabilir.
+"""
+import argparse
+import http.client
+import json
+import re
+import statistics
+import time
+import urllib.parse
+
+ANONIM_SAYFALAR = ['/', '/login']
+OGRENCI_SAYFALARI = ['/dashboard', '/takvim', '/istatistikler', '/rezervasyon/yeni', '/oturum/baslat']
+BAGLANTI = re.compile(r'<(?:link[^>]+href|script[^>]+src)="(/[^"]+)"')
+SATIR_ICI = re.compile(r'<(style|script)(?![^>]*\ssrc=)[^>]*>(.*?)</\1>', re.S)
+
+
+class Olcer:
+    def __init__(self, url, kodlama):
+        self.adres = urllib.parse.urlsplit(url)
+        self.kodlama = kodlama
+        self.cerez = ''
+
+    def getir(self, yol, form=None):
+        conn = http.client.HTTPConnection(self.adres.hostname, self.adres.port, timeout=60)
+        basliklar = {'Cookie': self.cerez, 'Accept-Encoding': self.kodlama}
+        govde = None
+        if form is not None:
+            govde = urllib.parse.urlencode(form)
+            basliklar['Content-Type'] = 'application/x-www-form-urlencoded'
+        start = time.perf_counter()
+        conn.request('POST' if form is not None else 'GET', yol, govde, basliklar)
+        yanit = conn.getresponse()
+        ttfb = time.perf_counter() - start
+        icerik = yanit.read()
+        toplam = time.perf_counter() - start
+        conn.close()
+        cerez = yanit.getheader('Set-Cookie')
+        if cerez:
+            self.cerez = cerez.split(';')[0]
+        return yanit, icerik, ttfb, toplam
+
+    def sayfa(self, yol, tekrar):
+        ttfb, sure = [], []
+        for _ in range(tekrar):
+            yanit, icerik, t, s = self.getir(yol)
+            ttfb.append(t * 1000)
+            sure.append(s * 1000)
+        html = self._coz(yanit, icerik)
+        satir_ici = sum(len(m.group(2).encode()) for m in SATIR_ICI.finditer(html))
+        varlik, tekrar_varlik = 0, 0
+        for bag in dict.fromkeys(BAGLANTI.findall(html)):
+            v, v_icerik, _, _ = self.getir(bag)
+            varlik += len(v_icerik)
+            if 'max-age' not in (v.getheader('Cache-Control') or '') or 'max-age=0' in v.getheader('Cache-Control'):
+                tekrar_varlik += len(v_icerik)
+        return {
+            'durum': yanit.status,
+            'ttfb_ms': statistics.median(ttfb),
+            'sure_ms': statistics.median(sure),
+            'html': len(icerik),
+            'satir_ici': satir_ici,
+            'ilk_ziyaret': len(icerik) + varlik,
+            'tekrar': len(icerik) + tekrar_varlik,
+        }
+
+    @staticmethod
+    def _coz(yanit, icerik):
+        kodlama = yanit.getheader('Content-Encoding')
+        if kodlama == 'gzip':
+            import gzip
+            icerik = gzip.decompress(icerik)
+        elif kodlama == 'br':
+            import brotli
+            icerik = brotli.decompress(icerik)
+        return icerik.decode('utf-8', 'replace')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5001')
+    parser.add_argument('--ogrenci-no', default='20210001')
+    parser.add_argument('--sifre', default='sifre123')
+    parser.add_argument('--tekrar', type=int, default=20)
+    parser.add_argument('--kodlama', default='br, gzip', help='gönderilecek Accept-Encoding')
+    parser.add_argument('--cikti', help='sonuçların yazılacağı JSON dosyası')
+    parser.add_argument('--karsilastir', help='karşılaştırılacak önceki JSON çıktısı')
+    args = parser.parse_args()
+
+    olcer = Olcer(args.url, args.kodlama)
+    sonuc = {yol: olcer.sayfa(yol, args.tekrar) for yol in ANONIM_SAYFALAR}
+    yanit, _, _, _ = olcer.getir('/login', {'ogrenci_no': args.ogrenci_no, 'sifre': args.sifre})
+    if yanit.status != 302:
+        raise SystemExit('Giriş başarısız.')
+    sonuc.update({yol: olcer.sayfa(yol, args.tekrar) for yol in OGRENCI_SAYFALARI})
+
+    onceki = None
+    if args.karsilastir:
+        with open(args.karsilastir, encoding='utf-8') as f:
+            onceki = json.load(f)
+    print(f"{'sayfa':<20} {'TTFB ms':>8} {'süre ms':>8} {'HTML B':>8} {'satır içi':>10} {'ilk ziyaret':>12} {'tekrar':>8}"
+          + ('   Δilk ziyaret   ΔTTFB' if onceki else ''))
+    for yol, o in sonuc.items():
+        satir = (f"{yol:<20} {o['ttfb_ms']:>8.1f} {o['sure_ms']:>8.1f} {o['html']:>8} {o['satir_ici']:>10} "
+                 f"{o['ilk_ziyaret']:>12} {o['tekrar']:>8}")
+        if onceki and yol in onceki:
+            e = onceki[yol]
+            satir += (f"   {(o['ilk_ziyaret'] / e['ilk_ziyaret'] - 1) * 100:>+11.1f}%"
+                      f" {(o['ttfb_ms'] / e['ttfb_ms'] - 1) * 100:>+6.1f}%")
+        print(satir)
+
+    if args.cikti:
+        with open(args.cikti, 'w', encoding='utf-8') as f:
+            json.dump(sonuc, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
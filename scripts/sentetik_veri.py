@@ -0,0 +1,346 @@
+"""Performans ölçümleri için kampüs ölçeğinde, tekrarlanabilir bir sentetik veri kümesi yükler.
+
+Kullanım:
+    python scripts/sentetik_veri.py
+    python scripts/sentetik_veri.py --kullanici 50000 --alan 2000 --rezervasyon 10000000 --oturum 20000000
+    python scripts/sentetik_veri.py --tohum 7 --bugun 2025-01-15
+    python scripts/sentetik_veri.py --sil
+
+Aynı --tohum ve parametrelerle her çalıştırmada aynı veri üretilir; tarihler --bugun'e
+göredir (varsayılan: bugün), bu yüzden farklı günlerde tam aynı kümeyi almak için --bugun
+sabitlenmelidir. Satırlar COPY ile, tek işlemde yazılır.
+
+Kullanıcılar 'SENT' önekli öğrenci numarasıyla (şifre: sentetik), alanlar 'Sentetik' önekli
+adla eklenir. Rezervasyonlar --gun günlük pencerenin üçte ikisi geçmişte kalacak şekilde,
+08:00-22:00 arasında saat ve hafta günü ağırlıklarıyla dağıtılır; alan kapasitesi ve
+kullanıcının aynı anda tek yerde olması gözetilir. Geçmişteki tamamlanan rezervasyonlara
+bağlı oturumlar açılır, --oturum'a kalan kısım rezervasyonsuz (kapıdan) oturumlarla doldurulur.
+
+Yükleme tetikleyiciler kapalıyken (session_replication_role = replica) yapılır; bu yüzden
+veritabanı kullanıcısının süper kullanıcı olması gerekir. Sonunda özet tabloları, kullanıcı
+sayaçları ve toplam çalışma süreleri yeniden hesaplanır. --sil sentetik kayıtları kaldırır.
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from itertools import accumulate
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import psycopg2
+
+from db import DB_CONFIG
+from doluluk import DILIM_DAKIKA, GUNLUK_DILIM
+
+ADLAR = ['Ahmet', 'Ayşe', 'Mehmet', 'Fatma', 'Ali', 'Zeynep', 'Mustafa', 'Elif', 'Emre', 'Merve',
+         'Burak', 'Esra', 'Can', 'Selin', 'Deniz', 'Ece', 'Kerem', 'Büşra', 'Onur', 'İrem']
+SOYADLAR = ['Yılmaz', 'Kaya', 'Demir', 'Çelik', 'Şahin', 'Yıldız', 'Yıldırım', 'Öztürk', 'Aydın',
+            'Özdemir', 'Arslan', 'Doğan', 'Kılıç', 'Aslan', 'Çetin', 'Kara', 'Koç', 'Kurt']
+
+SAAT_DILIM = 60 // DILIM_DAKIKA
+ACILIS, KAPANIS = 8 * SAAT_DILIM, 22 * SAAT_DILIM
+# 08:00-21:00 başlangıç saatlerinin göreli ağırlıkları: öğleden önce ve öğleden sonra iki tepe
+SAAT_AGIRLIK = [3, 5, 8, 9, 7, 6, 7, 8, 8, 7, 6, 5, 4, 2]
+HAFTA_AGIRLIK = [1.0, 1.0, 1.0, 1.0, 0.85, 0.45, 0.35]
+# rezervasyon süresi (saat) dağılımı
+SURE_SAAT = [1, 2, 3, 4]
+SURE_AGIRLIK = [3, 5, 3, 1]
+DENEME = 8
+
+
+def calistir(cur, aciklama, sorgu, parametreler=None):
+    start = time.perf_counter()
+    cur.execute(sorgu, parametreler)
+    print(f"{aciklama:<28} {cur.rowcount:>10} satır  {time.perf_counter() - start:7.1f} sn")
+
+
+def saat_metni(gun, dakika):
+    return f'{gun} {dakika // 60:02d}:{dakika % 60:02d}:00'
+
+
+def kotalar(gunler, toplam):
+    """toplam'ı günlere hafta günü ağırlığıyla, yuvarlama kaybı olmadan dağıtır."""
+    agirliklar = [HAFTA_AGIRLIK[g.weekday()] for g in gunler]
+    birikimli = list(accumulate(agirliklar))
+    onceki = 0
+    sonuc = []
+    for b in birikimli:
+        simdi = round(toplam * b / birikimli[-1])
+        sonuc.append(simdi - onceki)
+        onceki = simdi
+    return sonuc
+
+
+class Kopyalayici:
+    """Satırları bellekte biriktirip parça parça COPY ile gönderir."""
+
+    def __init__(self, cur, tablo, sutunlar, parca):
+        self.cur = cur
+        self.sorgu = f"COPY {tablo} ({', '.join(sutunlar)}) FROM STDIN"
+        self.parca = parca
+        self.tampon = []
+        self.toplam = 0
+
+    def ekle(self, *degerler):
+        self.tampon.append('\t'.join(r'\N' if d is None else str(d) for d in degerler))
+        if len(self.tampon) >= self.parca:
+            self.gonder()
+
+    def gonder(self):
+        if self.tampon:
+            self.cur.copy_expert(self.sorgu, io.StringIO('\n'.join(self.tampon) + '\n'))
+            self.toplam += len(self.tampon)
+            self.tampon = []
+
+
+class Uretici:
+    def __init__(self, rng, kullanicilar, alanlar):
+        self.rng = rng
+        self.kullanicilar = kullanicilar
+        self.alanlar = alanlar
+        # birkaç çok aktif öğrenci ve çok tercih edilen alan: Pareto ağırlıkları
+        self.kullanici_agirlik = list(accumulate(min(rng.paretovariate(1.2), 50) for _ in kullanicilar))
+        self.alan_agirlik = list(accumulate(min(rng.paretovariate(1.5), 20) for _ in alanlar))
+        self.saat_agirlik = list(accumulate(SAAT_AGIRLIK))
+        self.sure_agirlik = list(accumulate(SURE_AGIRLIK))
+        self.saatler = list(range(ACILIS // SAAT_DILIM, ACILIS // SAAT_DILIM + len(SAAT_AGIRLIK)))
+
+    def gun_baslat(self):
+        self.doluluk = [bytearray(GUNLUK_DILIM) for _ in self.alanlar]
+        self.mesgul = {}
+
+    def yerlestir(self, sure_dilim, kapasite_gozet=True):
+        """Kapasitesi ve kullanıcısı uygun (kullanici_id, alan_id, ilk_dilim) döndürür; bulunamazsa None."""
+        rng = self.rng
+        for _ in range(DENEME):
+            k = rng.choices(range(len(self.kullanicilar)), cum_weights=self.kullanici_agirlik)[0]
+            a = rng.choices(range(len(self.alanlar)), cum_weights=self.alan_agirlik)[0]
+            saat = rng.choices(self.saatler, cum_weights=self.saat_agirlik)[0]
+            ilk = saat * SAAT_DILIM + rng.randrange(SAAT_DILIM)
+            son = min(ilk + sure_dilim, KAPANIS)
+            maske = ((1 << (son - ilk)) - 1) << ilk
+            if self.mesgul.get(k, 0) & maske:
+                continue
+            if kapasite_gozet:
+                dilimler = self.doluluk[a]
+                if max(dilimler[ilk:son]) >= self.alanlar[a][1]:
+                    continue
+                for i in range(ilk, son):
+                    dilimler[i] += 1
+                self.mesgul[k] = self.mesgul.get(k, 0) | maske
+            return self.kullanicilar[k], self.alanlar[a][0], ilk, son
+        return None
+
+    def rezervasyon_suresi(self):
+        return self.rng.choices(SURE_SAAT, cum_weights=self.sure_agirlik)[0] * SAAT_DILIM
+
+    def oturum_suresi(self):
+        return self.rng.randint(2, 4 * SAAT_DILIM)
+
+    def verimlilik(self):
+        if self.rng.random() < 0.15:
+            return None
+        return min(10, max(1, round(self.rng.triangular(1, 10, 7))))
+
+
+def bolumleri_hazirla(cur, ilk_gun, son_gun):
+    bugun = date.today()
+    ileri = max(0, (son_gun.year - bugun.year) * 12 + son_gun.month - bugun.month) + 1
+    for tablo in ('rezervasyonlar', 'calisma_oturumlari'):
+        calistir(cur, f'{tablo} bölümleri', "SELECT fn_bolumleri_hazirla(%s, %s, %s)",
+                 (tablo, ileri, ilk_gun))
+
+
+def sira_ayir(cur, sira, adet):
+    """Diziden ardışık adet kimlik ayırır ve ilkini döndürür."""
+    cur.execute("SELECT nextval(%s) AS ilk", (sira,))
+    ilk = cur.fetchone()[0]
+    cur.execute("SELECT setval(%s, %s)", (sira, ilk + adet))
+    return ilk
+
+
+def olustur(cur, args):
+    cur.execute("SELECT 1 FROM kullanicilar WHERE ogrenci_no LIKE 'SENT%%' LIMIT 1")
+    if cur.fetchone():
+        raise SystemExit('Sentetik veri zaten yüklü; önce --sil ile kaldırın.')
+
+    rng = random.Random(args.tohum)
+    ilk_gun = args.bugun - timedelta(days=args.gun * 2 // 3)
+    gunler = [ilk_gun + timedelta(days=i) for i in range(args.gun)]
+    gecmis = [g for g in gunler if g < args.bugun]
+
+    cur.execute("SET session_replication_role = replica")
+    bolumleri_hazirla(cur, ilk_gun, gunler[-1])
+
+    start = time.perf_counter()
+    k = Kopyalayici(cur, 'kullanicilar',
+                    ('ogrenci_no', 'ad', 'soyad', 'email', 'sifre', 'rol', 'kayit_tarihi'), args.parca)
+    for i in range(1, args.kullanici + 1):
+        kayit = ilk_gun - timedelta(days=rng.randrange(4 * 365))
+        k.ekle(f'SENT{i:07d}', rng.choice(ADLAR), rng.choice(SOYADLAR),
+               f'sent{i}@std.yildiz.edu.tr', 'sentetik', 'ogrenci', f'{kayit} 09:00:00')
+    k.gonder()
+    print(f"{'kullanicilar':<28} {k.toplam:>10} satır  {time.perf_counter() - start:7.1f} sn")
+
+    start = time.perf_counter()
+    cur.execute("SELECT tur_id, max_kapasite FROM alan_turleri ORDER BY tur_id")
+    turler = cur.fetchall()
+    a = Kopyalayici(cur, 'calisma_alanlari',
+                    ('alan_adi', 'tur_id', 'konum', 'kapasite', 'priz_var', 'sessiz_alan'), args.parca)
+    for i in range(1, args.alan + 1):
+        tur_id, max_kapasite = turler[i % len(turler)]
+        a.ekle(f'Sentetik {i}', tur_id, f'Sentetik Blok {i % 40}',
+               rng.randint(1, min(50, max_kapasite)), rng.random() < 0.65, rng.random() < 0.25)
+    a.gonder()
+    print(f"{'calisma_alanlari':<28} {a.toplam:>10} satır  {time.perf_counter() - start:7.1f} sn")
+
+    cur.execute("SELECT kullanici_id FROM kullanicilar WHERE ogrenci_no LIKE 'SENT%%' ORDER BY ogrenci_no")
+    kullanicilar = [r[0] for r in cur.fetchall()]
+    cur.execute("""
+        SELECT alan_id, kapasite FROM calisma_alanlari
+        WHERE alan_adi LIKE 'Sentetik %%' ORDER BY alan_id
+    """)
+    uretici = Uretici(rng, kullanicilar, cur.fetchall())
+
+    rez_id = sira_ayir(cur, 'rezervasyon_seq', args.rezervasyon)
+    oturum_id = sira_ayir(cur, 'oturum_seq', args.oturum)
+    rez = Kopyalayici(cur, 'rezervasyonlar',
+                      ('rezervasyon_id', 'kullanici_id', 'alan_id', 'baslangic_zamani', 'bitis_zamani',
+                       'durum', 'olusturma_zamani', 'notlar'), args.parca)
+    oturum = Kopyalayici(cur, 'calisma_oturumlari',
+                         ('oturum_id', 'rezervasyon_id', 'rezervasyon_baslangic', 'kullanici_id', 'alan_id',
+                          'giris_zamani', 'cikis_zamani', 'verimlilik_puani'), args.parca)
+
+    oturum_kotalari = dict(zip(gecmis, kotalar(gecmis, args.oturum))) if gecmis else {}
+    atlanan = 0
+    start = time.perf_counter()
+    for gun, rez_kota in zip(gunler, kotalar(gunler, args.rezervasyon)):
+        uretici.gun_baslat()
+        gecti = gun < args.bugun
+        oturum_kota = oturum_kotalari.get(gun, 0)
+        for _ in range(rez_kota):
+            d = rng.random()
+            if gecti:
+                durum = 'iptal' if d < 0.15 else 'tamamlandi'
+            else:
+                durum = 'iptal' if d < 0.10 else 'aktif'
+            yer = uretici.yerlestir(uretici.rezervasyon_suresi(), durum != 'iptal')
+            if yer is None:
+                atlanan += 1
+                continue
+            kullanici_id, alan_id, ilk, son = yer
+            baslangic = saat_metni(gun, ilk * DILIM_DAKIKA)
+            olusturma = gun - timedelta(days=rng.randrange(15))
+            rez.ekle(rez_id, kullanici_id, alan_id, baslangic, saat_metni(gun, son * DILIM_DAKIKA),
+                     durum, f'{olusturma} {rng.randrange(8, 23):02d}:{rng.randrange(60):02d}:00', 'sentetik')
+            if durum == 'tamamlandi' and oturum_kota > 0:
+                giris = ilk * DILIM_DAKIKA + rng.randrange(11)
+                cikis = son * DILIM_DAKIKA - rng.randrange(16)
+                oturum.ekle(oturum_id, rez_id, baslangic, kullanici_id, alan_id,
+                            saat_metni(gun, giris), saat_metni(gun, max(cikis, giris + 5)), uretici.verimlilik())
+                oturum_id += 1
+                oturum_kota -= 1
+            rez_id += 1
+
+        for _ in range(oturum_kota):
+            yer = uretici.yerlestir(uretici.oturum_suresi())
+            if yer is None:
+                atlanan += 1
+                continue
+            kullanici_id, alan_id, ilk, son = yer
+            giris = ilk * DILIM_DAKIKA + rng.randrange(DILIM_DAKIKA)
+            cikis = son * DILIM_DAKIKA - rng.randrange(DILIM_DAKIKA)
+            oturum.ekle(oturum_id, None, None, kullanici_id, alan_id,
+                        saat_metni(gun, giris), saat_metni(gun, max(cikis, giris + 5)), uretici.verimlilik())
+            oturum_id += 1
+
+        if gun.day == 1 or gun == gunler[-1]:
+            print(f"{gun:%Y-%m} kadar          {rez.toplam + len(rez.tampon):>10} rez. "
+                  f"{oturum.toplam + len(oturum.tampon):>10} oturum  {time.perf_counter() - start:7.1f} sn")
+    rez.gonder()
+    oturum.gonder()
+    print(f"{'rezervasyonlar':<28} {rez.toplam:>10} satır")
+    print(f"{'calisma_oturumlari':<28} {oturum.toplam:>10} satır")
+    if atlanan:
+        print(f"{'kapasite/çakışma nedeniyle':<28} {atlanan:>10} kayıt atlandı")
+
+    cur.execute("SET session_replication_role = DEFAULT")
+    calistir(cur, 'toplam_calisma_suresi', """
+        UPDATE kullanicilar k
+        SET toplam_calisma_suresi = s.dakika
+        FROM (
+            SELECT kullanici_id, SUM((EXTRACT(EPOCH FROM (cikis_zamani - giris_zamani)) / 60)::INTEGER) AS dakika
+            FROM calisma_oturumlari
+            WHERE cikis_zamani IS NOT NULL
+            GROUP BY kullanici_id
+        ) s
+        WHERE s.kullanici_id = k.kullanici_id AND k.ogrenci_no LIKE 'SENT%%'
+    """)
+    yeniden_hesapla(cur)
+
+
+def yeniden_hesapla(cur):
+    calistir(cur, 'özet tabloları', "SELECT fn_ozet_yeniden_olustur()")
+    calistir(cur, 'kullanıcı sayaçları', "SELECT fn_kullanici_sayac_onar()")
+    calistir(cur, 'talep modeli', "SELECT fn_talep_modeli_yeniden_olustur()")
+    # tetikleyiciler kapalıyken bildirim gitmedi; çalışan uygulamalar alan kataloğunu yenilesin
+    cur.execute("SELECT pg_notify('katalog_degisti', 'calisma_alanlari')")
+
+
+def sil(cur):
+    cur.execute("SET session_replication_role = replica")
+    sentetik_kullanici = "SELECT kullanici_id FROM kullanicilar WHERE ogrenci_no LIKE 'SENT%%'"
+    sentetik_alan = "SELECT alan_id FROM calisma_alanlari WHERE alan_adi LIKE 'Sentetik %%'"
+    calistir(cur, 'calisma_oturumlari', f"""
+        DELETE FROM calisma_oturumlari
+        WHERE kullanici_id IN ({sentetik_kullanici}) OR alan_id IN ({sentetik_alan})
+    """)
+    calistir(cur, 'rezervasyonlar', f"""
+        DELETE FROM rezervasyonlar
+        WHERE kullanici_id IN ({sentetik_kullanici}) OR alan_id IN ({sentetik_alan})
+    """)
+    calistir(cur, 'kullanici_sayaclari',
+             f"DELETE FROM kullanici_sayaclari WHERE kullanici_id IN ({sentetik_kullanici})")
+    calistir(cur, 'kullanicilar', "DELETE FROM kullanicilar WHERE ogrenci_no LIKE 'SENT%%'")
+    calistir(cur, 'calisma_alanlari', "DELETE FROM calisma_alanlari WHERE alan_adi LIKE 'Sentetik %%'")
+    cur.execute("SET session_replication_role = DEFAULT")
+    yeniden_hesapla(cur)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--kullanici', type=int, default=50000)
+    parser.add_argument('--alan', type=int, default=2000)
+    parser.add_argument('--rezervasyon', type=int, default=10000000)
+    parser.add_argument('--oturum', type=int, default=20000000)
+    parser.add_argument('--gun', type=int, default=365)
+    parser.add_argument('--tohum', type=int, default=42)
+    parser.add_argument('--bugun', type=date.fromisoformat, default=date.today())
+    parser.add_argument('--parca', type=int, default=100000, help='bir COPY çağrısındaki satır sayısı')
+    parser.add_argument('--sil', action='store_true')
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    cur = conn.cursor()
+    try:
+        if args.sil:
+            sil(cur)
+        else:
+            olustur(cur, args)
+        conn.commit()
+    except psycopg2.Error as e:
+        if e.pgcode == '42501':
+            raise SystemExit('session_replication_role için süper kullanıcı gerekir (ör. docker-compose POSTGRES_USER).')
+        raise
+
+    conn.autocommit = True
+    calistir(cur, 'ANALYZE', "ANALYZE kullanicilar, calisma_alanlari, rezervasyonlar, calisma_oturumlari")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""Aynı alanın aynı saatine çok sayıda eşzamanlı rezervasyon göndererek fazla kayıt olup olmadığını denetler.
+
+Kullanım:
+    python scripts/stress_rezervasyon.py --istemci 64 --alan-id 1
+    python scripts/stress_rezervasyon.py --istemci 64 --alan-id 1 --eski
+
+--eski, yeni_rezervasyon'un önceki SELECT/SELECT/COUNT/INSERT akışını çalıştırır ve
+karşılaştırma için fazla rezervasyonun nasıl oluştuğunu gösterir.
+Betik 'STRES' önekli test kullanıcıları oluşturur, sonunda oluşturduğu rezervasyonları siler.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from db import DB_CONFIG
+
+
+def baglan():
+    return psycopg2.connect(**DB_CONFIG, cursor_factory=RealDictCursor)
+
+
+def test_kullanicilari(sayi):
+    conn = baglan()
+    cur = conn.cursor()
+    for i in range(sayi):
+        cur.execute("""
+            INSERT INTO kullanicilar (ogrenci_no, ad, soyad, email, sifre, rol)
+            VALUES (%s, 'Stres', %s, %s, 'stres', 'ogrenci')
+            ON CONFLICT (ogrenci_no) DO NOTHING
+        """, (f'STRES{i:05d}', str(i), f'stres{i:05d}@std.yildiz.edu.tr'))
+    cur.execute("""
+        SELECT kullanici_id FROM kullanicilar WHERE ogrenci_no LIKE 'STRES%%'
+        ORDER BY ogrenci_no LIMIT %s
+    """, (sayi,))
+    kimlikler = [r['kullanici_id'] for r in cur.fetchall()]
+    conn.commit()
+    conn.close()
+    return kimlikler
+
+
+def atomik_kabul(cur, kullanici_id, alan_id, baslangic, bitis):
+    cur.execute("""
+        SELECT sonuc FROM fn_rezervasyon_kabul(%s, %s, %s, %s, 'stres testi')
+    """, (kullanici_id, alan_id, baslangic, bitis))
+    return cur.fetchone()['sonuc']
+
+
+def eski_kabul(cur, kullanici_id, alan_id, baslangic, bitis):
+    cur.execute("""
+        SELECT 1 FROM rezervasyonlar
+        WHERE kullanici_id = %s AND durum = 'aktif'
+        AND baslangic_zamani < %s AND bitis_zamani > %s
+    """, (kullanici_id, bitis, baslangic))
+    if cur.fetchone():
+        return 'KULLANICI_CAKISMA'
+    cur.execute("SELECT kapasite FROM calisma_alanlari WHERE alan_id = %s", (alan_id,))
+    kapasite = cur.fetchone()['kapasite']
+    cur.execute("""
+        SELECT COUNT(*) AS sayi FROM rezervasyonlar
+        WHERE alan_id = %s AND durum = 'aktif'
+        AND baslangic_zamani < %s AND bitis_zamani > %s
+    """, (alan_id, bitis, baslangic))
+    if cur.fetchone()['sayi'] >= kapasite:
+        return 'KAPASITE_DOLU'
+    cur.execute("""
+        INSERT INTO rezervasyonlar (kullanici_id, alan_id, baslangic_zamani, bitis_zamani, notlar)
+        VALUES (%s, %s, %s, %s, 'stres testi')
+    """, (kullanici_id, alan_id, baslangic, bitis))
+    return 'KABUL'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--istemci', type=int, default=64)
+    parser.add_argument('--alan-id', type=int, default=1)
+    parser.add_argument('--tur', type=int, default=5, help='tekrar sayısı (her turda farklı saat)')
+    parser.add_argument('--eski', action='store_true')
+    args = parser.parse_args()
+
+    kabul_fn = eski_kabul if args.eski else atomik_kabul
+    kullanicilar = test_kullanicilari(args.istemci)
+
+    conn = baglan()
+    cur = conn.cursor()
+    cur.execute("SELECT kapasite FROM calisma_alanlari WHERE alan_id = %s", (args.alan_id,))
+    kapasite = cur.fetchone()['kapasite']
+    conn.commit()
+
+    fazla_toplam = 0
+    for tur in range(args.tur):
+        baslangic = datetime(2099, 1, 1, 9) + timedelta(days=random.randint(0, 3000))
+        bitis = baslangic + timedelta(hours=2)
+        baglantilar = [baglan() for _ in kullanicilar]
+        engel = threading.Barrier(len(kullanicilar))
+        sonuclar = Counter()
+        kilit = threading.Lock()
+
+        def istemci(kullanici_id, c):
+            ic = c.cursor()
+            engel.wait()
+            try:
+                sonuc = kabul_fn(ic, kullanici_id, args.alan_id, baslangic, bitis)
+                c.commit()
+            except psycopg2.Error as e:
+                c.rollback()
+                sonuc = type(e).__name__
+            with kilit:
+                sonuclar[sonuc] += 1
+
+        thread_listesi = [threading.Thread(target=istemci, args=(k, c))
+                          for k, c in zip(kullanicilar, baglantilar)]
+        for t in thread_listesi:
+            t.start()
+        for t in thread_listesi:
+            t.join()
+        for c in baglantilar:
+            c.close()
+
+        cur.execute("""
+            SELECT COUNT(*) AS sayi FROM rezervasyonlar
+            WHERE alan_id = %s AND durum = 'aktif'
+            AND baslangic_zamani = %s AND bitis_zamani = %s
+        """, (args.alan_id, baslangic, bitis))
+        olusan = cur.fetchone()['sayi']
+        fazla = max(0, olusan - kapasite)
+        fazla_toplam += fazla
+        print(f"tur {tur + 1}: {baslangic:%Y-%m-%d %H:%M} kapasite={kapasite} "
+              f"olusan={olusan} fazla={fazla} sonuclar={dict(sonuclar)}")
+
+        cur.execute("""
+            DELETE FROM rezervasyonlar
+            WHERE alan_id = %s AND baslangic_zamani = %s AND notlar = 'stres testi'
+        """, (args.alan_id, baslangic))
+        conn.commit()
+
+    conn.close()
+    print('BAŞARILI: fazla rezervasyon yok' if fazla_toplam == 0
+          else f'BAŞARISIZ: toplam {fazla_toplam} fazla rezervasyon')
+    sys.exit(1 if fazla_toplam else 0)
+
+
+if __name__ == '__main__':
+    main()
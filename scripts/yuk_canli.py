@@ -0,0 +1,174 @@
+"""Çok sayıda boşta bekleyen SSE abonesinin veritabanına yükünü ve olay dağıtım gecikmesini ölçer.
+
+Kullanım:
+    python scripts/yuk_canli.py --istemci 200 --sure 30
+    python scripts/yuk_canli.py --istemci 200 --sure 30 --yoklama 5
+
+Önce abone yokken, sonra --istemci kadar /api/canli aboneliği açıkken --sure saniye boyunca
+pg_stat_database üzerinden işlem ve okunan satır sayısı ölçülür. Aboneler bağlıyken
+'oturum_degisti' kanalına sentetik bir bildirim (alan 0) gönderilir ve tüm abonelere
+ulaşma süresi raporlanır. --yoklama N verilirse aynı sayıda istemcinin N saniyede bir
+/takvim sayfasını yenilediği durum da karşılaştırma için ölçülür.
+
+Aboneler bağlıyken --normal kadar sıradan istek (--paralel eşzamanlı) atılır; akışların
+worker kapasitesini tüketip tüketmediği böyle görülür. Bu isteklerden biri bile başarısız
+olur ya da zaman aşımına uğrarsa betik 1 ile çıkar. Sınırı (CANLI_AZAMI_ABONE) aşan ve
+503 alan abonelikler ayrıca raporlanır.
+"""
+import argparse
+import http.cookiejar
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import psycopg2
+
+from db import DB_CONFIG
+
+
+def oturum_ac(url, ogrenci_no, sifre):
+    acici = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    govde = urllib.parse.urlencode({'ogrenci_no': ogrenci_no, 'sifre': sifre}).encode()
+    acici.open(f'{url}/login', govde).read()
+    return acici
+
+
+def db_sayaclari(cur):
+    cur.execute("""
+        SELECT xact_commit + xact_rollback AS islem, tup_returned + tup_fetched AS satir
+        FROM pg_stat_database WHERE datname = current_database()
+    """)
+    return cur.fetchone()
+
+
+def olc(cur, sure):
+    # pg_stat_database sayaçları birkaç yüz milisaniye gecikmeyle güncellenir
+    cur.execute('SELECT pg_stat_clear_snapshot()')
+    ilk = db_sayaclari(cur)
+    time.sleep(sure)
+    cur.execute('SELECT pg_stat_clear_snapshot()')
+    son = db_sayaclari(cur)
+    return (son[0] - ilk[0]) / sure, (son[1] - ilk[1]) / sure
+
+
+def normal_istekler(acici, url, sayi, paralel):
+    """Başarılı isteklerin sıralı sürelerini (ms) döndürür; her istek 10 saniyede tamamlanmalıdır."""
+    def istek(_):
+        start = time.perf_counter()
+        try:
+            acici.open(f'{url}/api/takvim-verileri', timeout=10).read()
+        except OSError:
+            return None
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(paralel) as havuz:
+        sureler = list(havuz.map(istek, range(sayi)))
+    return sorted(s for s in sureler if s is not None)
+
+
+class Abone(threading.Thread):
+    def __init__(self, acici, url, bekleyen):
+        super().__init__(daemon=True)
+        self.acici = acici
+        self.url = url
+        self.bekleyen = bekleyen
+        self.baglandi = threading.Event()
+        self.reddedildi = False
+        self.olay_zamani = None
+
+    def run(self):
+        try:
+            yanit = self.acici.open(f'{self.url}/api/canli', timeout=300)
+        except urllib.error.HTTPError as e:
+            self.reddedildi = e.code == 503
+            self.baglandi.set()
+            return
+        self.baglandi.set()
+        olay = None
+        for satir in yanit:
+            satir = satir.decode().rstrip('\n')
+            if satir.startswith('event: '):
+                olay = satir[7:]
+            elif satir.startswith('data: ') and olay == 'oturum' and '"alan": 0' in satir:
+                self.olay_zamani = time.perf_counter()
+                self.bekleyen.release()
+                return
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5001')
+    parser.add_argument('--ogrenci-no', default='20210001')
+    parser.add_argument('--sifre', default='sifre123')
+    parser.add_argument('--istemci', type=int, default=200)
+    parser.add_argument('--sure', type=float, default=30)
+    parser.add_argument('--yoklama', type=float, default=0,
+                        help='karşılaştırma için /takvim yenileme aralığı (sn), 0 ise ölçülmez')
+    parser.add_argument('--normal', type=int, default=200,
+                        help='aboneler bağlıyken atılacak sıradan istek sayısı')
+    parser.add_argument('--paralel', type=int, default=20)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    conn.autocommit = True
+    cur = conn.cursor()
+    acici = oturum_ac(args.url, args.ogrenci_no, args.sifre)
+
+    islem, satir = olc(cur, args.sure)
+    print(f"{'abone yok':<28} {islem:8.1f} işlem/sn {satir:10.0f} satır/sn")
+
+    bekleyen = threading.Semaphore(0)
+    aboneler = [Abone(acici, args.url, bekleyen) for _ in range(args.istemci)]
+    for a in aboneler:
+        a.start()
+    for a in aboneler:
+        a.baglandi.wait(30)
+    reddedilen = sum(a.reddedildi for a in aboneler)
+    bagli = sum(a.baglandi.is_set() for a in aboneler) - reddedilen
+    if reddedilen:
+        print(f'{reddedilen} abonelik kapasite sınırı nedeniyle 503 aldı')
+
+    islem, satir = olc(cur, args.sure)
+    print(f"{f'{bagli} SSE abonesi':<28} {islem:8.1f} işlem/sn {satir:10.0f} satır/sn")
+
+    basarili = normal_istekler(acici, args.url, args.normal, args.paralel)
+    if basarili:
+        print(f"{bagli} abone bağlıyken normal istek: {len(basarili)}/{args.normal} başarılı, "
+              f"p50={basarili[len(basarili) // 2]:.1f} ms, p95={basarili[int(len(basarili) * 0.95)]:.1f} ms")
+    else:
+        print(f'{bagli} abone bağlıyken normal isteklerin hiçbiri tamamlanmadı')
+
+    gonderim = time.perf_counter()
+    cur.execute("""SELECT pg_notify('oturum_degisti', '{"a": 0, "d": 0}')""")
+    ulasan = sum(bekleyen.acquire(timeout=10) for _ in range(bagli))
+    gecikmeler = sorted((a.olay_zamani - gonderim) * 1000 for a in aboneler if a.olay_zamani)
+    if gecikmeler:
+        print(f"olay dağıtımı: {ulasan}/{bagli} aboneye ulaştı, "
+              f"p50={gecikmeler[len(gecikmeler) // 2]:.1f} ms, en yavaş={gecikmeler[-1]:.1f} ms")
+
+    if args.yoklama:
+        dur = threading.Event()
+
+        def yoklayici():
+            while not dur.wait(args.yoklama):
+                acici.open(f'{args.url}/takvim').read()
+
+        for _ in range(args.istemci):
+            threading.Thread(target=yoklayici, daemon=True).start()
+        islem, satir = olc(cur, args.sure)
+        dur.set()
+        print(f"{f'{args.istemci} istemci yoklama':<28} {islem:8.1f} işlem/sn {satir:10.0f} satır/sn")
+
+    conn.close()
+    sys.exit(0 if len(basarili) == args.normal else 1)
+
+
+if __name__ == '__main__':
+    main()
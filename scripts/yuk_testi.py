@@ -0,0 +1,320 @@
+"""Gerçekçi bir istek karışımını uygulamaya oynatır ve yol başına verim ile gecikme yüzdeliklerini raporlar.
+
+Kullanım:
+    python scripts/yuk_testi.py --ogrenci 200 --sure 120
+    python scripts/yuk_testi.py --sure 60 --cikti olcum.json
+    python scripts/yuk_testi.py --sure 60 --karsilastir olcum.json
+
+Hesaplar scripts/sentetik_veri.py'nin yüklediği 'SENT' önekli öğrencilerdir (şifre: sentetik);
+alan kimlikleri veritabanından okunur. Her sanal öğrenci giriş yapar, sonra düşünme süreleriyle
+gösterge paneli, takvim, arama, rezervasyon ve oturum başlat/bitir akışlarından ağırlıklı
+seçim yapar. --admin kadar yönetici rapor sayfalarını dolaşır. --patlama-aralik saniyede bir,
+--patlama-istemci öğrenci aynı anda az sayıda popüler alanın aynı dilimine rezervasyon gönderir
+(dilim açılışındaki yığılma). Aynı --tohum ile istek sırası tekrarlanır.
+
+--cikti sonuçları JSON olarak yazar; --karsilastir önceki bir çıktıyla istek/sn ve p95 farkını gösterir.
+Testin oluşturduğu rezervasyon ve oturumlar sentetik kullanıcılara aittir, sentetik_veri.py --sil kaldırır.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import psycopg2
+
+from db import DB_CONFIG
+
+OGRENCI_AKISLARI = {
+    'dashboard': 25,
+    'takvim': 20,
+    'rezervasyonlarim': 12,
+    'arama': 12,
+    'rezervasyon': 8,
+    'oturum': 8,
+    'istatistikler': 5,
+    'oturumlarim': 5,
+    'zaman_onerisi': 5,
+}
+ADMIN_YOLLARI = ['/admin', '/admin/raporlar', '/admin/kullanicilar', '/admin/loglar', '/admin/durum']
+OTURUM_BITIR = re.compile(rb'/oturum/bitir/(\d+)')
+
+
+def yuzdelik(degerler, oran):
+    sirali = sorted(degerler)
+    return sirali[min(len(sirali) - 1, int(len(sirali) * oran))]
+
+
+class Olcumler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sureler = defaultdict(list)
+        self.hatalar = defaultdict(int)
+        self.kabul = defaultdict(int)
+
+    def ekle(self, yol, sure, hata=False):
+        with self._lock:
+            self.sureler[yol].append(sure)
+            if hata:
+                self.hatalar[yol] += 1
+
+    def kabul_ekle(self, yol):
+        with self._lock:
+            self.kabul[yol] += 1
+
+    def ozet(self, toplam_sure):
+        sonuc = {}
+        for yol in sorted(self.sureler):
+            sureler = self.sureler[yol]
+            sonuc[yol] = {
+                'istek': len(sureler),
+                'hata': self.hatalar[yol],
+                'istek_sn': len(sureler) / toplam_sure,
+                'p50': yuzdelik(sureler, 0.50) * 1000,
+                'p95': yuzdelik(sureler, 0.95) * 1000,
+                'p99': yuzdelik(sureler, 0.99) * 1000,
+            }
+        return sonuc
+
+
+class Istemci:
+    """Tek bir oturum çerezi ve kalıcı (keep-alive) bağlantı ile istek gönderir, süreleri ölçer."""
+
+    def __init__(self, url, olcumler):
+        self.adres = urllib.parse.urlsplit(url)
+        self.olcumler = olcumler
+        self.conn = None
+        self.cerez = ''
+
+    def istek(self, ad, yontem, yol, form=None):
+        govde = urllib.parse.urlencode(form) if form is not None else None
+        basliklar = {'Cookie': self.cerez}
+        if govde is not None:
+            basliklar['Content-Type'] = 'application/x-www-form-urlencoded'
+        start = time.perf_counter()
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.adres.hostname, self.adres.port, timeout=60)
+            self.conn.request(yontem, yol, govde, basliklar)
+            yanit = self.conn.getresponse()
+            icerik = yanit.read()
+        except (OSError, http.client.HTTPException):
+            self.olcumler.ekle(ad, time.perf_counter() - start, hata=True)
+            if self.conn is not None:
+                self.conn.close()
+            self.conn = None
+            return None, None, b''
+        self.olcumler.ekle(ad, time.perf_counter() - start, hata=yanit.status >= 400)
+        cerez = yanit.getheader('Set-Cookie')
+        if cerez:
+            self.cerez = cerez.split(';')[0]
+        return yanit.status, yanit.getheader('Location', ''), icerik
+
+    def giris(self, ogrenci_no, sifre):
+        durum, konum, _ = self.istek('login', 'POST', '/login', {'ogrenci_no': ogrenci_no, 'sifre': sifre})
+        return durum == 302 and '/dashboard' in konum
+
+
+class SanalOgrenci(threading.Thread):
+    def __init__(self, istemci, rng, alanlar, bitis, dusunme):
+        super().__init__(daemon=True)
+        self.istemci = istemci
+        self.rng = rng
+        self.alanlar = alanlar
+        self.bitis = bitis
+        self.dusunme = dusunme
+        self.akislar = list(OGRENCI_AKISLARI)
+        self.agirliklar = list(OGRENCI_AKISLARI.values())
+
+    def rezervasyon_formu(self, alan_id, gun, saat):
+        return {'alan_id': alan_id, 'tarih': gun.isoformat(),
+                'baslangic_saat': f'{saat:02d}:00', 'bitis_saat': f'{saat + self.rng.choice((1, 2)):02d}:00'}
+
+    def rezervasyon(self, ad, form):
+        durum, konum, _ = self.istemci.istek(ad, 'POST', '/rezervasyon/yeni', form)
+        if durum == 302 and '/rezervasyonlarim' in konum:
+            self.istemci.olcumler.kabul_ekle(ad)
+
+    def akis(self, ad):
+        i, rng = self.istemci, self.rng
+        bugun = date.today()
+        if ad == 'takvim':
+            i.istek('takvim', 'GET', '/takvim')
+            i.istek('takvim-verileri', 'GET',
+                    f'/api/takvim-verileri?start={bugun - timedelta(days=7)}&end={bugun + timedelta(days=42)}')
+        elif ad == 'arama':
+            gun = bugun + timedelta(days=rng.randrange(7))
+            saat = rng.randrange(8, 20)
+            i.istek('musait-alanlar', 'GET',
+                    f'/api/musait-alanlar?baslangic={gun}T{saat:02d}:00&bitis={gun}T{saat + 2:02d}:00')
+        elif ad == 'zaman_onerisi':
+            i.istek('zaman-onerisi', 'GET',
+                    f'/api/zaman-onerisi?alan_id={rng.choice(self.alanlar)}&tarih={bugun + timedelta(days=1)}&sure=2')
+        elif ad == 'rezervasyon':
+            i.istek('rezervasyon-formu', 'GET', '/rezervasyon/yeni')
+            gun = bugun + timedelta(days=rng.randrange(1, 8))
+            self.rezervasyon('rezervasyon', self.rezervasyon_formu(rng.choice(self.alanlar), gun, rng.randrange(8, 20)))
+        elif ad == 'oturum':
+            i.istek('oturum-baslat', 'POST', '/oturum/baslat', {'alan_id': rng.choice(self.alanlar)})
+            _, _, sayfa = i.istek('oturumlarim', 'GET', '/oturumlarim')
+            eslesme = OTURUM_BITIR.search(sayfa)
+            if eslesme:
+                i.istek('oturum-bitir', 'POST', f'/oturum/bitir/{int(eslesme.group(1))}',
+                        {'verimlilik': rng.randint(1, 10)})
+        else:
+            i.istek(ad, 'GET', '/' + ad)
+
+    def run(self):
+        while time.monotonic() < self.bitis:
+            self.akis(self.rng.choices(self.akislar, weights=self.agirliklar)[0])
+            time.sleep(self.rng.expovariate(1 / self.dusunme) if self.dusunme else 0)
+
+
+class SanalYonetici(SanalOgrenci):
+    def run(self):
+        while time.monotonic() < self.bitis:
+            yol = self.rng.choice(ADMIN_YOLLARI)
+            self.istemci.istek(yol[1:].replace('/', '-'), 'GET', yol)
+            time.sleep(self.rng.expovariate(1 / self.dusunme) if self.dusunme else 0)
+
+
+class PatlamaOgrencisi(SanalOgrenci):
+    """Her dilim açılışında diğerleriyle aynı anda aynı popüler alanlara rezervasyon gönderir."""
+
+    def __init__(self, istemci, rng, alanlar, bitis, bariyer, tur):
+        super().__init__(istemci, rng, alanlar, bitis, 0)
+        self.bariyer = bariyer
+        self.tur = tur
+
+    def run(self):
+        while True:
+            try:
+                self.bariyer.wait()
+            except threading.BrokenBarrierError:
+                return
+            if time.monotonic() >= self.bitis:
+                return
+            # her tur bir sonraki günün farklı bir saatini açar
+            gun = date.today() + timedelta(days=1 + self.tur[0] // 12)
+            saat = 8 + self.tur[0] % 12
+            self.rezervasyon('rezervasyon-patlama', self.rezervasyon_formu(self.rng.choice(self.alanlar), gun, saat))
+
+
+def test_verisi(args):
+    conn = psycopg2.connect(**DB_CONFIG)
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT ogrenci_no FROM kullanicilar
+        WHERE ogrenci_no LIKE 'SENT%%' AND aktif = TRUE
+        ORDER BY ogrenci_no LIMIT %s
+    """, (args.ogrenci + args.patlama_istemci,))
+    ogrenciler = [r[0] for r in cur.fetchall()]
+    cur.execute("SELECT alan_id FROM calisma_alanlari WHERE aktif = TRUE ORDER BY alan_id")
+    alanlar = [r[0] for r in cur.fetchall()]
+    conn.close()
+    if len(ogrenciler) < args.ogrenci + args.patlama_istemci:
+        raise SystemExit(f'{args.ogrenci + args.patlama_istemci} sentetik öğrenci gerekli, '
+                         f'{len(ogrenciler)} bulundu; önce scripts/sentetik_veri.py çalıştırın.')
+    return ogrenciler, alanlar
+
+
+def yazdir(ozet, onceki=None):
+    print(f"{'yol':<26} {'istek':>8} {'hata':>6} {'istek/sn':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+          + ('   Δistek/sn     Δp95' if onceki else ''))
+    for yol, o in ozet.items():
+        satir = (f"{yol:<26} {o['istek']:>8} {o['hata']:>6} {o['istek_sn']:>9.1f} "
+                 f"{o['p50']:>9.1f} {o['p95']:>9.1f} {o['p99']:>9.1f}")
+        if onceki and yol in onceki:
+            eski = onceki[yol]
+            satir += (f"   {(o['istek_sn'] / eski['istek_sn'] - 1) * 100:>+9.1f}%"
+                      f" {(o['p95'] / eski['p95'] - 1) * 100:>+7.1f}%")
+        print(satir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5001')
+    parser.add_argument('--ogrenci', type=int, default=100, help='sanal öğrenci sayısı')
+    parser.add_argument('--admin', type=int, default=2, help='sanal yönetici sayısı')
+    parser.add_argument('--admin-no', default='ADMIN001')
+    parser.add_argument('--admin-sifre', default='admin123')
+    parser.add_argument('--sure', type=float, default=60, help='ölçüm süresi (sn)')
+    parser.add_argument('--dusunme', type=float, default=1.0, help='istekler arası ortalama bekleme (sn)')
+    parser.add_argument('--patlama-istemci', type=int, default=50)
+    parser.add_argument('--patlama-aralik', type=float, default=15, help='dilim açılışları arası süre (sn), 0 ise kapalı')
+    parser.add_argument('--patlama-alan', type=int, default=3, help='yığılmanın hedeflediği alan sayısı')
+    parser.add_argument('--tohum', type=int, default=42)
+    parser.add_argument('--cikti', help='sonuçların yazılacağı JSON dosyası')
+    parser.add_argument('--karsilastir', help='karşılaştırılacak önceki JSON çıktısı')
+    args = parser.parse_args()
+
+    if not args.patlama_aralik:
+        args.patlama_istemci = 0
+    ogrenciler, alanlar = test_verisi(args)
+    rng = random.Random(args.tohum)
+    olcumler = Olcumler()
+
+    def istemci_ac(ogrenci_no, sifre):
+        istemci = Istemci(args.url, olcumler)
+        if not istemci.giris(ogrenci_no, sifre):
+            raise SystemExit(f'{ogrenci_no} ile giriş yapılamadı.')
+        return istemci
+
+    print(f'{len(ogrenciler)} öğrenci ve {args.admin} yönetici giriş yapıyor...')
+    istemciler = [istemci_ac(o, 'sentetik') for o in ogrenciler]
+    yonetici_istemcileri = [istemci_ac(args.admin_no, args.admin_sifre) for _ in range(args.admin)]
+
+    bitis = time.monotonic() + args.sure
+    tur = [0]
+    bariyer = threading.Barrier(args.patlama_istemci + 1) if args.patlama_istemci else None
+    populer = rng.sample(alanlar, min(args.patlama_alan, len(alanlar)))
+    is_parcaciklari = (
+        [SanalOgrenci(i, random.Random(rng.random()), alanlar, bitis, args.dusunme)
+         for i in istemciler[:args.ogrenci]]
+        + [SanalYonetici(i, random.Random(rng.random()), alanlar, bitis, args.dusunme)
+           for i in yonetici_istemcileri]
+        + [PatlamaOgrencisi(i, random.Random(rng.random()), populer, bitis, bariyer, tur)
+           for i in istemciler[args.ogrenci:]]
+    )
+    start = time.perf_counter()
+    for t in is_parcaciklari:
+        t.start()
+    if bariyer:
+        while time.monotonic() + args.patlama_aralik < bitis:
+            time.sleep(args.patlama_aralik)
+            tur[0] += 1
+            bariyer.wait()
+        bariyer.abort()
+    for t in is_parcaciklari:
+        t.join()
+    toplam_sure = time.perf_counter() - start
+
+    ozet = olcumler.ozet(toplam_sure)
+    onceki = None
+    if args.karsilastir:
+        with open(args.karsilastir, encoding='utf-8') as f:
+            onceki = json.load(f)['yollar']
+    yazdir(ozet, onceki)
+    toplam = sum(o['istek'] for o in ozet.values())
+    print(f"toplam: {toplam} istek, {toplam / toplam_sure:.1f} istek/sn, "
+          f"{sum(o['hata'] for o in ozet.values())} hata, {toplam_sure:.1f} sn")
+    for ad in ('rezervasyon', 'rezervasyon-patlama'):
+        if ad in ozet:
+            print(f"{ad} kabul: {olcumler.kabul[ad]}/{ozet[ad]['istek']}")
+
+    if args.cikti:
+        with open(args.cikti, 'w', encoding='utf-8') as f:
+            json.dump({'parametreler': vars(args), 'sure': toplam_sure, 'yollar': ozet}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
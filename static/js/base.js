@@ -0,0 +1,35 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const darkMode = localStorage.getItem('darkMode') === 'true';
+    const darkSwitch = document.getElementById('darkModeSwitch');
+    if (darkSwitch) darkSwitch.checked = darkMode;
+    if (darkMode) document.body.classList.add('dark-mode');
+
+    const zoom = localStorage.getItem('zoom') || '100';
+    const zoomRange = document.getElementById('zoomRange');
+    const zoomValue = document.getElementById('zoomValue');
+    if (zoomRange && zoomValue) {
+        zoomRange.value = zoom;
+        zoomValue.textContent = zoom + '%';
+    }
+    document.body.style.zoom = zoom + '%';
+});
+
+document.getElementById('darkModeSwitch')?.addEventListener('change', function() {
+    document.body.classList.toggle('dark-mode', this.checked);
+    localStorage.setItem('darkMode', this.checked);
+});
+
+document.getElementById('zoomRange')?.addEventListener('input', function() {
+    document.getElementById('zoomValue').textContent = this.value + '%';
+    document.body.style.zoom = this.value + '%';
+    localStorage.setItem('zoom', this.value);
+});
+
+document.getElementById('sidebarToggle')?.addEventListener('click', function() {
+    document.getElementById('sidebar').classList.toggle('show');
+    document.getElementById('sidebarOverlay').classList.toggle('show');
+});
+document.getElementById('sidebarOverlay')?.addEventListener('click', function() {
+    document.getElementById('sidebar').classList.remove('show');
+    this.classList.remove('show');
+});
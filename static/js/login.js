@@ -0,0 +1,38 @@
+function showForm(type) {
+    document.querySelectorAll('.auth-tab').forEach(tab => tab.classList.remove('active'));
+    document.querySelectorAll('.auth-form').forEach(form => form.classList.remove('active'));
+
+    event.target.classList.add('active');
+    document.getElementById(type + 'Form').classList.add('active');
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    // Dark mode
+    const darkMode = localStorage.getItem('darkMode') !== 'false';
+    document.getElementById('darkModeSwitch').checked = darkMode;
+    if (!darkMode) {
+        document.body.classList.add('light-mode');
+    }
+
+    // Zoom
+    const zoom = localStorage.getItem('zoom') || '100';
+    document.getElementById('zoomRange').value = zoom;
+    document.getElementById('zoomValue').textContent = zoom + '%';
+    document.body.style.zoom = zoom + '%';
+});
+
+document.getElementById('darkModeSwitch').addEventListener('change', function() {
+    if (this.checked) {
+        document.body.classList.remove('light-mode');
+        localStorage.setItem('darkMode', 'true');
+    } else {
+        document.body.classList.add('light-mode');
+        localStorage.setItem('darkMode', 'false');
+    }
+});
+
+document.getElementById('zoomRange').addEventListener('input', function() {
+    document.getElementById('zoomValue').textContent = this.value + '%';
+    document.body.style.zoom = this.value + '%';
+    localStorage.setItem('zoom', this.value);
+});
@@ -0,0 +1,91 @@
+const oturumAyarlari = document.currentScript.dataset;
+
+document.addEventListener('DOMContentLoaded', function() {
+    const aramaInput = document.getElementById('aramaInput');
+    const konumFiltre = document.getElementById('konumFiltre');
+    const prizFiltre = document.getElementById('prizFiltre');
+    const sessizFiltre = document.getElementById('sessizFiltre');
+    const alanlar = document.querySelectorAll('.alan-item');
+    const sonucSayisi = document.getElementById('sonucSayisi');
+    const noResult = document.getElementById('noResult');
+    const baslatBtn = document.getElementById('baslatBtn');
+    
+    function filtrele() {
+        const arama = aramaInput.value.toLowerCase().trim();
+        const konum = konumFiltre.value;
+        const priz = prizFiltre.value;
+        const sessiz = sessizFiltre.value;
+        
+        let gorunenSayi = 0;
+        
+        alanlar.forEach(function(alan) {
+            const ad = alan.dataset.ad;
+            const alanKonum = alan.dataset.konum;
+            const alanPriz = alan.dataset.priz;
+            const alanSessiz = alan.dataset.sessiz;
+            
+            let goster = true;
+            
+            // Arama filtresi
+            if (arama && !ad.includes(arama) && !alanKonum.toLowerCase().includes(arama)) {
+                goster = false;
+            }
+            
+            // Konum filtresi
+            if (konum && alanKonum !== konum) {
+                goster = false;
+            }
+            
+            // Priz filtresi
+            if (priz && alanPriz !== priz) {
+                goster = false;
+            }
+            
+            // Sessiz filtresi
+            if (sessiz && alanSessiz !== sessiz) {
+                goster = false;
+            }
+            
+            if (goster) {
+                alan.classList.remove('d-none');
+                gorunenSayi++;
+            } else {
+                alan.classList.add('d-none');
+                // Gizlenen alanın radio'sunu temizle
+                alan.querySelector('input[type="radio"]').checked = false;
+            }
+        });
+        
+        sonucSayisi.textContent = gorunenSayi + ' alan';
+        
+        if (gorunenSayi === 0) {
+            noResult.classList.remove('d-none');
+            baslatBtn.disabled = true;
+        } else {
+            noResult.classList.add('d-none');
+            baslatBtn.disabled = false;
+        }
+    }
+    
+    // Event listeners - anlık filtreleme
+    aramaInput.addEventListener('input', filtrele);
+    konumFiltre.addEventListener('change', filtrele);
+    prizFiltre.addEventListener('change', filtrele);
+    sessizFiltre.addEventListener('change', filtrele);
+    
+    // Canlı doluluk - açık oturum sayıları sayfa yenilenmeden güncellenir
+    if (window.EventSource) {
+        const akis = new EventSource(oturumAyarlari.canliUrl);
+        akis.addEventListener('oturum', function(e) {
+            const olay = JSON.parse(e.data);
+            const sayac = document.querySelector('.icerideki[data-alan="' + olay.alan + '"]');
+            if (sayac) {
+                sayac.textContent = Math.max(0, parseInt(sayac.textContent, 10) + olay.fark);
+            }
+        });
+        akis.addEventListener('yenile', function() {
+            akis.close();
+            window.location.reload();
+        });
+    }
+});
@@ -0,0 +1,47 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // URL parametrelerini al
+    const urlParams = new URLSearchParams(window.location.search);
+
+    // Alan ID
+    const alanId = urlParams.get('alan_id');
+    if (alanId) {
+        document.getElementById('alan_id').value = alanId;
+    }
+
+    // Tarih
+    const tarih = urlParams.get('tarih');
+    if (tarih) {
+        document.getElementById('tarih').value = tarih;
+    } else {
+        // Bugünün tarihini varsayılan olarak ayarla
+        document.getElementById('tarih').valueAsDate = new Date();
+    }
+
+    // Başlangıç saati
+    const baslangic = urlParams.get('baslangic');
+    if (baslangic) {
+        // "08:00:00" formatını "08:00" formatına çevir
+        const baslangicSaat = baslangic.substring(0, 5);
+        const baslangicSelect = document.getElementById('baslangic_saat');
+        for (let option of baslangicSelect.options) {
+            if (option.value === baslangicSaat) {
+                option.selected = true;
+                break;
+            }
+        }
+    }
+
+    // Bitiş saati
+    const bitis = urlParams.get('bitis');
+    if (bitis) {
+        // "10:00:00" formatını "10:00" formatına çevir
+        const bitisSaat = bitis.substring(0, 5);
+        const bitisSelect = document.getElementById('bitis_saat');
+        for (let option of bitisSelect.options) {
+            if (option.value === bitisSaat) {
+                option.selected = true;
+                break;
+            }
+        }
+    }
+});
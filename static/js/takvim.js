@@ -0,0 +1,143 @@
+const takvimAyarlari = document.currentScript.dataset;
+
+document.addEventListener('DOMContentLoaded', function() {
+    const secili = takvimAyarlari.tarih;
+    const saatListesi = JSON.parse(takvimAyarlari.saatler);
+    const datePicker = document.getElementById('datePicker');
+    const dateDisplay = document.getElementById('dateDisplay');
+    const prevDay = document.getElementById('prevDay');
+    const nextDay = document.getElementById('nextDay');
+    
+    const currentDate = new Date(secili);
+    
+    function formatDate(date) {
+        return date.toISOString().split('T')[0];
+    }
+    
+    function formatDisplayDate(dateStr) {
+        const date = new Date(dateStr);
+        const days = ['Pazar', 'Pazartesi', 'Salı', 'Çarşamba', 'Perşembe', 'Cuma', 'Cumartesi'];
+        const months = ['Ocak', 'Şubat', 'Mart', 'Nisan', 'Mayıs', 'Haziran', 'Temmuz', 'Ağustos', 'Eylül', 'Ekim', 'Kasım', 'Aralık'];
+        return `${date.getDate()} ${months[date.getMonth()]} ${date.getFullYear()}, ${days[date.getDay()]}`;
+    }
+    
+    dateDisplay.textContent = formatDisplayDate(secili);
+    
+    datePicker.addEventListener('change', function() {
+        window.location.href = takvimAyarlari.takvimUrl + '?tarih=' + this.value;
+    });
+    
+    prevDay.addEventListener('click', function(e) {
+        e.preventDefault();
+        const prev = new Date(currentDate);
+        prev.setDate(prev.getDate() - 1);
+        window.location.href = takvimAyarlari.takvimUrl + '?tarih=' + formatDate(prev);
+    });
+    
+    nextDay.addEventListener('click', function(e) {
+        e.preventDefault();
+        const next = new Date(currentDate);
+        next.setDate(next.getDate() + 1);
+        window.location.href = takvimAyarlari.takvimUrl + '?tarih=' + formatDate(next);
+    });
+    
+    const quickInfo = document.getElementById('quickInfo');
+    const quickInfoTitle = document.getElementById('quickInfoTitle');
+    const quickInfoDetail = document.getElementById('quickInfoDetail');
+    
+    function bagla(slot) {
+        slot.addEventListener('mouseenter', function(e) {
+            const alan = this.dataset.alan;
+            const saat = this.dataset.saat;
+            const kapasite = this.dataset.kapasite;
+            const dolu = this.dataset.dolu;
+            
+            quickInfoTitle.textContent = alan;
+            quickInfoDetail.innerHTML = `
+                <div>Saat: ${saat}</div>
+                <div>Kapasite: ${kapasite}</div>
+                <div>Dolu: ${dolu} / Boş: ${kapasite - dolu}</div>
+                <div class="mt-1 text-primary"><i class="bi bi-plus-circle"></i> Rezervasyon için tıklayın</div>
+            `;
+            
+            const rect = this.getBoundingClientRect();
+            quickInfo.style.left = (rect.left + window.scrollX) + 'px';
+            quickInfo.style.top = (rect.bottom + window.scrollY + 5) + 'px';
+            quickInfo.classList.add('show');
+        });
+        
+        slot.addEventListener('mouseleave', function() {
+            quickInfo.classList.remove('show');
+        });
+    }
+    
+    document.querySelectorAll('.time-slot[data-alan]').forEach(bagla);
+    
+    // Canlı doluluk - değişen alanın hücreleri sayfa yenilenmeden güncellenir
+    const kapasiteler = {};
+    const alanAdlari = {};
+    document.querySelectorAll('tr[data-alan-id]').forEach(function(tr) {
+        kapasiteler[tr.dataset.alanId] = parseInt(tr.dataset.kapasite, 10);
+        alanAdlari[tr.dataset.alanId] = tr.dataset.alanAdi;
+    });
+    
+    function hucreGuncelle(alanId, saat, dolu) {
+        const td = document.querySelector('td[data-alan-id="' + alanId + '"][data-saat="' + saat + '"]');
+        if (!td) return;
+        const kapasite = kapasiteler[alanId];
+        const saatMetni = String(saat).padStart(2, '0') + ':00';
+        let slot;
+        if (dolu >= kapasite) {
+            slot = document.createElement('div');
+            slot.className = 'time-slot slot-full';
+            slot.textContent = 'Dolu';
+        } else {
+            slot = document.createElement('a');
+            slot.href = takvimAyarlari.rezervasyonUrl + '?alan_id=' + alanId + '&tarih=' + secili
+                + '&baslangic=' + saatMetni + '&bitis=' + String(saat + 1).padStart(2, '0') + ':00';
+            slot.className = 'time-slot ' + (dolu > 0 ? 'slot-partial' : 'slot-empty');
+            slot.textContent = dolu > 0 ? (kapasite - dolu) + '/' + kapasite : 'Boş';
+            slot.dataset.alan = alanAdlari[alanId];
+            slot.dataset.saat = saatMetni;
+            slot.dataset.kapasite = kapasite;
+            slot.dataset.dolu = dolu;
+            bagla(slot);
+        }
+        td.replaceChildren(slot);
+    }
+    
+    function alanGuncelle(alanId, saatler) {
+        saatListesi.forEach(saat => hucreGuncelle(alanId, saat, saatler[saat] || 0));
+    }
+    
+    function gunuYenile() {
+        fetch(takvimAyarlari.dolulukUrl + '?baslangic=' + secili)
+            .then(r => r.json())
+            .then(veri => {
+                const alanlar = veri.gunler[secili] || {};
+                const dilimSaat = 60 / veri.dilim_dakika;
+                Object.keys(kapasiteler).forEach(alanId => {
+                    const dilimler = alanlar[alanId] || [];
+                    const saatler = {};
+                    for (let saat = 0; saat < 24; saat++) {
+                        saatler[saat] = Math.max(0, ...dilimler.slice(saat * dilimSaat, (saat + 1) * dilimSaat));
+                    }
+                    alanGuncelle(alanId, saatler);
+                });
+            });
+    }
+    
+    if (window.EventSource) {
+        const akis = new EventSource(takvimAyarlari.canliUrl);
+        akis.addEventListener('doluluk', function(e) {
+            const olay = JSON.parse(e.data);
+            if (!(olay.alan in kapasiteler)) return;
+            if (olay.saatler === null) {
+                gunuYenile();
+            } else {
+                alanGuncelle(olay.alan, olay.saatler);
+            }
+        });
+        akis.addEventListener('yenile', gunuYenile);
+    }
+});
@@ -0,0 +1,90 @@
+import threading
+import time
+from datetime import timedelta
+
+import psycopg2
+
+
+class RezervasyonSupurucu:
+    """Süresi geçmiş aktif rezervasyonları fn_rezervasyon_supur ile partiler halinde kapatır.
+
+    Her parti ayrı bir işlemde çalışır; kilitler kısa tutulur ve yarıda kalan bir çalışma
+    yalnızca bitmemiş partiyi geri alır. Fonksiyon satırları SKIP LOCKED ile seçtiği için
+    aynı anda birden fazla süreçte ya da sunucuda çalıştırmak güvenlidir.
+    """
+
+    def __init__(self, parti=500, tolerans_dakika=15, max_parti=200):
+        self.parti = parti
+        self.tolerans = timedelta(minutes=tolerans_dakika)
+        self.max_parti = max_parti
+        self._lock = threading.Lock()
+        self._thread = None
+        self.calismalar = 0
+        self.hatalar = 0
+        self.tamamlanan = 0
+        self.birakilan = 0
+        self.son_calisma = None
+
+    def calistir(self, conn):
+        """Kapatılacak satır kalmayana kadar parti çalıştırır ve bu çalışmanın ölçümlerini döndürür."""
+        start = time.perf_counter()
+        sonuc = {'parti': 0, 'tamamlanan': 0, 'birakilan': 0}
+        cur = conn.cursor()
+        while sonuc['parti'] < self.max_parti:
+            cur.execute("SELECT * FROM fn_rezervasyon_supur(%s, %s)", (self.parti, self.tolerans))
+            satir = cur.fetchone()
+            conn.commit()
+            sonuc['parti'] += 1
+            sonuc['tamamlanan'] += satir['tamamlanan']
+            sonuc['birakilan'] += satir['birakilan']
+            # eksik dolan parti: kalan satırlar yoksa ya da başka bir süpürücünün kilidindeyse durulur
+            if satir['tamamlanan'] + satir['birakilan'] < self.parti:
+                break
+        cur.close()
+        sonuc['sure_ms'] = round((time.perf_counter() - start) * 1000, 1)
+
+        with self._lock:
+            self.calismalar += 1
+            self.tamamlanan += sonuc['tamamlanan']
+            self.birakilan += sonuc['birakilan']
+            self.son_calisma = dict(sonuc, zaman=time.strftime('%Y-%m-%d %H:%M:%S'))
+        return sonuc
+
+    def baslat(self, pool, aralik):
+        """aralik saniyede bir çalışan arka plan iş parçacığını başlatır; süreç başına bir kez çalışır."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, args=(pool, aralik),
+                                            name='rezervasyon-supurucu', daemon=True)
+            self._thread.start()
+
+    def _run(self, pool, aralik):
+        while True:
+            time.sleep(aralik)
+            try:
+                conn = pool.getconn()
+            except psycopg2.Error:
+                with self._lock:
+                    self.hatalar += 1
+                continue
+            try:
+                self.calistir(conn)
+            except psycopg2.Error:
+                # yarım kalan işlem havuza iade edilirken geri alınır
+                with self._lock:
+                    self.hatalar += 1
+            finally:
+                pool.putconn(conn)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'calisma': self.calismalar,
+                'hata': self.hatalar,
+                'tamamlanan': self.tamamlanan,
+                'birakilan': self.birakilan,
+                'son_calisma': self.son_calisma,
+            }